@@ -0,0 +1,226 @@
+"""
+Benchmark for the Embed UI. Drives EmbedUi, GetImageView and the edit components through a create -> edit -> image ->
+add field -> inline toggles -> save flow against the Fake Discord and prints latency, API calls and upload bytes per
+operation. Needs no bot token.
+Run from the repository root: python -m benchmarks.editor_benchmark
+"""
+
+import argparse
+import asyncio
+import collections
+import os
+import struct
+import tempfile
+import time
+import typing
+import zlib
+
+from aiohttp import web
+
+from benchmarks.fake_discord import FakeDiscord, FakeUser, FakeChannel, FakeMessage, FakeInteraction, \
+    FakeApplicationContext, upload_image
+from database.embed_store import EmbedStore
+from database.image_store import ImageStore
+from ui.embed_modify.embed_modify_view import EmbedUi
+from ui.embed_modify.session_manager import SessionManager
+from utils.attachment_dispatcher import AttachmentDispatcher
+from utils.file_io import FileIO
+from utils.picture_cache import PictureCache
+from utils.image_download import ImageDownloader
+from utils.image_normalize import ImageNormalizer
+from utils.rest_scheduler import RestScheduler
+from utils.tracing import Tracer
+
+
+def make_png(width: int, height: int) -> bytes:
+    """
+    Creates an uncompressed grayscale PNG.
+
+    :param width: int -> Width in pixels.
+    :param height: int -> Height in pixels.
+    :return: bytes -> The PNG file.
+    """
+
+    def chunk(chunk_type: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + chunk_type + data + struct.pack(">I", zlib.crc32(chunk_type + data))
+
+    rows: bytes = b"".join(b"\x00" + os.urandom(width) for _ in range(height))
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 0, 0, 0, 0)) \
+        + chunk(b"IDAT", zlib.compress(rows, 0)) + chunk(b"IEND", b"")
+
+
+class Bot:
+    """
+    The parts of discord.Bot the Embed UI uses, with the real stores and schedulers.
+    """
+
+    def __init__(self, rate_limits: bool, normalize: bool):
+        self.file_io: FileIO = FileIO(cache=PictureCache())
+        self.embed_store: EmbedStore = EmbedStore("./daten/embeds.db")
+        self.image_store: ImageStore = ImageStore(self.embed_store, "./daten/saved_pictures", file_io=self.file_io)
+        self.image_downloader: ImageDownloader = ImageDownloader(file_io=self.file_io)
+        self.image_normalizer: typing.Optional[ImageNormalizer] = \
+            ImageNormalizer("./daten/normalized") if normalize else None
+        self.attachment_dispatcher: AttachmentDispatcher = AttachmentDispatcher()
+        self.session_manager: SessionManager = SessionManager(max_per_user=2, max_sessions=10000)
+        if rate_limits:
+            self.rest_scheduler: RestScheduler = RestScheduler()
+        else:
+            self.rest_scheduler: RestScheduler = RestScheduler(channel_rate=10 ** 6, channel_per=1.0,
+                                                               global_rate=10 ** 6, global_per=1.0)
+        self.tracer: Tracer = Tracer()
+
+
+async def timed(fake: FakeDiscord, results: dict, channel: FakeChannel, operation: str,
+                coroutine: typing.Awaitable) -> None:
+    """
+    Runs one operation and records its latency, API calls and upload bytes.
+
+    :param fake: FakeDiscord -> The Fake Discord.
+    :param results: dict -> operation -> list of (seconds, calls, upload bytes).
+    :param channel: FakeChannel -> The channel of the flow.
+    :param operation: str -> Name of the operation.
+    :param coroutine: Awaitable -> The operation.
+    :return:
+    """
+
+    calls, upload = fake.totals(channel.id)
+    start: float = time.perf_counter()
+    await coroutine
+    duration: float = time.perf_counter() - start
+    new_calls, new_upload = fake.totals(channel.id)
+    results[operation].append((duration, new_calls - calls, new_upload - upload))
+
+
+async def flow(bot: Bot, fake: FakeDiscord, results: dict, index: int, image_url: str, toggles: int) -> None:
+    """
+    One editor session: create -> edit -> image -> add field -> inline toggles -> save -> close.
+
+    :param bot: Bot -> The bot.
+    :param fake: FakeDiscord -> The Fake Discord.
+    :param results: dict -> operation -> list of (seconds, calls, upload bytes).
+    :param index: int -> Index of the flow, used as embed id, user and channel.
+    :param image_url: str -> Url the Image gets downloaded from.
+    :param toggles: int -> Amount of inline toggles.
+    :return:
+    """
+
+    user: FakeUser = FakeUser(index + 1)
+    channel: FakeChannel = FakeChannel(index + 1)
+    view: EmbedUi = EmbedUi(bot, FakeApplicationContext(fake, user, channel))
+    view.message = FakeMessage(fake, channel)
+    await timed(fake, results, channel, "start", view.start())
+    fake.modal_inputs[user.id].append([str(index), f"benchmark_{index}"])
+    await timed(fake, results, channel, "create", view.create(FakeInteraction(fake, user, channel)))
+    fake.modal_inputs[user.id].append(["Title", "Description " * 20, "#00ff00", "", ""])
+    await timed(fake, results, channel, "edit_embed", view.edit_embed(FakeInteraction(fake, user, channel)))
+    upload: asyncio.Task = asyncio.get_running_loop().create_task(
+        upload_image(fake, bot.attachment_dispatcher, user, channel, image_url))
+    await timed(fake, results, channel, "edit_image", view.edit_image(FakeInteraction(fake, user, channel)))
+    await upload
+    fake.modal_inputs[user.id].append(["Field", "Value " * 20])
+    await timed(fake, results, channel, "add_field", view.add_field(FakeInteraction(fake, user, channel)))
+
+    async def toggle() -> None:
+        for toggle_index in range(toggles):
+            await view.modify_inline_field(FakeInteraction(fake, user, channel), 0, toggle_index % 2 == 1)
+        # The coalesced preview update.
+        if view.renderer.task is not None:
+            await asyncio.gather(view.renderer.task, return_exceptions=True)
+
+    await timed(fake, results, channel, "inline_toggles", toggle())
+    await timed(fake, results, channel, "save_embed", view.save_embed(FakeInteraction(fake, user, channel)))
+    await timed(fake, results, channel, "close", view.close())
+
+
+def percentile(values: list, percent: float) -> float:
+    """
+    Gets a percentile of the values.
+
+    :param values: list -> The values.
+    :param percent: float -> The percentile (0 - 100).
+    :return: float -> The value at the percentile.
+    """
+
+    ordered: list = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * percent / 100))]
+
+
+async def main(flows: int, concurrency: int, latency: float, image_size: int, toggles: int,
+               rate_limits: bool, normalize: bool) -> None:
+    """
+    Runs all flows and prints the result.
+
+    :param flows: int -> Amount of editor sessions.
+    :param concurrency: int -> Sessions at the same time.
+    :param latency: float -> Simulated seconds per API call.
+    :param image_size: int -> Width and height of the uploaded Image.
+    :param toggles: int -> Inline toggles per session.
+    :param rate_limits: bool -> If the REST scheduler uses the Discord limits.
+    :param normalize: bool -> If uploaded Images get normalized (needs Pillow).
+    :return:
+    """
+
+    # Serve the Image locally, the real downloader is used.
+    image: bytes = make_png(image_size, image_size)
+    app: web.Application = web.Application()
+    app.router.add_get("/image.png", lambda request: web.Response(body=image, content_type="image/png"))
+    runner: web.AppRunner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    image_url: str = f"http://127.0.0.1:{runner.addresses[0][1]}/image.png"
+
+    fake: FakeDiscord = FakeDiscord(latency)
+    bot: Bot = Bot(rate_limits, normalize)
+    results: dict = collections.defaultdict(list)
+    semaphore: asyncio.Semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(index: int) -> None:
+        async with semaphore:
+            await flow(bot, fake, results, index, image_url, toggles)
+
+    start: float = time.perf_counter()
+    await asyncio.gather(*[limited(index) for index in range(flows)])
+    duration: float = time.perf_counter() - start
+    await bot.image_downloader.close()
+    await bot.embed_store.close()
+    bot.file_io.shutdown()
+    if bot.image_normalizer is not None:
+        bot.image_normalizer.shutdown()
+    await runner.cleanup()
+
+    print(f"flows: {flows}, concurrency: {concurrency}, latency: {latency * 1000:.0f} ms, "
+          f"seconds: {duration:.3f}, flows/s: {flows / duration:.1f}")
+    print(f"{'operation':<16}{'avg ms':>10}{'p95 ms':>10}{'calls':>8}{'upload KB':>12}")
+    for operation, values in results.items():
+        durations: list = [value[0] for value in values]
+        print(f"{operation:<16}{sum(durations) / len(values) * 1000:>10.2f}{percentile(durations, 95) * 1000:>10.2f}"
+              f"{sum(value[1] for value in values) / len(values):>8.1f}"
+              f"{sum(value[2] for value in values) / len(values) / 1024:>12.1f}")
+    print("stages (avg ms, p95 bucket ms, count):")
+    for stage, summary in bot.tracer.report()["stages"].items():
+        print(f"  {stage:<40}{summary['avg'] * 1000:>10.2f}{summary['p95'] * 1000:>10.2f}{summary['count']:>8}")
+    print(f"rest scheduler: {bot.rest_scheduler.metrics()}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark for the Embed UI against a fake Discord.")
+    parser.add_argument("--flows", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated seconds per API call.")
+    parser.add_argument("--image-size", type=int, default=256, help="Width and height of the uploaded Image.")
+    parser.add_argument("--toggles", type=int, default=3, help="Inline toggles per session.")
+    parser.add_argument("--rate-limits", action="store_true", help="Use the Discord rate limits.")
+    parser.add_argument("--normalize", action="store_true", help="Normalize uploaded Images (needs Pillow).")
+    arguments = parser.parse_args()
+    # All paths of the Embed UI are relative (./daten) - Runs in a temporary directory.
+    working_directory: str = os.getcwd()
+    with tempfile.TemporaryDirectory() as directory:
+        for sub_directory in ["pictures", "saved_pictures"]:
+            os.makedirs(os.path.join(directory, "daten", sub_directory))
+        os.chdir(directory)
+        try:
+            asyncio.run(main(arguments.flows, arguments.concurrency, arguments.latency, arguments.image_size,
+                             arguments.toggles, arguments.rate_limits, arguments.normalize))
+        finally:
+            os.chdir(working_directory)
@@ -0,0 +1,100 @@
+"""
+Benchmark for the Embed Model. Compares one edit via copy.deepcopy of a discord.Embed with one edit via the Embed
+Model, for an embed with 25 fields.
+Run from the repository root: python -m benchmarks.embed_model_benchmark
+"""
+
+import argparse
+import copy
+import time
+
+import discord
+
+from ui.embed_modify.embed_model import EmbedModel
+
+
+def build_data(fields: int) -> dict:
+    """
+    Builds the embed data used for the benchmark.
+
+    :param fields: int -> Amount of fields.
+    :return: dict -> The embed data.
+    """
+
+    return {"type": "rich", "title": "Benchmark", "description": "Description " * 50, "color": 0x00ff00,
+            "author": {"name": "Author", "icon_url": "attachment://author.png"},
+            "footer": {"text": "Footer", "icon_url": "attachment://footer.png"},
+            "image": {"url": "attachment://image.png"},
+            "fields": [{"name": f"Field {index}", "value": "Value " * 30, "inline": True} for index in range(fields)]}
+
+
+def deepcopy_edits(embed: discord.Embed, edits: int) -> float:
+    """
+    Old path: Deepcopy of the embed, then the change.
+
+    :param embed: discord.Embed -> The embed.
+    :param edits: int -> Amount of edits.
+    :return: float -> Seconds needed.
+    """
+
+    start: float = time.perf_counter()
+    for index in range(edits):
+        modify_embed: discord.Embed = copy.deepcopy(embed)
+        modify_embed.title = f"Title {index}"
+        embed = modify_embed
+    return time.perf_counter() - start
+
+
+def model_edits(embed: EmbedModel, edits: int) -> float:
+    """
+    New path: New version of the model, untouched parts are shared.
+
+    :param embed: EmbedModel -> The embed.
+    :param edits: int -> Amount of edits.
+    :return: float -> Seconds needed.
+    """
+
+    start: float = time.perf_counter()
+    for index in range(edits):
+        embed = embed.replace(title=f"Title {index}")
+    return time.perf_counter() - start
+
+
+def model_sends(embed: EmbedModel, sends: int) -> float:
+    """
+    Conversion to discord.Embed, done once per send.
+
+    :param embed: EmbedModel -> The embed.
+    :param sends: int -> Amount of conversions.
+    :return: float -> Seconds needed.
+    """
+
+    start: float = time.perf_counter()
+    for _ in range(sends):
+        embed.to_embed()
+    return time.perf_counter() - start
+
+
+def main(edits: int, fields: int) -> None:
+    """
+    Runs all paths and prints the result.
+
+    :param edits: int -> Amount of edits per path.
+    :param fields: int -> Amount of fields of the embed.
+    :return:
+    """
+
+    data: dict = build_data(fields)
+    results: dict = {"deepcopy": deepcopy_edits(discord.Embed.from_dict(copy.deepcopy(data)), edits),
+                     "model": model_edits(EmbedModel.from_dict(data), edits),
+                     "model to_embed": model_sends(EmbedModel.from_dict(data), edits)}
+    for name, duration in results.items():
+        print(f"{name}: edits: {edits}, seconds: {duration:.3f}, us/edit: {duration / edits * 1e6:.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark for the Embed Model.")
+    parser.add_argument("--edits", type=int, default=10000)
+    parser.add_argument("--fields", type=int, default=25)
+    arguments = parser.parse_args()
+    main(arguments.edits, arguments.fields)
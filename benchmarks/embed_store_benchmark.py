@@ -0,0 +1,61 @@
+"""
+Benchmark for the Embed Store. Simulates concurrent editor sessions and prints the operations per second.
+Run from the repository root: python -m benchmarks.embed_store_benchmark
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from database.embed_store import EmbedStore
+
+
+async def session(store: EmbedStore, session_id: int, operations: int) -> int:
+    """
+    One editor session. Loads its embed via id and name and saves it again.
+
+    :param store: EmbedStore -> The store to benchmark.
+    :param session_id: int -> Id of the session, used as embed id.
+    :param operations: int -> Amount of load/save cycles.
+    :return: int -> The amount of store calls done.
+    """
+
+    value: dict = {"title": f"Session {session_id}", "description": "Benchmark", "fields": []}
+    await store.insert(session_id, f"embed_{session_id}", value)
+    calls: int = 1
+    for index in range(operations):
+        await store.get_by_id(session_id)
+        await store.get_by_name(f"embed_{session_id}")
+        value["description"] = f"Benchmark {index}"
+        await store.update(session_id, value)
+        calls += 3
+    return calls
+
+
+async def main(sessions: int, operations: int) -> None:
+    """
+    Runs all sessions concurrently and prints the result.
+
+    :param sessions: int -> Amount of concurrent sessions.
+    :param operations: int -> Load/save cycles per session.
+    :return:
+    """
+
+    with tempfile.TemporaryDirectory() as directory:
+        store: EmbedStore = EmbedStore(os.path.join(directory, "benchmark.db"))
+        start: float = time.perf_counter()
+        results: list = await asyncio.gather(*[session(store, index, operations) for index in range(sessions)])
+        duration: float = time.perf_counter() - start
+        await store.close()
+    calls: int = sum(results)
+    print(f"sessions: {sessions}, calls: {calls}, seconds: {duration:.3f}, ops/s: {calls / duration:.0f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark for the Embed Store.")
+    parser.add_argument("--sessions", type=int, default=50)
+    parser.add_argument("--operations", type=int, default=100)
+    arguments = parser.parse_args()
+    asyncio.run(main(arguments.sessions, arguments.operations))
@@ -0,0 +1,239 @@
+"""
+In-process stand-in for the Discord interaction, followup and message APIs. Records every call per channel with the
+uploaded bytes, so the Embed UI can be benchmarked without a bot token.
+"""
+
+import asyncio
+import collections
+import datetime
+import itertools
+import os
+import typing
+
+import discord
+
+
+def file_size(file: discord.File) -> int:
+    """
+    Gets the size of a file to send, works for files on disk and in memory.
+
+    :param file: discord.File -> The file.
+    :return: int -> The size in bytes.
+    """
+
+    position: int = file.fp.tell()
+    size: int = file.fp.seek(0, os.SEEK_END)
+    file.fp.seek(position)
+    return size
+
+
+class FakeDiscord:
+    """
+    Counts the API calls and uploaded bytes per channel and answers modals with scripted user input.
+    """
+
+    def __init__(self, latency: float = 0.0):
+        """
+        Init for the Fake Discord.
+
+        :param latency: float -> Simulated seconds per API call.
+        """
+
+        self.latency: float = latency
+        self.ids: typing.Iterator[int] = itertools.count(1)
+        # channel id -> endpoint -> amount of calls
+        self.calls: dict[int, collections.Counter] = collections.defaultdict(collections.Counter)
+        self.upload_bytes: collections.Counter = collections.Counter()
+        # user id -> inputs for the next modals (values of the children in order)
+        self.modal_inputs: dict[int, collections.deque] = collections.defaultdict(collections.deque)
+
+    async def request(self, channel_id: int, endpoint: str, files: typing.Optional[list] = None) -> None:
+        """
+        Records one API call.
+
+        :param channel_id: int -> The channel of the call.
+        :param endpoint: str -> Name of the call.
+        :param files: Optional[list[discord.File]] -> Uploaded files, they get read and closed.
+        :return:
+        """
+
+        self.calls[channel_id][endpoint] += 1
+        for file in files or []:
+            file.fp.seek(0, os.SEEK_END)
+            self.upload_bytes[channel_id] += file.fp.tell()
+            file.close()
+        await asyncio.sleep(self.latency)
+
+    def snowflake(self) -> int:
+        """
+        Creates a new id with the current time, like Discord does.
+
+        :return: int -> The id.
+        """
+
+        return discord.utils.time_snowflake(datetime.datetime.now(datetime.timezone.utc)) + next(self.ids) % 4096
+
+    def totals(self, channel_id: int) -> tuple[int, int]:
+        """
+        Gets the amount of calls and uploaded bytes of a channel.
+
+        :param channel_id: int -> The id of the channel.
+        :return: tuple[int, int] -> (calls, uploaded bytes)
+        """
+
+        return sum(self.calls[channel_id].values()), self.upload_bytes[channel_id]
+
+    async def submit_modal(self, modal: discord.ui.Modal, user: "FakeUser", channel: "FakeChannel") -> None:
+        """
+        Fills the modal with the next scripted input of the user and submits it.
+
+        :param modal: discord.ui.Modal -> The sent modal.
+        :param user: FakeUser -> The user answering.
+        :param channel: FakeChannel -> The channel.
+        :return:
+        """
+
+        values: list = self.modal_inputs[user.id].popleft()
+        for child, value in zip(modal.children, values):
+            child.value = value
+        await modal.callback(FakeInteraction(self, user, channel))
+        modal.stop()
+
+
+class FakeUser:
+    def __init__(self, user_id: int):
+        self.id: int = user_id
+
+
+class FakeChannel:
+    def __init__(self, channel_id: int):
+        self.id: int = channel_id
+
+
+class FakeAttachment:
+    def __init__(self, filename: str, size: int, url: str = ""):
+        self.filename: str = filename
+        self.size: int = size
+        self.url: str = url
+
+
+class FakeMessage:
+    """
+    Message with edit and delete.
+    """
+
+    def __init__(self, fake: FakeDiscord, channel: FakeChannel, author: typing.Optional[FakeUser] = None,
+                 attachments: typing.Optional[list] = None):
+        self.fake: FakeDiscord = fake
+        self.id: int = fake.snowflake()
+        self.channel: FakeChannel = channel
+        self.author: typing.Optional[FakeUser] = author
+        self.attachments: list[FakeAttachment] = attachments or []
+
+    async def edit(self, *args: typing.Any, files: typing.Optional[list] = None,
+                   attachments: typing.Optional[list] = None, **kwargs: typing.Any) -> "FakeMessage":
+        sizes: list = [(file.filename, file_size(file)) for file in files or []]
+        await self.fake.request(self.channel.id, "message.edit", files)
+        if attachments is not None or files is not None:
+            self.attachments = list(attachments or []) + [FakeAttachment(name, size) for name, size in sizes]
+        return self
+
+    async def delete(self) -> None:
+        await self.fake.request(self.channel.id, "message.delete")
+
+
+class FakeResponse:
+    """
+    The interaction response (interaction.response).
+    """
+
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction: FakeInteraction = interaction
+        self.done: bool = False
+
+    def is_done(self) -> bool:
+        return self.done
+
+    async def _respond(self, endpoint: str) -> None:
+        if self.done:
+            raise discord.errors.InteractionResponded(self.interaction)
+        self.done = True
+        await self.interaction.fake.request(self.interaction.channel_id, endpoint)
+
+    async def defer(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        await self._respond("response.defer")
+
+    async def send_message(self, *args: typing.Any, view: typing.Optional[discord.ui.View] = None,
+                           **kwargs: typing.Any) -> None:
+        await self._respond("response.send_message")
+        if view is not None:
+            view.message = FakeMessage(self.interaction.fake, self.interaction.channel)
+
+    async def edit_message(self, *args: typing.Any, **kwargs: typing.Any) -> None:
+        await self._respond("response.edit_message")
+
+    async def send_modal(self, modal: discord.ui.Modal) -> None:
+        await self._respond("response.send_modal")
+        asyncio.get_running_loop().create_task(self.interaction.fake.submit_modal(modal, self.interaction.user,
+                                                                                  self.interaction.channel))
+
+
+class FakeFollowup:
+    """
+    The followup webhook (interaction.followup).
+    """
+
+    def __init__(self, interaction: "FakeInteraction"):
+        self.interaction: FakeInteraction = interaction
+
+    async def send(self, *args: typing.Any, files: typing.Optional[list] = None, **kwargs: typing.Any) \
+            -> FakeMessage:
+        sizes: list = [(file.filename, file_size(file)) for file in files or []]
+        await self.interaction.fake.request(self.interaction.channel_id, "followup.send", files)
+        return FakeMessage(self.interaction.fake, self.interaction.channel,
+                           attachments=[FakeAttachment(name, size) for name, size in sizes])
+
+
+class FakeInteraction:
+    """
+    Interaction of a user in a channel.
+    """
+
+    def __init__(self, fake: FakeDiscord, user: FakeUser, channel: FakeChannel):
+        self.fake: FakeDiscord = fake
+        self.id: int = fake.snowflake()
+        self.user: FakeUser = user
+        self.channel: FakeChannel = channel
+        self.channel_id: int = channel.id
+        self.response: FakeResponse = FakeResponse(self)
+        self.followup: FakeFollowup = FakeFollowup(self)
+
+
+class FakeApplicationContext:
+    """
+    Context of the slash command which opened the Embed UI.
+    """
+
+    def __init__(self, fake: FakeDiscord, user: FakeUser, channel: FakeChannel):
+        self.author: FakeUser = user
+        self.channel_id: int = channel.id
+        self.interaction: FakeInteraction = FakeInteraction(fake, user, channel)
+        self.followup: FakeFollowup = self.interaction.followup
+
+
+async def upload_image(fake: FakeDiscord, dispatcher: typing.Any, user: FakeUser, channel: FakeChannel,
+                       url: str) -> None:
+    """
+    Sends a message with an Image as soon as the Image View waits for it.
+
+    :param fake: FakeDiscord -> The Fake Discord.
+    :param dispatcher: AttachmentDispatcher -> The dispatcher of the bot.
+    :param user: FakeUser -> The user sending the Image.
+    :param channel: FakeChannel -> The channel.
+    :param url: str -> The url of the attachment.
+    :return:
+    """
+
+    while (channel.id, user.id) not in dispatcher.pending:
+        await asyncio.sleep(0.001)
+    await dispatcher.on_message(FakeMessage(fake, channel, user, [FakeAttachment("image.png", 0, url)]))
@@ -4,31 +4,70 @@ Subcog for all dev embed commands.
 
 import discord
 from ui import views
+from utils import picture_gc
 from discord.ext import commands
 
 
+async def embed_name_autocomplete(ctx: discord.AutocompleteContext) -> list:
+    """
+    Autocomplete for embed names. Uses the in-memory name index of the embed store.
+
+    :param ctx: discord.AutocompleteContext -> The Context of the Autocomplete.
+    :return: list -> Up to 25 embed names starting with the current input.
+    """
+
+    return await ctx.bot.embed_store.search_names(ctx.value or "")
+
+
 class ManageEmbed(discord.Cog):
     """
     SlashCommands:
         manage_embed -> starts ui to manage embeds
+        collect_pictures -> removes saved pictures no embed references (developer only)
     """
 
     def __init__(self, bot: discord.Bot):
         self.bot: discord.Bot = bot
 
     @commands.slash_command()
-    async def manage_embed(self, ctx: discord.ApplicationContext):
+    async def manage_embed(self, ctx: discord.ApplicationContext,
+                           name: discord.Option(str, "Name of the Embed to modify.", required=False,
+                                                autocomplete=embed_name_autocomplete) = None):
         """
         Starts the UI for an Embed generation/modification/deletion.
         Takes embed identifier as optional Argument to load a startup embed.
 
         :param ctx: discord.ApplicationContext -> The Application Context for this Command
+        :param name: Optional[str] -> The name of the embed that should be loaded for modification.
         :return:
         """
 
         view = views.EmbedUi(self.bot, ctx)
+        # Limits of open Embed UIs - An older Embed UI of the user in this channel gets closed.
+        if not await self.bot.session_manager.register(view):
+            await ctx.respond("Too many Embed UIs are open, please close one first.", ephemeral=True)
+            return
         await ctx.respond(view=view)
-        await view.start()
+        await view.start(name)
+
+    @commands.slash_command()
+    async def collect_pictures(self, ctx: discord.ApplicationContext,
+                               dry_run: discord.Option(bool, "Only report, remove nothing.", required=False) = True):
+        """
+        Runs the Garbage Collector for saved pictures. Only for developers.
+
+        :param ctx: discord.ApplicationContext -> The Application Context for this Command
+        :param dry_run: bool -> If True only the report is sent, nothing gets removed.
+        :return:
+        """
+
+        if ctx.author.id not in self.bot.developer:
+            await ctx.respond("This command is only for developers.", ephemeral=True)
+            return
+        await ctx.defer(ephemeral=True)
+        report: dict = await picture_gc.collect_saved_pictures(self.bot.embed_store, self.bot.image_store,
+                                                               dry_run=dry_run)
+        await ctx.followup.send(picture_gc.format_report(report), ephemeral=True)
 
 
 def setup(bot: discord.Bot):
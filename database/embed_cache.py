@@ -0,0 +1,123 @@
+"""
+Contains the LRU Cache for the Embed Store. Embeds can be found via id and name.
+"""
+
+import collections
+import typing
+
+
+class EmbedCache:
+    """
+    Bounded LRU Cache for embed dicts (id, name, value). Limited by the amount of entries and the size of the stored
+    embed data in bytes.
+    The cached dicts are shared, they must not be modified by the caller.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 4 * 1024 * 1024):
+        """
+        Init for the Embed Cache.
+
+        :param max_entries: int -> Maximum amount of cached embeds.
+        :param max_bytes: int -> Maximum size of all cached embeds (size of the stored json).
+        """
+
+        self.max_entries: int = max_entries
+        self.max_bytes: int = max_bytes
+        # id -> (embed dict, size) - The order is the LRU order, last is the most recently used.
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        # name -> id
+        self.names: dict = {}
+        self.bytes: int = 0
+        # Changes on every invalidation. Embeds loaded before a write are not added anymore.
+        self.generation: int = 0
+        # Counters
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get_by_id(self, embed_id: int) -> typing.Optional[dict]:
+        """
+        Gets an embed via the id.
+
+        :param embed_id: int -> The id of the embed.
+        :return: Optional[dict] -> None if the embed is not cached.
+        """
+
+        entry: typing.Optional[tuple] = self.entries.get(embed_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(embed_id)
+        return entry[0]
+
+    def get_by_name(self, name: str) -> typing.Optional[dict]:
+        """
+        Gets an embed via the name.
+
+        :param name: str -> The name of the embed.
+        :return: Optional[dict] -> None if the embed is not cached.
+        """
+
+        embed_id: typing.Optional[int] = self.names.get(name)
+        if embed_id is None:
+            self.misses += 1
+            return None
+        return self.get_by_id(embed_id)
+
+    def put(self, embed: dict, size: int, generation: int) -> None:
+        """
+        Adds an embed to the cache. Evicts the least recently used embeds if a limit is reached.
+        Embeds bigger than the byte limit do not get cached.
+
+        :param embed: dict -> The embed dict with id, name and value.
+        :param size: int -> The size of the embed data in bytes.
+        :param generation: int -> The generation when the load started, outdated loads do not get cached.
+        :return:
+        """
+
+        if generation != self.generation or size > self.max_bytes:
+            return
+        self._remove(embed["id"])
+        self.entries[embed["id"]] = (embed, size)
+        self.names[embed["name"]] = embed["id"]
+        self.bytes += size
+        while len(self.entries) > self.max_entries or self.bytes > self.max_bytes:
+            self._remove(next(iter(self.entries)))
+
+    def invalidate(self, embed_id: int) -> None:
+        """
+        Removes an embed from the cache, e.g. because it was written. Loads which started before are not cached.
+
+        :param embed_id: int -> The id of the embed.
+        :return:
+        """
+
+        self.generation += 1
+        self._remove(embed_id)
+
+    def _remove(self, embed_id: int) -> None:
+        """
+        Removes an embed from the cache without changing the generation (eviction).
+
+        :param embed_id: int -> The id of the embed.
+        :return:
+        """
+
+        entry: typing.Optional[tuple] = self.entries.pop(embed_id, None)
+        if entry is None:
+            return
+        self.bytes -= entry[1]
+        if self.names.get(entry[0]["name"]) == embed_id:
+            del self.names[entry[0]["name"]]
+
+    def clear(self) -> None:
+        """
+        Removes all embeds from the cache. The counters stay.
+
+        :return:
+        """
+
+        self.generation += 1
+        self.entries.clear()
+        self.names.clear()
+        self.bytes = 0
@@ -0,0 +1,413 @@
+"""
+Contains the async Embed Store. All embeds get saved in a SQLite Database (WAL mode).
+Every Database call runs on one dedicated Thread with its own connection, so the event loop never gets blocked.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import json
+import sqlite3
+import time
+import typing
+
+from database.embed_cache import EmbedCache
+from database.name_index import NameIndex
+from utils.tracing import Histogram
+
+
+class EmbedStore:
+    """
+    Async Repository for embeds. An embed is stored as dict with id, name and value (embed.to_dict()).
+    Loaded embeds are kept in an LRU Cache, every write invalidates the cached embed. The returned dicts are shared
+    with the cache and must not be modified.
+    """
+
+    # All Statements are constant, sqlite3 prepares them once and keeps them in the statement cache.
+    CREATE_TABLE: str = "CREATE TABLE IF NOT EXISTS embeds (id INTEGER PRIMARY KEY, name TEXT NOT NULL, " \
+                        "value TEXT NOT NULL)"
+    # id is unique as primary key, the name gets its own unique index.
+    CREATE_NAME_INDEX: str = "CREATE UNIQUE INDEX IF NOT EXISTS embeds_name ON embeds (name)"
+    # Checks id and name in one lookup, both indexes get used. The own row (last parameter) gets ignored.
+    SELECT_COLLISION: str = "SELECT id = ?, name = ? FROM embeds WHERE (id = ? OR name = ?) AND id IS NOT ?"
+    SELECT_BY_ID: str = "SELECT id, name, value FROM embeds WHERE id = ?"
+    SELECT_BY_NAME: str = "SELECT id, name, value FROM embeds WHERE name = ?"
+    INSERT: str = "INSERT INTO embeds (id, name, value) VALUES (?, ?, ?)"
+    UPDATE: str = "UPDATE embeds SET value = ? WHERE id = ?"
+    RENAME: str = "UPDATE embeds SET id = ?, name = ?, value = ? WHERE id = ?"
+    DELETE: str = "DELETE FROM embeds WHERE id = ?"
+    SELECT_NAMES: str = "SELECT name FROM embeds"
+    SELECT_BATCH: str = "SELECT id, name, value FROM embeds WHERE id > ? ORDER BY id LIMIT ?"
+
+    def __init__(self, path: str = "./daten/embeds.db", cache_entries: int = 256,
+                 cache_bytes: int = 4 * 1024 * 1024):
+        """
+        Init for the Embed Store. The Database gets opened lazily on the first call.
+
+        :param path: str -> Path of the SQLite Database file.
+        :param cache_entries: int -> Maximum amount of cached embeds.
+        :param cache_bytes: int -> Maximum size of all cached embeds in bytes.
+        """
+
+        self.path: str = path
+        # Only used on the event loop, never inside the worker Thread.
+        self.cache: EmbedCache = EmbedCache(cache_entries, cache_bytes)
+        # Index of all names for the autocomplete, gets loaded on the first search. Only used on the event loop.
+        self.name_index: typing.Optional[NameIndex] = None
+        # One worker -> one connection, every statement is serialised on this Thread.
+        self.executor: concurrent.futures.ThreadPoolExecutor = \
+            concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="embed_store")
+        self.connection: typing.Optional[sqlite3.Connection] = None
+        # Statements of other stores sharing this Database (e.g. CREATE TABLE), run once when the connection opens.
+        self.setup_statements: list[str] = []
+        # Seconds per Database call, waiting for the worker Thread included.
+        self.latency: Histogram = Histogram()
+
+    # Worker Thread
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        Opens the connection if not done yet. Only call this inside the worker Thread.
+
+        :return: sqlite3.Connection -> The connection of the worker Thread.
+        """
+
+        if self.connection is None:
+            # No implicit transactions, _write_unique opens its own.
+            self.connection = sqlite3.connect(self.path, check_same_thread=False, cached_statements=64,
+                                              isolation_level=None)
+            self.connection.execute("PRAGMA journal_mode=WAL")
+            self.connection.execute("PRAGMA synchronous=NORMAL")
+            self.connection.execute(self.CREATE_TABLE)
+            self.connection.execute(self.CREATE_NAME_INDEX)
+            for statement in self.setup_statements:
+                self.connection.execute(statement)
+        return self.connection
+
+    def _fetch_one(self, statement: str, parameter: tuple) -> typing.Optional[tuple]:
+        """
+        Executes a select and converts the first row to the embed dict.
+
+        :param statement: str -> The select statement.
+        :param parameter: tuple -> Parameters for the statement.
+        :return: Optional[tuple] -> (embed dict, size of the stored value), None if nothing was found.
+        """
+
+        row = self._connect().execute(statement, parameter).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "name": row[1], "value": json.loads(row[2])}, len(row[2])
+
+    def _write(self, statement: str, parameter: tuple) -> bool:
+        """
+        Executes a write statement in its own transaction.
+
+        :param statement: str -> The statement.
+        :param parameter: tuple -> Parameters for the statement.
+        :return: bool -> True if at least one row was changed.
+        """
+
+        try:
+            cursor = self._connect().execute(statement, parameter)
+        except sqlite3.Error:
+            return False
+        return cursor.rowcount > 0
+
+    def _collisions(self, embed_id: int, name: str, own_id: typing.Optional[int]) -> list:
+        """
+        Checks which of id and name is already used by another embed.
+
+        :param embed_id: int -> The id that should be free.
+        :param name: str -> The name that should be free.
+        :param own_id: Optional[int] -> The id of the embed itself, it does not count as collision.
+        :return: list -> Contains "id" and/or "name", empty if both are free.
+        """
+
+        collisions: list = []
+        for id_used, name_used in self._connect().execute(self.SELECT_COLLISION,
+                                                          (embed_id, name, embed_id, name, own_id)):
+            if id_used and "id" not in collisions:
+                collisions.append("id")
+            if name_used and "name" not in collisions:
+                collisions.append("name")
+        return collisions
+
+    def _write_unique(self, statement: str, parameter: tuple, embed_id: int, name: str,
+                      own_id: typing.Optional[int]) -> typing.Optional[list]:
+        """
+        Executes a write statement only if id and name are free. Check and write happen in the same transaction,
+        the unique indexes catch anything that slips through.
+
+        :param statement: str -> The statement.
+        :param parameter: tuple -> Parameters for the statement.
+        :param embed_id: int -> The id that should be free.
+        :param name: str -> The name that should be free.
+        :param own_id: Optional[int] -> The id of the embed itself, it does not count as collision.
+        :return: Optional[list] -> None on error, else the collisions (empty if the write was done).
+        """
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                collisions: list = self._collisions(embed_id, name, own_id)
+                if len(collisions) > 0:
+                    return collisions
+                cursor = connection.execute(statement, parameter)
+        except sqlite3.IntegrityError:
+            return self._collisions(embed_id, name, own_id)
+        except sqlite3.Error:
+            return None
+        if cursor.rowcount == 0:
+            return None
+        return []
+
+    def _delete(self, embed_id: int) -> typing.Optional[dict]:
+        """
+        Deletes an embed. Read and delete happen in the same transaction, so only one of concurrent deletes gets the
+        row.
+
+        :param embed_id: int -> The id of the embed.
+        :return: Optional[dict] -> The deleted embed dict, None on error or if the embed did not exist.
+        """
+
+        connection = self._connect()
+        try:
+            with connection:
+                connection.execute("BEGIN IMMEDIATE")
+                deleted: typing.Optional[tuple] = self._fetch_one(self.SELECT_BY_ID, (embed_id,))
+                if deleted is not None:
+                    connection.execute(self.DELETE, (embed_id,))
+        except sqlite3.Error:
+            return None
+        return None if deleted is None else deleted[0]
+
+    def _fetch_names(self) -> list:
+        """
+        Loads all embed names.
+
+        :return: list -> All names.
+        """
+
+        return [row[0] for row in self._connect().execute(self.SELECT_NAMES)]
+
+    def _fetch_batch(self, after_id: typing.Optional[int], limit: int) -> list:
+        """
+        Loads the next embeds ordered by id.
+
+        :param after_id: Optional[int] -> Only embeds with a bigger id get loaded, None for the first batch.
+        :param limit: int -> Maximum amount of embeds.
+        :return: list -> The embed dicts.
+        """
+
+        if after_id is None:
+            after_id = -2 ** 63
+        rows: list = self._connect().execute(self.SELECT_BATCH, (after_id, limit)).fetchall()
+        return [{"id": row[0], "name": row[1], "value": json.loads(row[2])} for row in rows]
+
+    def _close(self) -> None:
+        """
+        Closes the connection. Only call this inside the worker Thread.
+
+        :return:
+        """
+
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+    async def _run(self, function: typing.Callable, *args) -> typing.Any:
+        """
+        Runs the function on the worker Thread.
+
+        :param function: Callable -> The function to run.
+        :param args: The Arguments for the function.
+        :return: Any -> The result of the function.
+        """
+
+        loop = asyncio.get_running_loop()
+        start: float = time.monotonic()
+        try:
+            return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+        finally:
+            self.latency.observe(time.monotonic() - start)
+
+    async def _load(self, statement: str, parameter: tuple) -> typing.Optional[dict]:
+        """
+        Loads an embed from the Database and adds it to the cache.
+
+        :param statement: str -> The select statement.
+        :param parameter: tuple -> Parameters for the statement.
+        :return: Optional[dict] -> None if it does not exist.
+        """
+
+        # A write finishing during the load invalidates the cache - The loaded row could be outdated then.
+        generation: int = self.cache.generation
+        result: typing.Optional[tuple] = await self._run(self._fetch_one, statement, parameter)
+        if result is None:
+            return None
+        self.cache.put(result[0], result[1], generation)
+        return result[0]
+
+    # Methods
+
+    def add_setup(self, statement: str) -> None:
+        """
+        Adds a statement which runs once when the connection opens. Call this before the first Database call.
+
+        :param statement: str -> The statement, e.g. CREATE TABLE IF NOT EXISTS.
+        :return:
+        """
+
+        self.setup_statements.append(statement)
+
+    async def execute(self, function: typing.Callable, *args) -> typing.Any:
+        """
+        Runs a function with the connection on the worker Thread. Used by other stores sharing this Database.
+
+        :param function: Callable -> Gets called with the connection and the args.
+        :param args: The Arguments for the function.
+        :return: Any -> The result of the function.
+        """
+
+        return await self._run(lambda: function(self._connect(), *args))
+
+    async def get_by_id(self, embed_id: int) -> typing.Optional[dict]:
+        """
+        Loads an embed via the id.
+
+        :param embed_id: int -> The id of the embed.
+        :return: Optional[dict] -> None if it does not exist.
+        """
+
+        embed: typing.Optional[dict] = self.cache.get_by_id(embed_id)
+        if embed is None:
+            embed = await self._load(self.SELECT_BY_ID, (embed_id,))
+        return embed
+
+    async def get_by_name(self, name: str) -> typing.Optional[dict]:
+        """
+        Loads an embed via the name.
+
+        :param name: str -> The name of the embed.
+        :return: Optional[dict] -> None if it does not exist.
+        """
+
+        embed: typing.Optional[dict] = self.cache.get_by_name(name)
+        if embed is None:
+            embed = await self._load(self.SELECT_BY_NAME, (name,))
+        return embed
+
+    async def insert(self, embed_id: int, name: str, value: dict) -> typing.Optional[list]:
+        """
+        Creates a new embed if id and name are both free. Checking and inserting is one atomic operation.
+
+        :param embed_id: int -> The id of the new embed.
+        :param name: str -> The name of the new embed.
+        :param value: dict -> The embed data (embed.to_dict()).
+        :return: Optional[list] -> None if an error happend, else a list of the keys which already exist ("id",
+        "name"). Empty list if the embed got created.
+        """
+
+        collisions: typing.Optional[list] = await self._run(self._write_unique, self.INSERT,
+                                                            (embed_id, name, json.dumps(value)), embed_id, name, None)
+        if collisions == [] and self.name_index is not None:
+            self.name_index.add(name)
+        return collisions
+
+    async def update(self, embed_id: int, value: dict) -> typing.Optional[dict]:
+        """
+        Saves the embed data of an existing embed.
+
+        :param embed_id: int -> The id of the embed.
+        :param value: dict -> The embed data (embed.to_dict()).
+        :return: Optional[dict] -> None if an error happend or the embed does not exist.
+        """
+
+        written: bool = await self._run(self._write, self.UPDATE, (json.dumps(value), embed_id))
+        # Invalidated after the write - A load queued before the write would put the old row back otherwise.
+        self.cache.invalidate(embed_id)
+        if not written:
+            return None
+        return await self.get_by_id(embed_id)
+
+    async def rename(self, old_id: int, embed_id: int, name: str, value: dict) -> typing.Optional[list]:
+        """
+        Changes id and name of an existing embed and saves the embed data, if id and name are not used by another
+        embed. Checking and renaming is one atomic operation.
+
+        :param old_id: int -> The current id of the embed.
+        :param embed_id: int -> The new id.
+        :param name: str -> The new name.
+        :param value: dict -> The embed data (embed.to_dict()).
+        :return: Optional[list] -> None if an error happend or the embed does not exist, else a list of the keys
+        which already exist ("id", "name"). Empty list if the embed got renamed.
+        """
+
+        old_embed: typing.Optional[dict] = await self.get_by_id(old_id)
+        collisions: typing.Optional[list] = await self._run(self._write_unique, self.RENAME,
+                                                            (embed_id, name, json.dumps(value), old_id), embed_id,
+                                                            name, old_id)
+        self.cache.invalidate(old_id)
+        if collisions == [] and self.name_index is not None and old_embed is not None:
+            self.name_index.rename(old_embed["name"], name)
+        return collisions
+
+    async def delete(self, embed_id: int) -> typing.Optional[dict]:
+        """
+        Deletes an embed.
+
+        :param embed_id: int -> The id of the embed.
+        :return: Optional[dict] -> The deleted embed as stored, None if the embed did not exist (e.g. another session
+        deleted it first).
+        """
+
+        deleted: typing.Optional[dict] = await self._run(self._delete, embed_id)
+        self.cache.invalidate(embed_id)
+        if deleted is not None and self.name_index is not None:
+            self.name_index.remove(deleted["name"])
+        return deleted
+
+    async def iterate(self, batch_size: int = 500) -> typing.AsyncIterator[dict]:
+        """
+        Streams all embeds ordered by id, loaded in batches. Does not use the cache.
+
+        :param batch_size: int -> Amount of embeds loaded per Database call.
+        :return: AsyncIterator[dict] -> The embed dicts.
+        """
+
+        after_id: typing.Optional[int] = None
+        while True:
+            batch: list = await self._run(self._fetch_batch, after_id, batch_size)
+            for embed in batch:
+                yield embed
+            if len(batch) < batch_size:
+                return
+            after_id = batch[-1]["id"]
+
+    async def search_names(self, prefix: str, limit: int = 25) -> list:
+        """
+        Searches all embed names starting with the prefix (case insensitive). Only the first call needs the
+        Database, after that the in-memory index is used.
+
+        :param prefix: str -> The start of the name.
+        :param limit: int -> Maximum amount of names.
+        :return: list -> The found names.
+        """
+
+        if self.name_index is None:
+            names: list = await self._run(self._fetch_names)
+            # Another search could have loaded the index in the meantime.
+            if self.name_index is None:
+                self.name_index = NameIndex(names)
+        return self.name_index.search(prefix, limit)
+
+    async def close(self) -> None:
+        """
+        Closes the connection and the worker Thread.
+
+        :return:
+        """
+
+        await self._run(self._close)
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,201 @@
+"""
+Contains the Image Store for saved pictures. Pictures are stored content addressed (SHA-256 of the bytes), so the same
+picture is only stored once. Every picture has a reference count in the embed Database.
+"""
+
+import hashlib
+import os
+import shutil
+import sqlite3
+import typing
+
+from database.embed_store import EmbedStore
+from utils.file_io import FileIO
+
+
+class ImageStore:
+    """
+    Content addressed, reference counted store for ./daten/saved_pictures.
+    A picture gets removed when no saved embed references it anymore.
+    """
+
+    CREATE_TABLE: str = "CREATE TABLE IF NOT EXISTS images (name TEXT PRIMARY KEY, refs INTEGER NOT NULL)"
+    SELECT_REFS: str = "SELECT refs FROM images WHERE name = ?"
+    UPSERT_REFS: str = "INSERT INTO images (name, refs) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET refs = " \
+                       "excluded.refs"
+    DELETE_REFS: str = "DELETE FROM images WHERE name = ?"
+
+    def __init__(self, embed_store: EmbedStore, directory: str = "./daten/saved_pictures",
+                 file_io: typing.Optional[FileIO] = None):
+        """
+        Init for the Image Store.
+
+        :param embed_store: EmbedStore -> The reference counts are stored in the Database of this store.
+        :param directory: str -> The directory of the saved pictures.
+        :param file_io: Optional[FileIO] -> Pool for hashing, moving and removing the files. Default an own pool.
+        """
+
+        self.embed_store: EmbedStore = embed_store
+        self.directory: str = directory
+        self.file_io: FileIO = file_io or FileIO()
+        # The table is created once, when the connection of the embed store opens.
+        embed_store.add_setup(self.CREATE_TABLE)
+
+    def _add(self, path: str) -> tuple[str, bool]:
+        """
+        Copies the file into the store, if the same picture is not stored already. The file itself stays, older
+        versions of the embed in the undo history still use it.
+
+        :param path: str -> Path of the file.
+        :return: tuple[str, bool] -> (file name in the store, True if the file was created).
+        """
+
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as file:
+            for chunk in iter(lambda: file.read(64 * 1024), b""):
+                sha256.update(chunk)
+        # Keep the type ending, Discord needs it to display the attachment.
+        name: str = f"{sha256.hexdigest()}{os.path.splitext(path)[1]}"
+        destination: str = os.path.join(self.directory, name)
+        # The garbage collector only removes unreferenced pictures with an old modification time. A stored picture
+        # gets touched and a copy gets a new one (copyfile does not copy the metadata), so the picture stays until the
+        # save has updated the reference count.
+        if os.path.isfile(destination):
+            try:
+                os.utime(destination)
+                return name, False
+            except FileNotFoundError:
+                # Removed by the garbage collector in the meantime.
+                pass
+        # Copied under a temporary name - The store never contains half written pictures.
+        temporary: str = f"{destination}.tmp"
+        shutil.copyfile(path, temporary)
+        os.replace(temporary, destination)
+        return name, True
+
+    def _update_references(self, connection: sqlite3.Connection, deltas: dict) -> list:
+        """
+        Changes the reference counts in one transaction. Runs inside the worker Thread of the embed store.
+
+        :param connection: sqlite3.Connection -> The connection of the embed store.
+        :param deltas: dict -> file name -> change of the reference count.
+        :return: list -> All file names which are not referenced anymore.
+        """
+
+        unreferenced: list = []
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            for name, delta in deltas.items():
+                row: typing.Optional[tuple] = connection.execute(self.SELECT_REFS, (name,)).fetchone()
+                # Pictures saved before the store existed have no count, they only belong to one embed.
+                refs: int = (0 if row is None else row[0]) + delta
+                if refs > 0:
+                    connection.execute(self.UPSERT_REFS, (name, refs))
+                else:
+                    connection.execute(self.DELETE_REFS, (name,))
+                    unreferenced.append(name)
+        return unreferenced
+
+    def _forget(self, connection: sqlite3.Connection, names: list) -> None:
+        """
+        Removes the reference counts. Runs inside the worker Thread of the embed store.
+
+        :param connection: sqlite3.Connection -> The connection of the embed store.
+        :param names: list -> The file names.
+        :return:
+        """
+
+        with connection:
+            connection.execute("BEGIN IMMEDIATE")
+            connection.executemany(self.DELETE_REFS, [(name,) for name in names])
+
+    def _unreferenced(self, connection: sqlite3.Connection, names: list) -> list:
+        """
+        Gets the names without reference count. Runs inside the worker Thread of the embed store.
+
+        :param connection: sqlite3.Connection -> The connection of the embed store.
+        :param names: list -> The file names.
+        :return: list -> The names without reference count.
+        """
+
+        return [name for name in names if connection.execute(self.SELECT_REFS, (name,)).fetchone() is None]
+
+    def _remove(self, names: list) -> None:
+        """
+        Removes the files.
+
+        :param names: list -> The file names.
+        :return:
+        """
+
+        for name in names:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    async def add(self, path: str) -> tuple[str, bool]:
+        """
+        Copies a picture into the store, deduplicated by its content. Does not change the reference count, pictures
+        of a failed save have to be discarded.
+
+        :param path: str -> Path of the picture (normally in ./daten/pictures).
+        :return: tuple[str, bool] -> (file name in the store, True if the file was created).
+        """
+
+        return await self.file_io.run(self._add, path)
+
+    async def discard(self, names: list) -> None:
+        """
+        Removes pictures added for a save which failed. Pictures which got a reference count in the meantime stay.
+
+        :param names: list -> File names returned by add.
+        :return:
+        """
+
+        if len(names) == 0:
+            return
+        names = await self.embed_store.execute(self._unreferenced, names)
+        if len(names) > 0:
+            try:
+                await self.file_io.run(self._remove, names)
+            finally:
+                self.file_io.invalidate(names)
+
+    async def update_references(self, referenced: list, unreferenced: list) -> None:
+        """
+        Adds a reference for every name in referenced and removes one for every name in unreferenced.
+        Pictures without references get deleted.
+
+        :param referenced: list -> File names an embed references now.
+        :param unreferenced: list -> File names an embed does not reference anymore.
+        :return:
+        """
+
+        deltas: dict = {}
+        for name in referenced:
+            deltas[name] = deltas.get(name, 0) + 1
+        for name in unreferenced:
+            deltas[name] = deltas.get(name, 0) - 1
+        # Unchanged pictures do not need a Database call.
+        deltas = {name: delta for name, delta in deltas.items() if delta != 0}
+        if len(deltas) == 0:
+            return
+        names: list = await self.embed_store.execute(self._update_references, deltas)
+        if len(names) > 0:
+            try:
+                await self.file_io.run(self._remove, names)
+            finally:
+                self.file_io.invalidate(names)
+
+    async def forget(self, names: list) -> None:
+        """
+        Removes the reference counts of files which were removed outside of the store (garbage collection).
+
+        :param names: list -> The file names.
+        :return:
+        """
+
+        if len(names) > 0:
+            self.file_io.invalidate(names)
+            await self.embed_store.execute(self._forget, names)
@@ -0,0 +1,83 @@
+"""
+Contains the in-memory Prefix Index for embed names. Used for the autocomplete of the slash commands.
+"""
+
+import bisect
+import typing
+
+
+class NameIndex:
+    """
+    Sorted index of all embed names. Prefix searches are case insensitive and need O(log n + limit).
+    """
+
+    def __init__(self, names: typing.Iterable[str] = ()):
+        """
+        Init for the Name Index.
+
+        :param names: Iterable[str] -> The names the index starts with.
+        """
+
+        # Sorted list of (casefolded name, name)
+        self.keys: list = sorted((name.casefold(), name) for name in names)
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, name: str) -> None:
+        """
+        Adds a name to the index.
+
+        :param name: str -> The name that should be added.
+        :return:
+        """
+
+        key: tuple = (name.casefold(), name)
+        position: int = bisect.bisect_left(self.keys, key)
+        if position == len(self.keys) or self.keys[position] != key:
+            self.keys.insert(position, key)
+
+    def remove(self, name: str) -> None:
+        """
+        Removes a name from the index. Does nothing if the name is not in the index.
+
+        :param name: str -> The name that should be removed.
+        :return:
+        """
+
+        key: tuple = (name.casefold(), name)
+        position: int = bisect.bisect_left(self.keys, key)
+        if position < len(self.keys) and self.keys[position] == key:
+            del self.keys[position]
+
+    def rename(self, old_name: str, name: str) -> None:
+        """
+        Replaces a name in the index.
+
+        :param old_name: str -> The current name.
+        :param name: str -> The new name.
+        :return:
+        """
+
+        self.remove(old_name)
+        self.add(name)
+
+    def search(self, prefix: str, limit: int = 25) -> list:
+        """
+        Searches all names starting with the prefix (case insensitive).
+
+        :param prefix: str -> The start of the name.
+        :param limit: int -> Maximum amount of names returned. Discord shows 25 autocomplete options.
+        :return: list -> The found names in sorted order.
+        """
+
+        prefix = prefix.casefold()
+        result: list = []
+        position: int = bisect.bisect_left(self.keys, (prefix, ""))
+        while position < len(self.keys) and len(result) < limit:
+            key, name = self.keys[position]
+            if not key.startswith(prefix):
+                break
+            result.append(name)
+            position += 1
+        return result
@@ -3,38 +3,126 @@ Main Entry for the Bot. This should be the first file to run, any extension will
 """
 
 import discord
+from database.embed_store import EmbedStore
+from database.image_store import ImageStore
+from utils.image_download import ImageDownloader
+from utils.image_normalize import ImageNormalizer
+from utils.file_io import FileIO
+from utils.picture_cache import PictureCache
+from utils.attachment_dispatcher import AttachmentDispatcher
+from ui.embed_modify.session_manager import SessionManager
+from utils.temp_sweeper import TempSweeper
+from utils.rest_scheduler import RestScheduler
+from utils.tracing import Tracer
+from utils.metrics import MetricsServer
+from utils.loop_monitor import LoopMonitor
 
-# Intents all, have to be enabled in Discord Developer Portal
-intents = discord.Intents.all()
-# Bot Object
-bot = discord.Bot(description="Developer Bot for Kissenwelt", owner_id=293827484258926598,
-                  debug_guilds=[1026610233335885824], intents=intents)
-# Add all developer discord User-IDs
-bot.developer = [293827484258926598]
-
-# Add Debug Guilds
-bot.debug_guilds = []
-
-# All main Extensions
-extensions = ["cogs.embed.embed"]
-for extension in extensions:
-    bot.load_extension(extension)
-
-# Load Discord Token -> From Discord Developer Portal
-with open("./daten/token", "r") as token_file:
-    token = token_file.read()
-
-# Check if Bot is online
-@bot.listen("on_ready")
-async def on_ready() -> None:
+
+def main() -> None:
     """
-    Listener: on_ready
+    Sets up the Bot with all its helpers and extensions and runs it. Everything after bot.run will not be executed.
 
-    Listens for on_ready call and prints a statement to signal the successful start of the Bot and connection to the
-    Discord API.
+    :return:
     """
 
-    print(f"{bot.user.name} is online")
+    # Intents all, have to be enabled in Discord Developer Portal
+    intents = discord.Intents.all()
+    # Bot Object
+    bot = discord.Bot(description="Developer Bot for Kissenwelt", owner_id=293827484258926598,
+                      debug_guilds=[1026610233335885824], intents=intents)
+    # Add all developer discord User-IDs
+    bot.developer = [293827484258926598]
+
+    # Add Debug Guilds
+    bot.debug_guilds = []
+
+    # File system work -> Checks, opens, writes, moves and deletes of pictures on 4 Threads, never on the event loop
+    # Sent pictures are kept in memory (max 32 MB, pictures over 8 MB are always read from disk)
+    bot.file_io = FileIO(max_workers=4, cache=PictureCache(max_bytes=32 * 1024 * 1024, max_item_bytes=8 * 1024 * 1024))
+    # Embed Database -> SQLite file in ./daten
+    bot.embed_store = EmbedStore("./daten/embeds.db")
+    # Saved Pictures -> Stored once per content, reference counted in the embed Database
+    bot.image_store = ImageStore(bot.embed_store, "./daten/saved_pictures", file_io=bot.file_io)
+    # Downloads of Images -> One shared connection pool, max 25 MB and 4 downloads at once
+    bot.image_downloader = ImageDownloader(max_bytes=25 * 1024 * 1024, timeout=60.0, max_concurrent=4,
+                                          file_io=bot.file_io)
+    # Uploaded Images -> Downscaled per slot, WebP, no metadata, in 2 processes (needs Pillow, set to None to disable)
+    bot.image_normalizer = ImageNormalizer("./daten/normalized", max_workers=2, image_format="webp", quality=85)
+    # Waiting for Images -> One on_message listener for all Image requests
+    bot.attachment_dispatcher = AttachmentDispatcher()
+    bot.add_listener(bot.attachment_dispatcher.on_message, "on_message")
+    # Open Embed UIs -> Max 2 per user, 50 in total, evicted after 15 minutes without interaction
+    bot.session_manager = SessionManager(max_per_user=2, max_sessions=50, idle_timeout=900.0)
+    # Message edits, sends and deletes -> Queued per channel, merged edits, answers before cleanup deletes
+    bot.rest_scheduler = RestScheduler(channel_rate=5, channel_per=5.0, global_rate=50, global_per=1.0)
+    # Latency tracing -> Spans per stage, interactions without response after 2.4 of 3 seconds get flagged
+    bot.tracer = Tracer(deadline=3.0, warn_ratio=0.8)
+    # Temp Pictures -> Files older than 1 hour, not used by an open Embed UI, get removed every 10 minutes
+    bot.temp_sweeper = TempSweeper(bot.session_manager.live_images, "./daten/pictures", ttl=3600.0, interval=600.0,
+                                   on_removed=bot.file_io.invalidate)
+    # Normalized Images -> Results unused for 7 days get removed every 6 hours
+    bot.normalize_sweeper = TempSweeper(lambda: set(), "./daten/normalized", ttl=7 * 24 * 3600.0, interval=6 * 3600.0)
+    # Event loop lag -> Measured every 0.25 seconds, stalls over 0.5 seconds get printed with the blocking stack
+    bot.loop_monitor = LoopMonitor(interval=0.25, threshold=0.5)
+    # Metrics -> Prometheus text on http://127.0.0.1:9108/metrics, set to None to disable
+    bot.metrics_server = MetricsServer(bot, host="127.0.0.1", port=9108, scan_interval=60.0)
+
+    # All main Extensions
+    extensions = ["cogs.embed.embed"]
+    for extension in extensions:
+        bot.load_extension(extension)
+
+    # Load Discord Token -> From Discord Developer Portal
+    with open("./daten/token", "r") as token_file:
+        token = token_file.read()
+
+    # Check if Bot is online
+    @bot.listen("on_ready")
+    async def on_ready() -> None:
+        """
+        Listener: on_ready
+
+        Listens for on_ready call and prints a statement to signal the successful start of the Bot and connection to
+        the Discord API.
+        """
+
+        bot.session_manager.start()
+        bot.temp_sweeper.start()
+        if bot.image_normalizer is not None and bot.image_normalizer.enabled:
+            bot.normalize_sweeper.start()
+        bot.loop_monitor.start()
+        if bot.metrics_server is not None:
+            await bot.metrics_server.start()
+        print(f"{bot.user.name} is online")
+
+    # Closing of the Bot -> Releases the connections, Threads and processes of the helpers after the Discord connection
+    close_connection = bot.close
+
+    async def close() -> None:
+        """
+        Replaces bot.close. Closes the Discord connection, then the helpers. Network and database work is awaited
+        first, the pools of the File IO and the Image Normalizer are shut down last.
+        """
+
+        # bot.run can close more than once (signal and end of the loop), the helpers are closed only once.
+        if bot.is_closed():
+            return
+        await close_connection()
+        bot.loop_monitor.stop()
+        await bot.image_downloader.close()
+        if bot.metrics_server is not None:
+            await bot.metrics_server.stop()
+        await bot.embed_store.close()
+        bot.file_io.shutdown()
+        if bot.image_normalizer is not None:
+            bot.image_normalizer.shutdown()
+
+    bot.close = close
+
+    # Main Entry to Bot-Loop. Everything after will not be executed.
+    bot.run(token)
+
 
-# Main Entry to Bot-Loop. Everything after will not be executed.
-bot.run(token)
+# Only in the main process - The worker processes of the Image Normalizer import this file on spawn.
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Regression tests for the Embed Store. Run from the repository root: python -m unittest
+"""
+
+import asyncio
+import os
+import tempfile
+import unittest
+
+from database.embed_store import EmbedStore
+
+
+class EmbedStoreCacheTest(unittest.IsolatedAsyncioTestCase):
+    """
+    A load queued before a write must not put the old row back into the cache.
+    """
+
+    async def asyncSetUp(self) -> None:
+        self.directory: tempfile.TemporaryDirectory = tempfile.TemporaryDirectory()
+        self.store: EmbedStore = EmbedStore(os.path.join(self.directory.name, "embeds.db"))
+        self.assertEqual(await self.store.insert(1, "first", {"v": 1}), [])
+
+    async def asyncTearDown(self) -> None:
+        await self.store.close()
+        self.directory.cleanup()
+
+    async def test_update_during_load(self) -> None:
+        _, updated = await asyncio.gather(self.store.get_by_id(1), self.store.update(1, {"v": 2}))
+        self.assertEqual(updated["value"], {"v": 2})
+        self.assertEqual((await self.store.get_by_id(1))["value"], {"v": 2})
+        self.assertEqual((await self.store.get_by_name("first"))["value"], {"v": 2})
+
+    async def test_rename_during_load(self) -> None:
+        await self.store.get_by_id(1)
+        self.store.cache.invalidate(1)
+        await asyncio.gather(self.store.get_by_name("first"), self.store.rename(1, 2, "second", {"v": 2}))
+        self.assertIsNone(await self.store.get_by_id(1))
+        self.assertIsNone(await self.store.get_by_name("first"))
+        self.assertEqual((await self.store.get_by_id(2))["value"], {"v": 2})
+
+    async def test_delete_during_load(self) -> None:
+        self.store.cache.invalidate(1)
+        await asyncio.gather(self.store.get_by_id(1), self.store.delete(1))
+        self.assertIsNone(await self.store.get_by_id(1))
+
+    async def test_concurrent_delete(self) -> None:
+        # Only one of two sessions deleting the same embed gets the row, the other must not lower the references.
+        first, second = await asyncio.gather(self.store.delete(1), self.store.delete(1))
+        self.assertEqual(first, {"id": 1, "name": "first", "value": {"v": 1}})
+        self.assertIsNone(second)
+
+
+if __name__ == "__main__":
+    unittest.main()
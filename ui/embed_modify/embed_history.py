@@ -0,0 +1,144 @@
+"""
+Contains the Embed History. Undo/redo for the Embed UI.
+"""
+
+import collections
+import sys
+import typing
+
+from ui.embed_modify.embed_model import EmbedModel
+from ui.embed_modify.session_manager import approximate_size
+
+
+def version_size(version: EmbedModel, newer: EmbedModel) -> int:
+    """
+    Approximates the memory one version needs in addition to the newer version. Parts shared with the newer version
+    are not counted.
+
+    :param version: EmbedModel -> The old version.
+    :param newer: EmbedModel -> The version after it.
+    :return: int -> Approximate size in bytes.
+    """
+
+    size: int = sys.getsizeof(version)
+    for name in EmbedModel.__slots__:
+        value: typing.Any = getattr(version, name)
+        newer_value: typing.Any = getattr(newer, name)
+        if value is newer_value:
+            continue
+        if name == "fields":
+            # Only the fields tuple itself and the changed fields.
+            shared: set = {id(field) for field in newer_value}
+            size += sys.getsizeof(value) + sum(approximate_size(field) for field in value if id(field) not in shared)
+        else:
+            size += approximate_size(value)
+    return size
+
+
+class EmbedHistory:
+    """
+    Undo and redo stacks of immutable embed versions. The undo stack is limited by depth and bytes, the oldest
+    versions get dropped first.
+    """
+
+    def __init__(self, max_depth: int = 50, max_bytes: int = 64 * 1024):
+        """
+        Init for the Embed History.
+
+        :param max_depth: int -> Maximum amount of undo steps.
+        :param max_bytes: int -> Maximum approximate bytes of the undo steps.
+        """
+
+        self.max_depth: int = max_depth
+        self.max_bytes: int = max_bytes
+        # (version, approximate bytes)
+        self.undo_stack: collections.deque[tuple[EmbedModel, int]] = collections.deque()
+        self.redo_stack: list[EmbedModel] = []
+        self.bytes: int = 0
+
+    @property
+    def can_undo(self) -> bool:
+        """
+        If there is a version to go back to.
+
+        :return: bool -> True if undo is possible.
+        """
+
+        return len(self.undo_stack) > 0
+
+    @property
+    def can_redo(self) -> bool:
+        """
+        If there is a version to go forward to.
+
+        :return: bool -> True if redo is possible.
+        """
+
+        return len(self.redo_stack) > 0
+
+    def _append(self, version: EmbedModel, newer: EmbedModel) -> None:
+        """
+        Adds a version to the undo stack and drops the oldest versions over the limits.
+
+        :param version: EmbedModel -> The old version.
+        :param newer: EmbedModel -> The version after it.
+        :return:
+        """
+
+        size: int = version_size(version, newer)
+        self.undo_stack.append((version, size))
+        self.bytes += size
+        while len(self.undo_stack) > self.max_depth or (self.bytes > self.max_bytes and len(self.undo_stack) > 1):
+            self.bytes -= self.undo_stack.popleft()[1]
+
+    def push(self, version: EmbedModel, newer: EmbedModel) -> None:
+        """
+        Records a change. The redo steps are dropped.
+
+        :param version: EmbedModel -> The version before the change.
+        :param newer: EmbedModel -> The version after the change.
+        :return:
+        """
+
+        self._append(version, newer)
+        self.redo_stack.clear()
+
+    def undo(self, current: EmbedModel) -> typing.Optional[EmbedModel]:
+        """
+        Goes one step back. The current version gets added to the redo stack.
+
+        :param current: EmbedModel -> The current version.
+        :return: Optional[EmbedModel] -> The previous version, None if there is none.
+        """
+
+        if not self.can_undo:
+            return None
+        version, size = self.undo_stack.pop()
+        self.bytes -= size
+        self.redo_stack.append(current)
+        return version
+
+    def redo(self, current: EmbedModel) -> typing.Optional[EmbedModel]:
+        """
+        Goes one step forward. The current version gets added to the undo stack.
+
+        :param current: EmbedModel -> The current version.
+        :return: Optional[EmbedModel] -> The next version, None if there is none.
+        """
+
+        if not self.can_redo:
+            return None
+        version: EmbedModel = self.redo_stack.pop()
+        self._append(current, version)
+        return version
+
+    def clear(self) -> None:
+        """
+        Removes all versions, e.g. if another embed gets loaded.
+
+        :return:
+        """
+
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self.bytes = 0
@@ -0,0 +1,221 @@
+"""
+Contains the Embed Model, the internal representation of the embed in the Embed UI.
+"""
+
+import datetime
+import typing
+
+import discord
+
+
+class EmbedAuthor(typing.NamedTuple):
+    """
+    Author of an embed. Immutable.
+    """
+
+    name: typing.Optional[str] = None
+    url: typing.Optional[str] = None
+    icon_url: typing.Optional[str] = None
+
+
+class EmbedFooter(typing.NamedTuple):
+    """
+    Footer of an embed. Immutable.
+    """
+
+    text: typing.Optional[str] = None
+    icon_url: typing.Optional[str] = None
+
+
+class EmbedField(typing.NamedTuple):
+    """
+    Field of an embed. Immutable.
+    """
+
+    name: str
+    value: str
+    inline: bool = True
+
+
+class EmbedModel:
+    """
+    Immutable embed. Every modification returns a new version, which shares all untouched parts (author, footer,
+    the fields tuple and every field) with the old one, so no copy of the whole embed is needed.
+    Gets converted to a discord.Embed only when it is sent.
+    """
+
+    __slots__ = ("title", "description", "url", "color", "timestamp", "author", "footer", "image", "thumbnail",
+                 "fields")
+
+    def __init__(self, title: typing.Optional[str] = None, description: typing.Optional[str] = None,
+                 url: typing.Optional[str] = None, color: typing.Optional[int] = None,
+                 timestamp: typing.Optional[datetime.datetime] = None, author: typing.Optional[EmbedAuthor] = None,
+                 footer: typing.Optional[EmbedFooter] = None, image: typing.Optional[str] = None,
+                 thumbnail: typing.Optional[str] = None, fields: tuple = ()):
+        """
+        Init for the Embed Model.
+
+        :param title: Optional[str] -> The title.
+        :param description: Optional[str] -> The description.
+        :param url: Optional[str] -> The url of the title.
+        :param color: Optional[int] -> The color as integer (0xRRGGBB).
+        :param timestamp: Optional[datetime.datetime] -> The timestamp.
+        :param author: Optional[EmbedAuthor] -> The author.
+        :param footer: Optional[EmbedFooter] -> The footer.
+        :param image: Optional[str] -> The url of the image.
+        :param thumbnail: Optional[str] -> The url of the thumbnail.
+        :param fields: tuple[EmbedField] -> The fields.
+        """
+
+        # Set past __setattr__, the attributes can only be set here.
+        object.__setattr__(self, "title", title)
+        object.__setattr__(self, "description", description)
+        object.__setattr__(self, "url", url)
+        object.__setattr__(self, "color", color)
+        object.__setattr__(self, "timestamp", timestamp)
+        object.__setattr__(self, "author", author)
+        object.__setattr__(self, "footer", footer)
+        object.__setattr__(self, "image", image)
+        object.__setattr__(self, "thumbnail", thumbnail)
+        object.__setattr__(self, "fields", fields)
+
+    def __setattr__(self, name: str, value: typing.Any) -> None:
+        """
+        Always raises AttributeError. Versions are shared (undo history, render scheduler), changing one in place would
+        change all of them. New versions are created with replace.
+
+        :param name: str -> The attribute.
+        :param value: Any -> The new value.
+        :return:
+        """
+
+        raise AttributeError(f"EmbedModel is immutable, use replace({name}=...) for a new version")
+
+    def __delattr__(self, name: str) -> None:
+        """
+        Always raises AttributeError, see __setattr__.
+
+        :param name: str -> The attribute.
+        :return:
+        """
+
+        raise AttributeError("EmbedModel is immutable")
+
+    def replace(self, **changes: typing.Any) -> "EmbedModel":
+        """
+        Creates a new version with the changed attributes. All other attributes are shared.
+
+        :param changes: Any -> The attributes to change (e.g. title="New title").
+        :return: EmbedModel -> The new version.
+        """
+
+        values: dict = {name: getattr(self, name) for name in self.__slots__}
+        values.update(changes)
+        return EmbedModel(**values)
+
+    def set_field_at(self, index: int, name: str, value: str, inline: bool = True) -> "EmbedModel":
+        """
+        Creates a new version with a changed field.
+
+        :param index: int -> The index of the field.
+        :param name: str -> The name of the field.
+        :param value: str -> The value of the field.
+        :param inline: bool -> If the field is inline.
+        :return: EmbedModel -> The new version.
+        """
+
+        fields: list = list(self.fields)
+        fields[index] = EmbedField(name, value, inline)
+        return self.replace(fields=tuple(fields))
+
+    def add_field(self, name: str, value: str, inline: bool = True) -> "EmbedModel":
+        """
+        Creates a new version with an additional field at the end.
+
+        :param name: str -> The name of the field.
+        :param value: str -> The value of the field.
+        :param inline: bool -> If the field is inline.
+        :return: EmbedModel -> The new version.
+        """
+
+        return self.replace(fields=self.fields + (EmbedField(name, value, inline),))
+
+    def remove_field(self, index: int) -> "EmbedModel":
+        """
+        Creates a new version without the field.
+
+        :param index: int -> The index of the field.
+        :return: EmbedModel -> The new version.
+        """
+
+        return self.replace(fields=self.fields[:index] + self.fields[index + 1:])
+
+    def image_urls(self) -> list:
+        """
+        Gets the urls of all pictures: author icon, footer icon, image and thumbnail.
+
+        :return: list -> The urls, None if the picture is not set.
+        """
+
+        return [self.author.icon_url if self.author is not None else None,
+                self.footer.icon_url if self.footer is not None else None,
+                self.image, self.thumbnail]
+
+    def to_dict(self) -> dict:
+        """
+        Converts the embed to the dict format of Discord (the same as discord.Embed.to_dict()).
+
+        :return: dict -> The embed data.
+        """
+
+        data: dict = {"type": "rich"}
+        for key in ["title", "description", "url", "color"]:
+            if getattr(self, key) is not None:
+                data[key] = getattr(self, key)
+        if self.timestamp is not None:
+            data["timestamp"] = self.timestamp.astimezone(tz=datetime.timezone.utc).isoformat()
+        if self.author is not None:
+            data["author"] = {key: value for key, value in self.author._asdict().items() if value is not None}
+        if self.footer is not None:
+            data["footer"] = {key: value for key, value in self.footer._asdict().items() if value is not None}
+        if self.image is not None:
+            data["image"] = {"url": self.image}
+        if self.thumbnail is not None:
+            data["thumbnail"] = {"url": self.thumbnail}
+        if len(self.fields) > 0:
+            data["fields"] = [field._asdict() for field in self.fields]
+        return data
+
+    def to_embed(self) -> discord.Embed:
+        """
+        Converts the embed to a discord.Embed for sending.
+
+        :return: discord.Embed -> The new discord.Embed.
+        """
+
+        return discord.Embed.from_dict(self.to_dict())
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "EmbedModel":
+        """
+        Creates the embed from the dict format of Discord. The dict is not referenced afterwards, so shared dicts
+        (e.g. from the embed cache) do not need a copy.
+
+        :param data: dict -> The embed data.
+        :return: EmbedModel -> The new embed.
+        """
+
+        author: typing.Optional[EmbedAuthor] = None
+        if "author" in data:
+            author = EmbedAuthor(data["author"].get("name"), data["author"].get("url"), data["author"].get("icon_url"))
+        footer: typing.Optional[EmbedFooter] = None
+        if "footer" in data:
+            footer = EmbedFooter(data["footer"].get("text"), data["footer"].get("icon_url"))
+        timestamp: typing.Optional[datetime.datetime] = None
+        if data.get("timestamp") is not None:
+            timestamp = datetime.datetime.fromisoformat(data["timestamp"])
+        return cls(title=data.get("title"), description=data.get("description"), url=data.get("url"),
+                   color=data.get("color", data.get("colour")), timestamp=timestamp, author=author, footer=footer,
+                   image=data.get("image", {}).get("url"), thumbnail=data.get("thumbnail", {}).get("url"),
+                   fields=tuple(EmbedField(field["name"], field["value"], field.get("inline", True))
+                                for field in data.get("fields", [])))
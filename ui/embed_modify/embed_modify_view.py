@@ -2,11 +2,8 @@
 File Contains Embed View for modifying/create/delete Embeds.
 """
 
-import copy
-import os.path
+import time
 import typing
-import asyncio
-import shutil
 
 # Import all Components:
 from ui.embed_modify.view_components import close_action, create_action, edit_embed, select_menu_action, retry_view, \
@@ -15,6 +12,16 @@ import discord
 import re
 import datetime
 from urllib.parse import urlparse
+from ui.embed_modify.embed_model import EmbedModel, EmbedAuthor, EmbedFooter
+from ui.embed_modify.embed_history import EmbedHistory
+from utils.task_supervisor import TaskSupervisor
+from utils.rest_scheduler import Priority
+from utils.tracing import traced, spanned
+from ui.embed_modify.render_scheduler import RenderScheduler
+
+# Discord limits for embeds (characters, fields for the amount of fields)
+EMBED_LIMITS: dict = {"title": 256, "description": 4096, "author": 256, "field_name": 256, "field_value": 1024,
+                      "footer": 2048, "fields": 25, "total": 6000}
 
 class EmbedUi(discord.ui.View):
     """
@@ -32,12 +39,17 @@ class EmbedUi(discord.ui.View):
         self.ctx: discord.ApplicationContext = application_ctx
         # Select for the Action the User wants to perform.
         self.select_action:  select_menu_action.EmbedUiSelect = select_menu_action.EmbedUiSelect()
-        super().__init__(self.select_action)
+        # No View timeout - Idle Embed UIs get evicted by the session manager of the bot.
+        super().__init__(self.select_action, timeout=None)
         # Init Class Variables
         self.bot = bot
-        self.current_embed: discord.Embed = discord.Embed() # Stores the current embed to modify
+        self.current_embed: EmbedModel = EmbedModel() # Stores the current embed to modify
+        # Undo/redo of the current embed - The versions share all unchanged parts.
+        self.history: EmbedHistory = EmbedHistory(max_depth=50, max_bytes=64 * 1024)
         self.embed_message: typing.Optional[discord.Message] = None # Stores the current message which displays the current embed
         self.current_db_embed_data: dict = {} # The Database data of the embed (id and name)
+        # The attachments (file name -> discord.Attachment with CDN url) the embed message carries
+        self.preview_attachments: dict[str, discord.Attachment] = {}
         # Default Embeds which get displayed if the Action is selected.
         self.default_embed: discord.Embed = discord.Embed(title="Embed UI", description="Please Select select your "
                                                                                         "Action:")
@@ -75,17 +87,104 @@ class EmbedUi(discord.ui.View):
                                                                              "gets deleted.")
         # cached Images
         self.chached_images = []
+        # Background tasks of this session (e.g. waiting for Images), tasks.outstanding gives the live count.
+        self.tasks: TaskSupervisor = TaskSupervisor()
+        # Collapses rapid preview updates (e.g. inline toggles) into one send_embed.
+        self.renderer: RenderScheduler = RenderScheduler(self.render_preview, self.tasks, delay=0.75)
+        # The latest Interaction of a coalesced update, used by the render if a new message has to be sent.
+        self.render_interaction: typing.Optional[discord.Interaction] = None
+        # Time of the last interaction, used for the idle eviction.
+        self.last_activity: float = time.monotonic()
 
     # Methods
 
-    async def start(self) -> None:
+    async def start(self, embed_name: typing.Optional[str] = None) -> None:
         """
         This should be called right after the Message with this View was send.
 
+        :param embed_name: Optional[str] -> Name of an embed that should be loaded directly in edit embed mode.
         :return:
         """
 
-        await self.message.edit(embed=self.default_embed)
+        if embed_name is None:
+            await self.bot.rest_scheduler.edit(self.message, embed=self.default_embed)
+            return
+        await self.bot.rest_scheduler.edit(self.message, embed=self.default_modify_embed)
+        # Get embed from Database
+        embed_data: typing.Optional[dict] = await self.bot.embed_store.get_by_name(embed_name)
+        if embed_data is None:
+            await self.bot.rest_scheduler.followup(self.ctx.interaction, "Embed does not exists.", ephemeral=True)
+            return
+        # The model does not reference the loaded data, which is shared with the embed cache.
+        embed: EmbedModel = EmbedModel.from_dict(embed_data["value"])
+        # Set current db embed data -> Gets used when saving the embed after editing.
+        self.current_db_embed_data = {"id": embed_data["id"], "name": embed_data["name"]}
+        # Send the embed with the Slash Command Interaction. A new embed starts without history.
+        self.history.clear()
+        self.embed_message = await self.send_embed(embed, self.ctx.interaction, record=False)
+        if self.embed_message is None:
+            await self.bot.rest_scheduler.followup(self.ctx.interaction, "Embed could not be sent.", ephemeral=True)
+            return
+        # Set the View to edit embed Mode.
+        await self.set_edit_embed_view()
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        """
+        Gets called before every component callback. Marks the session as active.
+
+        :param interaction: discord.Interaction -> The Interaction of the component.
+        :return: bool -> Always True, the user check is done in the callbacks.
+        """
+
+        self.touch()
+        return True
+
+    def touch(self) -> None:
+        """
+        Marks the session as active, the session manager evicts sessions without activity.
+
+        :return:
+        """
+
+        self.last_activity = time.monotonic()
+
+    async def show_modal(self, interaction: discord.Interaction, modal: discord.ui.Modal) -> None:
+        """
+        Sends the modal and waits until it is submitted or timed out. A submit marks the session as active, the
+        components of the view do not see the time the user spends in the modal.
+
+        :param interaction: discord.Interaction -> The Interaction the modal is the response to.
+        :param modal: discord.ui.Modal -> The modal, modal.interaction is None if it timed out.
+        :return:
+        """
+
+        async with self.bot.tracer.span("modal"):
+            await interaction.response.send_modal(modal)
+            await modal.wait()
+        if modal.interaction is not None:
+            self.touch()
+
+    async def evict(self) -> None:
+        """
+        Gets called by the session manager if this session is idle or replaced.
+        Deletes the temporary pictures, the embed message and the original message, cancels all tasks.
+
+        :return:
+        """
+
+        # A delayed render would send a new preview after the messages got deleted.
+        self.renderer.cancel_pending()
+        await self.tasks.cancel_all()
+        await self.delete_chached_images()
+        for message in [self.embed_message, self.message]:
+            if message is None:
+                continue
+            try:
+                await self.bot.rest_scheduler.delete(message)
+            except discord.errors.HTTPException:
+                pass
+        self.embed_message = None
+        self.stop()
 
     async def action_change(self) -> None:
         """
@@ -95,7 +194,10 @@ class EmbedUi(discord.ui.View):
         :return:
         """
 
+        # The preview of the old embed gets deleted by the action, a delayed render would send it again.
+        self.renderer.cancel_pending()
         await self.delete_chached_images()
+        self.history.clear()
         action = self.select_action.values[0]
         match action:
             case "Close":
@@ -121,10 +223,12 @@ class EmbedUi(discord.ui.View):
         self.add_item(edit_embed.ButtonFooterEdit())
         self.add_item(edit_embed.ButtonImageEdit())
         self.add_item(edit_embed.ButtonThumbnailEdit())
+        self.add_item(edit_embed.ButtonUndo())
+        self.add_item(edit_embed.ButtonRedo())
         self.add_item(edit_embed.SelectFieldEdit(len(self.current_embed.fields)))
         self.add_item(edit_embed.ButtonEmbedSave())
         self.add_item(edit_embed.ButtonEmbedSaveRename())
-        await self.message.edit(view=self)
+        await self.bot.rest_scheduler.edit(self.message, view=self)
 
     async def set_edit_field_view(self, current_field_index: int) -> None:
         """
@@ -143,7 +247,7 @@ class EmbedUi(discord.ui.View):
         self.add_item(edit_embed.ButtonFieldRemove(current_field_index))
         self.add_item(edit_embed.ButtonEmbedSave())
         self.add_item(edit_embed.ButtonEmbedSaveRename())
-        await self.message.edit(view=self)
+        await self.bot.rest_scheduler.edit(self.message, view=self)
 
     async def remove_except_action_select(self) -> None:
         """
@@ -169,93 +273,137 @@ class EmbedUi(discord.ui.View):
         for child in delete_list:
             self.remove_item(child)
 
-    async def send_embed(self, embed: discord.Embed, interaction: discord.Interaction) \
+    @spanned("send_embed")
+    async def send_embed(self, embed: EmbedModel, interaction: discord.Interaction, record: bool = True) \
             -> typing.Optional[discord.Message]:
         """
-        Sends the current embed and delets the old embed message if one exists.
+        Shows the embed. If an embed message exists it gets edited, attachments it already carries are kept and only
+        new files get uploaded. If editing is not possible a new message is sent and the old embed message gets
+        deleted.
         If the sending of the new embed does not work the old embed message does not get deleted.
 
-        :param embed: discord.Embed -> The embed which should be sent.
+        :param embed: EmbedModel -> The embed which should be sent, converted to a discord.Embed only here.
         :param interaction: discord.Interaction -> The Interaction with whom it should be sent (uses followup).
+        :param record: bool -> If the old current embed should be added to the undo history. Default True.
         :return: Optional[discord.Message] -> None if sending the Message failed else gives sent message.
         """
 
-        files: list[discord.File] = [] # List of all files send with the embed.
-        # Get author Image
-        if embed.author is not None and type(embed.author.icon_url) is str and len(embed.author.icon_url) > 0:
-            file_name: str = embed.author.icon_url[13:] # File are send via attachment://FILE_NAME
-            if os.path.isfile(f"./daten/pictures/{file_name}"): # If any file does not exist None is returned
-                files.append(discord.File(f"./daten/pictures/{file_name}", filename=file_name))
-            elif os.path.isfile(f"./daten/saved_pictures/{file_name}"):
-                files.append(discord.File(f"./daten/saved_pictures/{file_name}", filename=file_name))
-            else:
-                return None
-        # Get footer Image
-        if embed.footer is not None and type(embed.footer.icon_url) is str and len(embed.footer.icon_url) > 0:
-            file_name: str = embed.footer.icon_url[13:]
-            if os.path.isfile(f"./daten/pictures/{file_name}"):
-                files.append(discord.File(f"./daten/pictures/{file_name}", filename=file_name))
-            elif os.path.isfile(f"./daten/saved_pictures/{file_name}"):
-                files.append(discord.File(f"./daten/saved_pictures/{file_name}", filename=file_name))
-            else:
-                return None
-        # Get embed Image
-        if type(embed.image.url) is str:
-            file_name: str = embed.image.url[13:]
-            if os.path.isfile(f"./daten/pictures/{file_name}"):
-                files.append(discord.File(f"./daten/pictures/{file_name}", filename=file_name))
-            elif os.path.isfile(f"./daten/saved_pictures/{file_name}"):
-                files.append(discord.File(f"./daten/saved_pictures/{file_name}", filename=file_name))
-            else:
+        # Requests until now are shown by this send - A scheduled render gets cancelled after the send succeeded.
+        requested: int = self.renderer.requested
+        # Embeds over the Discord limits would fail with HTTP 400 - Checked before any request.
+        if len(await self.check_embed_limits(embed)) > 0:
+            return None
+        # All files send with the embed (author, footer, image and thumbnail), searched in the temp and then in the
+        # saved pictures. Files are send via attachment://FILE_NAME, stored pictures can be used more than once, but
+        # are only sent once.
+        file_names: list[str] = [url[13:] for url in embed.image_urls() if type(url) is str and len(url) > 0]
+        discord_embed: discord.Embed = embed.to_embed()
+        # Try editing the embed message.
+        if self.embed_message is not None:
+            # Attachments already on the message are reused, only the others get opened and uploaded.
+            # One worker call for all files, if any file does not exist None is returned.
+            opened: typing.Optional[dict] = await self.bot.file_io.open_files(file_names,
+                                                                               skip=self.preview_attachments)
+            if opened is None:
                 return None
-        # Get embed Thumbnail
-        if type(embed.thumbnail.url) is str:
-            file_name: str = embed.thumbnail.url[13:]
-            if os.path.isfile(f"./daten/pictures/{file_name}"):
-                files.append(discord.File(f"./daten/pictures/{file_name}", filename=file_name))
-            elif os.path.isfile(f"./daten/saved_pictures/{file_name}"):
-                files.append(discord.File(f"./daten/saved_pictures/{file_name}", filename=file_name))
+            keep: list[discord.Attachment] = [self.preview_attachments[name] for name in opened
+                                              if name in self.preview_attachments]
+            files: list[discord.File] = [file for file in opened.values() if file is not None]
+            try:
+                if len(files) == 0 and len(keep) == len(self.preview_attachments):
+                    # Same files -> The attachments of the message stay.
+                    edited: typing.Optional[discord.Message] = await self.bot.rest_scheduler.edit(
+                        self.embed_message, priority=Priority.update, embed=discord_embed)
+                else:
+                    edited: typing.Optional[discord.Message] = await self.bot.rest_scheduler.edit(
+                        self.embed_message, priority=Priority.update, embed=discord_embed, files=files,
+                        attachments=keep)
+            except discord.errors.HTTPException as error:
+                # The embed itself is invalid, a new message would fail too.
+                for file in files:
+                    file.close()
+                if error.status == 400:
+                    return None
+                # Message deleted or interaction token expired -> Sending a new message.
             else:
-                return None
+                if edited is not None:
+                    self.embed_message = edited
+                self.preview_attachments = {attachment.filename: attachment
+                                            for attachment in self.embed_message.attachments}
+                self.set_current_embed(embed, record)
+                self.renderer.cancel_pending(requested)
+                return self.embed_message
         # Try Sending the embed.
+        opened: typing.Optional[dict] = await self.bot.file_io.open_files(file_names)
+        if opened is None:
+            return None
+        files: list[discord.File] = list(opened.values())
         try:
-            message: discord.Message = await interaction.followup.send(embed=embed, files=files)
+            message: discord.Message = await self.bot.rest_scheduler.followup(interaction, embed=discord_embed,
+                                                                              files=files, priority=Priority.update)
         except discord.errors.HTTPException:
             return None
         # Sending was Succesfull -> Deleting old embed Message
         if self.embed_message is not None:
-            await self.embed_message.delete()
-        self.current_embed = embed
+            async with self.bot.tracer.span("delete_old"):
+                try:
+                    await self.bot.rest_scheduler.delete(self.embed_message)
+                except discord.errors.NotFound:
+                    pass
+        self.preview_attachments = {attachment.filename: attachment for attachment in message.attachments}
+        self.set_current_embed(embed, record)
+        self.renderer.cancel_pending(requested)
         return message
 
-    async def delete_image(self, icon_url: str) -> None:
+    async def render_preview(self) -> None:
         """
-        Deletes an Image.
+        Sends the current embed. Gets called by the render scheduler.
 
-        :param icon_url: str -> The complete icon url - will be stripped inside the function
         :return:
         """
 
-        # Deletes the image in the database
-        if type(icon_url) is str:
-            if os.path.isfile(f"./daten/pictures/{icon_url[13:]}"):
-                os.remove(f"./daten/pictures/{icon_url[13:]}")
-        if type(icon_url) is str:
-            if icon_url[13:] in self.chached_images:
-                self.chached_images.remove(icon_url[13:])
+        msg: typing.Optional[discord.Message] = await self.send_embed(self.current_embed, self.render_interaction)
+        if msg is not None:
+            self.embed_message = msg
+
+    def set_current_embed(self, embed: EmbedModel, record: bool = True) -> None:
+        """
+        Sets the current embed. The old version gets added to the undo history.
+
+        :param embed: EmbedModel -> The new current embed.
+        :param record: bool -> If False the history stays unchanged (undo/redo). Default True.
+        :return:
+        """
+
+        if embed is self.current_embed:
+            return
+        if record:
+            self.history.push(self.current_embed, embed)
+        self.current_embed = embed
+
+    async def send_error_message(self, embed: EmbedModel) -> str:
+        """
+        Constructs the error message if send_embed failed. Names the parts over the Discord limits if this was the
+        reason.
+
+        :param embed: EmbedModel -> The embed that could not be sent.
+        :return: str -> The error message for the User.
+        """
+
+        wrong_limits: list = await self.check_embed_limits(embed)
+        if len(wrong_limits) == 0:
+            return "Something went wrong while trying to send the embed!"
+        return "The Embed is over the Discord limits:\n" + "\n".join(wrong_limits)
 
     async def delete_chached_images(self) -> None:
         """
-        Deletes all Files in ./daten/pictures
+        Deletes all Files in ./daten/pictures of this session. Replaced Images are kept until then, older versions in
+        the undo history can still use them.
 
         :return:
         """
 
-        for file in self.chached_images:
-            try:
-                os.remove(f"./daten/pictures/{file}")
-            except FileNotFoundError:
-                pass
+        await self.bot.file_io.remove_many([f"./daten/pictures/{file}" for file in self.chached_images])
         self.chached_images = []
 
     # Actions
@@ -271,11 +419,11 @@ class EmbedUi(discord.ui.View):
         """
 
         if self.embed_message is not None:
-            await self.embed_message.delete()
+            await self.bot.rest_scheduler.delete(self.embed_message)
             self.embed_message = None
         await self.remove_except_action_select()
         self.add_item(close_action.EmbedUiButtonClose())
-        await self.message.edit(embed=self.default_close_embed, view=self)
+        await self.bot.rest_scheduler.edit(self.message, embed=self.default_close_embed, view=self)
 
     async def action_create(self) -> None:
         """
@@ -289,11 +437,11 @@ class EmbedUi(discord.ui.View):
         """
 
         if self.embed_message is not None:
-            await self.embed_message.delete()
+            await self.bot.rest_scheduler.delete(self.embed_message)
             self.embed_message = None
         await self.remove_except_action_select()
         self.add_item(create_action.EmbedUiButtonCreate())
-        await self.message.edit(embed=self.default_create_embed, view=self)
+        await self.bot.rest_scheduler.edit(self.message, embed=self.default_create_embed, view=self)
 
     async def action_modify(self) -> None:
         """
@@ -308,11 +456,11 @@ class EmbedUi(discord.ui.View):
         """
 
         if self.embed_message is not None:
-            await self.embed_message.delete()
+            await self.bot.rest_scheduler.delete(self.embed_message)
             self.embed_message = None
         await self.remove_except_action_select()
         self.add_item(modify_action.EmbedUiButtonModify())
-        await self.message.edit(embed=self.default_modify_embed, view=self)
+        await self.bot.rest_scheduler.edit(self.message, embed=self.default_modify_embed, view=self)
 
 
     async def action_delete(self) -> None:
@@ -328,11 +476,11 @@ class EmbedUi(discord.ui.View):
         """
 
         if self.embed_message is not None:
-            await self.embed_message.delete()
+            await self.bot.rest_scheduler.delete(self.embed_message)
             self.embed_message = None
         await self.remove_except_action_select()
         self.add_item(delete_action.EmbedUiButtonDelete())
-        await self.message.edit(embed=self.default_delete_embed, view=self)
+        await self.bot.rest_scheduler.edit(self.message, embed=self.default_delete_embed, view=self)
 
     # Button Responses
 
@@ -346,14 +494,17 @@ class EmbedUi(discord.ui.View):
         :return:
         """
 
-        await self.message.edit(view=None)
-        await self.message.delete()
+        await self.bot.rest_scheduler.edit(self.message, view=None)
+        await self.bot.rest_scheduler.delete(self.message)
         if self.embed_message is not None:
-            await self.embed_message.delete()
+            await self.bot.rest_scheduler.delete(self.embed_message)
             self.embed_message = None
+        await self.tasks.cancel_all()
+        self.bot.session_manager.unregister(self)
         self.stop()
 
     # Create
+    @traced("create")
     async def create(self, interaction: discord.Interaction) -> None:
         """
         Gets executed on button create press.
@@ -367,8 +518,7 @@ class EmbedUi(discord.ui.View):
 
         # User input via Modal - ID and Name
         modal = create_action.EmbedUiModalCreate()
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Input validation - Has to be unique in the Database
         embed_name: str = modal.children[1].value
         try:
@@ -377,29 +527,31 @@ class EmbedUi(discord.ui.View):
         except ValueError:
             await modal.interaction.response.send_message("ID is not Integer!", ephemeral=True)
             return
-        # TODO: Check if id exists in Database -> If not exist_embed_id should be None
-        exist_embed_id: typing.Optional[dict]
-        if exist_embed_id is not None:
+        # Set default Embed
+        embed: EmbedModel = EmbedModel(description="Default")
+        # Create Embed in Database - Only if id and name are free, the collisions are returned.
+        collisions: typing.Optional[list] = await self.bot.embed_store.insert(embed_id, embed_name, embed.to_dict())
+        if collisions is None:
+            await modal.interaction.response.send_message("Something went wrong while trying to create the embed.",
+                                                          ephemeral=True)
+            return
+        if "id" in collisions:
             await modal.interaction.response.send_message("Embed id already exists.", ephemeral=True)
             return
-        # TODO: Check if name exists in Database -> If not exist_embed_name should be None
-        exist_embed_name: typing.Optional[dict]
-        if exist_embed_name is not None:
+        if "name" in collisions:
             await modal.interaction.response.send_message("Embed name already exists.", ephemeral=True)
             return
         # Set current db embed data -> Gets used when saving the embed after editing.
         self.current_db_embed_data = {"id": embed_id, "name": embed_name}
-        # Set default Embed
-        embed = discord.Embed(description="Default")
-        # Create Embed in Database
-        # TODO: Create Embed in Database (id=embed_id, name=embed_name, value=embed.to_dict())
-        # Send the new embed with the Button Press Interaction.
-        self.embed_message = await self.send_embed(embed, interaction)
+        # Send the new embed with the Button Press Interaction. A new embed starts without history.
+        self.history.clear()
+        self.embed_message = await self.send_embed(embed, interaction, record=False)
         # Set the View to edit embed Mode.
         await self.set_edit_embed_view()
         await modal.interaction.response.defer()
 
     # Modify
+    @traced("modify")
     async def modify(self, interaction: discord.Interaction) -> None:
         """
         Gets executed on button modify press.
@@ -413,8 +565,7 @@ class EmbedUi(discord.ui.View):
 
         # User input via Modal - ID and Name
         modal = modify_action.EmbedUiModalModify()
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Input validation
         embed_name: str = modal.children[1].value
         embed_id: typing.Optional[str] = modal.children[0].value
@@ -429,30 +580,31 @@ class EmbedUi(discord.ui.View):
             embed_id = None
         # Get embed from Database - ID will be prioritized.
         if embed_id is None:
-            # TODO: Get Embed data via name -> None if it does not exist
-            embed_data: typing.Optional[dict]
+            embed_data: typing.Optional[dict] = await self.bot.embed_store.get_by_name(embed_name)
         else:
-            # TODO: Get Embed data via id -> None if it does not exist
-            embed_data: typing.Optional[dict]
+            embed_data: typing.Optional[dict] = await self.bot.embed_store.get_by_id(embed_id)
 
         # Check if embed exists
         if embed_data is None:
             await modal.interaction.response.send_message("Embed does not exists.", ephemeral=True)
             return
         await modal.interaction.response.defer()
-        embed: discord.Embed = discord.Embed.from_dict(embed_data["value"])
+        # The model does not reference the loaded data, which is shared with the embed cache.
+        embed: EmbedModel = EmbedModel.from_dict(embed_data["value"])
         # Set current db embed data -> Gets used when saving the embed after editing.
-        self.current_db_embed_data = {"id": embed_id, "name": embed_name}
-        # Send the new embed with the Button Press Interaction.
-        self.embed_message = await self.send_embed(embed, interaction)
+        self.current_db_embed_data = {"id": embed_data["id"], "name": embed_data["name"]}
+        # Send the new embed with the Button Press Interaction. A new embed starts without history.
+        self.history.clear()
+        self.embed_message = await self.send_embed(embed, interaction, record=False)
         # Saftey check if embed could not be sent. Should be correctly in databse thought.
         if self.embed_message is None:
-            await modal.interaction.followup.send("Embed could not be sent.", ephemeral=True)
+            await self.bot.rest_scheduler.followup(modal.interaction, "Embed could not be sent.", ephemeral=True)
             return
         # Set the View to edit embed Mode.
         await self.set_edit_embed_view()
 
     # Delete
+    @traced("delete")
     async def delete(self, interaction: discord.Interaction) -> None:
         """
         Gets executed on button delete press.
@@ -466,8 +618,7 @@ class EmbedUi(discord.ui.View):
 
         # User input via Modal - ID and Name
         modal = delete_action.EmbedUiModalDelete()
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Input validation
         embed_name: str = modal.children[1].value
         embed_id: typing.Optional[int] = None
@@ -480,30 +631,31 @@ class EmbedUi(discord.ui.View):
                 return
         # Get embed from Database - ID will be prioritized.
         if embed_id is None:
-            # TODO: Get Embed data via name -> None if it does not exist
-            embed_data: typing.Optional[dict]
+            embed_data: typing.Optional[dict] = await self.bot.embed_store.get_by_name(embed_name)
         else:
-            # TODO: Get Embed data via id -> None if it does not exist
-            embed_data: typing.Optional[dict]
+            embed_data: typing.Optional[dict] = await self.bot.embed_store.get_by_id(embed_id)
         # Check if embed exists
         if embed_data is None:
             await modal.interaction.response.send_message("Embed does not exists.", ephemeral=True)
             return
-        embed: discord.Embed = discord.Embed.from_dict(embed_data["value"])
+        # The model does not reference the loaded data, which is shared with the embed cache.
+        embed: EmbedModel = EmbedModel.from_dict(embed_data["value"])
         # Set current db embed data -> Gets used when saving the embed after editing.
-        self.current_db_embed_data = {"id": embed_id, "name": embed_name}
+        self.current_db_embed_data = {"id": embed_data["id"], "name": embed_data["name"]}
         await modal.interaction.response.defer()
-        # Send the new embed with the Button Press Interaction.
-        self.embed_message = await self.send_embed(embed, interaction)
+        # Send the new embed with the Button Press Interaction. A new embed starts without history.
+        self.history.clear()
+        self.embed_message = await self.send_embed(embed, interaction, record=False)
         # Saftey check if embed could not be sent. Should be correctly in databse thought.
         if self.embed_message is None:
-            await modal.interaction.followup.send("Embed could not be sent.", ephemeral=True)
+            await self.bot.rest_scheduler.followup(modal.interaction, "Embed could not be sent.", ephemeral=True)
             return
         # Remove Delete Button and add delete confirm Button
         await self.remove_except_action_select()
         self.add_item(delete_action.EmbedUiButtonDeleteConfirm())
-        await self.message.edit(view=self)
+        await self.bot.rest_scheduler.edit(self.message, view=self)
 
+    @traced("delete_confirmation")
     async def delete_confirmation(self, interaction: discord.Interaction) -> None:
         """
         Deletes the embed in the database which corresponds to the current embed data.
@@ -514,30 +666,27 @@ class EmbedUi(discord.ui.View):
         :return:
         """
 
-        # TODO: Delete the Embed in your database (id=self.current_db_embed_data["id"], name=self.current_db_embed_data["name"])
-        if type(self.current_embed.image.url) is str:
-            if os.path.isfile(f"./daten/saved_pictures/{self.current_embed.image.url[13:]}"):
-                os.remove(f"./daten/saved_pictures/{self.current_embed.image.url[13:]}")
-        if type(self.current_embed.thumbnail.url) is str:
-            if os.path.isfile(f"./daten/saved_pictures/{self.current_embed.thumbnail.url}"):
-                os.remove(f"./daten/saved_pictures/{self.current_embed.thumbnail.url}")
-        if type(self.current_embed.author.icon_url) is str:
-            if os.path.isfile(f"./daten/saved_pictures/{self.current_embed.author.icon_url}"):
-                os.remove(f"./daten/saved_pictures/{self.current_embed.author.icon_url}")
-        if type(self.current_embed.footer.icon_url) is str:
-            if os.path.isfile(f"./daten/saved_pictures/{self.current_embed.footer.icon_url}"):
-                os.remove(f"./daten/saved_pictures/{self.current_embed.footer.icon_url}")
+        deleted: typing.Optional[dict] = await self.bot.embed_store.delete(self.current_db_embed_data["id"])
+        # Remove the references of the pictures as stored, they get deleted if no other embed uses them. Only the
+        # session which deleted the row does this, the preview can be outdated.
+        if deleted is not None:
+            await self.bot.image_store.update_references(
+                [], await self.embed_image_names(EmbedModel.from_dict(deleted["value"])))
         if self.embed_message is not None:
-            await self.embed_message.delete()
+            await self.bot.rest_scheduler.delete(self.embed_message)
             self.embed_message = None
         await self.remove_except_action_select()
         self.add_item(delete_action.EmbedUiButtonDelete())
-        await self.message.edit(view=self)
+        await self.bot.rest_scheduler.edit(self.message, view=self)
+        if deleted is None:
+            await interaction.response.send_message("Embed does not exists.", ephemeral=True)
+            return
         await interaction.response.send_message(f"Embed deleted with data: {self.current_db_embed_data}",
                                                 ephemeral=True)
 
     # Edit Embed
 
+    @traced("edit_embed")
     async def edit_embed(self, interaction: discord.Interaction, default_data: dict = None, wrong_data: list = None) \
             -> None:
         """
@@ -559,14 +708,13 @@ class EmbedUi(discord.ui.View):
             wrong_data = []
         # Filter default value for only strings. Color and Timestamp are not stored as str and have to be converted
         filterd_default_data: dict = {key: value for key, value in default_data.items() if type(value) is str}
-        if type(self.current_embed.color) is discord.Color:
-            filterd_default_data["color"] = str(self.current_embed.color)
-        if type(self.current_embed.timestamp) is datetime.datetime:
+        if self.current_embed.color is not None:
+            filterd_default_data["color"] = f"#{self.current_embed.color:06x}"
+        if self.current_embed.timestamp is not None:
             filterd_default_data["timestamp"] = self.current_embed.timestamp.isoformat()
         # Ask user for data that should be changed
         modal: edit_embed.ModalEmbedEdit = edit_embed.ModalEmbedEdit(filterd_default_data, wrong_data)
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Return if modal has timeout
         if modal.interaction is None:
             return
@@ -578,23 +726,22 @@ class EmbedUi(discord.ui.View):
         error_message: typing.Optional[str] = None # The error Message that will be displayed to the user.
         if len(wrong_embed_data) == 0:
             # If no errors were found try to send the embed
-            # Deepcopy so the current_embed stays old even if the new embed has errors.
-            modify_embed: discord.Embed = copy.deepcopy(self.current_embed)
-            modify_embed.title = modal.children[0].value
-            modify_embed.description = modal.children[1].value
+            # New version, the current_embed stays old even if the new embed has errors.
+            color: typing.Optional[int] = self.current_embed.color
             if modal.children[2].value != "":
-                modify_embed.color = discord.Color(int(hex(int(str(modal.children[2].value)[1:], 16)), 0))
+                color = int(str(modal.children[2].value)[1:], 16)
+            timestamp: typing.Optional[datetime.datetime] = None
             if modal.children[3].value != "":
-                modify_embed.timestamp = datetime.datetime.fromisoformat(modal.children[3].value)
-            else:
-                modify_embed.timestamp = discord.Embed.Empty
-            modify_embed.url = modal.children[4].value
+                timestamp = datetime.datetime.fromisoformat(modal.children[3].value)
+            modify_embed: EmbedModel = self.current_embed.replace(title=modal.children[0].value,
+                                                                  description=modal.children[1].value, color=color,
+                                                                  timestamp=timestamp, url=modal.children[4].value)
             # Try to send the embed. None if sending had an Error.
             msg: typing.Optional[discord.Message] = await self.send_embed(modify_embed, interaction)
             if msg is None:
                 # Add all Options to wrong data - No Information about the reason why the sending had an Error.
                 wrong_embed_data = ["title", "description", "color", "timestamp", "url"]
-                error_message = "Something went wrong while trying to send the embed!"
+                error_message = await self.send_error_message(modify_embed)
             else:
                 # Sending was sucessfull, set the current embed and message to the new values. Defer the Interaction.
                 self.current_embed = modify_embed
@@ -619,6 +766,7 @@ class EmbedUi(discord.ui.View):
         retry_edit: retry_view.RetryEditView = retry_view.RetryEditView(old_data, retry_type, self, wrong_embed_data)
         await modal.interaction.response.send_message(error_message, view=retry_edit)
 
+    @traced("edit_author")
     async def edit_author(self, interaction: discord.Interaction, default_data: dict = None, wrong_data: list = None) \
             -> None:
         """
@@ -642,52 +790,49 @@ class EmbedUi(discord.ui.View):
             wrong_data = []
         # Ask user for data that should be changed
         modal: edit_embed.ModalAuthorEdit = edit_embed.ModalAuthorEdit(default_data, wrong_data)
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Return if Modal has timeouted
         if modal.interaction is None:
             return
         # If No Value was provided the author gets removed
         if modal.children[0].value == "" and modal.children[1].value == "":
-            self.current_embed.remove_author()
-            if self.embed_message is not None:
-                await self.embed_message.delete()
+            self.set_current_embed(self.current_embed.replace(author=None))
             await modal.interaction.response.defer()
             self.embed_message = await self.send_embed(self.current_embed, interaction)
             return
         # Get Image via the Image View
-        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user)
+        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user, self.tasks,
+                                                                    "author", on_activity=self.touch)
         await modal.interaction.response.send_message("Please send the Image you want in this Channel", view=image_view)
-        # Wait for image to finish or for timeout
-        await asyncio.wait([image_view.start(), image_view.wait()], return_when=asyncio.FIRST_COMPLETED)
+        # Wait for image to finish or for timeout - The unfinished one gets cancelled.
+        await self.tasks.first_completed(image_view.start(), image_view.wait())
         # Check Data enterd via the modal.
         check_data: dict = {"name": modal.children[0].value, "url": modal.children[1].value}
         wrong_author_data: list = await self.check_author_embed_data(check_data)
         error_message: typing.Optional[str] = None
         if len(wrong_author_data) == 0:
             # No errors were found in the Input Check
-            modify_embed: discord.Embed = copy.deepcopy(self.current_embed)
+            old_icon_url: typing.Optional[str] = self.current_embed.image_urls()[0]
             match image_view.image:
                 case None:
                     # No Image was given - Using old Image
-                    icon_path = modify_embed.author.icon_url
+                    icon_path = old_icon_url
                 case "delete":
                     # Image should be deleted
-                    icon_path = discord.Embed.Empty
-                    await self.delete_image(modify_embed.author.icon_url)
+                    icon_path = None
                 case _:
                     # New Image
-                    await self.delete_image(modify_embed.author.icon_url)
                     icon_path = f"attachment://{image_view.image}"
                     self.chached_images.append(image_view.image)
             # Set Author
-            modify_embed.set_author(name=modal.children[0].value, url=modal.children[1].value, icon_url=icon_path)
+            modify_embed: EmbedModel = self.current_embed.replace(
+                author=EmbedAuthor(modal.children[0].value, modal.children[1].value, icon_path))
             # Send message
             message: discord.Message = await self.send_embed(modify_embed, modal.interaction)
             # Check if sending was succesfull
             if message is None:
                 wrong_author_data = ["name", "url"]
-                error_message = "Something went wrong while trying to send the embed!"
+                error_message = await self.send_error_message(modify_embed)
             else:
                 self.current_embed = modify_embed
                 self.embed_message = message
@@ -702,9 +847,11 @@ class EmbedUi(discord.ui.View):
         # Sending Retry Message
         retry_type: retry_view.ReplyType = retry_view.ReplyType.author_edit
         retry_edit: retry_view.RetryEditView = retry_view.RetryEditView(check_data, retry_type, self, wrong_author_data)
-        message: discord.Message = await modal.interaction.followup.send(error_message, view=retry_edit)
+        message: discord.Message = await self.bot.rest_scheduler.followup(modal.interaction, error_message,
+                                                                          view=retry_edit)
         retry_edit.message = message
 
+    @traced("edit_footer")
     async def edit_footer(self, interaction: discord.Interaction, default_data: dict = None, wrong_data: list = None) \
             -> None:
         """
@@ -725,52 +872,49 @@ class EmbedUi(discord.ui.View):
             wrong_data = []
         # Ask user for data that should be changed
         modal: edit_embed.ModalFooterEdit = edit_embed.ModalFooterEdit(default_data, wrong_data)
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Return if Modal has timeouted
         if modal.interaction is None:
             return
         # If No Value was provided the footer gets removed
         if modal.children[0].value == "":
-            self.current_embed.remove_footer()
-            if self.embed_message is not None:
-                await self.embed_message.delete()
+            self.set_current_embed(self.current_embed.replace(footer=None))
             await modal.interaction.response.defer()
             self.embed_message = await self.send_embed(self.current_embed, interaction)
             return
         # Get Image via the Image View
-        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user)
+        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user, self.tasks,
+                                                                    "footer", on_activity=self.touch)
         await modal.interaction.response.send_message("Please send the Image you want in this Channel", view=image_view)
-        # Wait for image to finish or for timeout
-        await asyncio.wait([image_view.start(), image_view.wait()], return_when=asyncio.FIRST_COMPLETED)
+        # Wait for image to finish or for timeout - The unfinished one gets cancelled.
+        await self.tasks.first_completed(image_view.start(), image_view.wait())
         # Check Data enterd via the modal.
         check_data: dict = {"text": modal.children[0].value}
         wrong_footer_data: list = await self.check_footer_embed_data(check_data)
         error_message: typing.Optional[str] = None
         if len(wrong_footer_data) == 0:
             # No errors were found in the Input Check
-            modify_embed: discord.Embed = copy.deepcopy(self.current_embed)
+            old_icon_url: typing.Optional[str] = self.current_embed.image_urls()[1]
             match image_view.image:
                 case None:
                     # No Image was given - Using old Image
-                    icon_path = modify_embed.footer.icon_url
+                    icon_path = old_icon_url
                 case "delete":
                     # Image gets deleted
-                    icon_path = discord.Embed.Empty
-                    await self.delete_image(modify_embed.footer.icon_url)
+                    icon_path = None
                 case _:
                     # New Image
-                    await self.delete_image(modify_embed.footer.icon_url)
                     icon_path = f"attachment://{image_view.image}"
                     self.chached_images.append(image_view.image)
             # Set Footer
-            modify_embed.set_footer(text=modal.children[0].value, icon_url=icon_path)
+            modify_embed: EmbedModel = self.current_embed.replace(footer=EmbedFooter(modal.children[0].value,
+                                                                                     icon_path))
             # Send Message
             msg: discord.Message = await self.send_embed(modify_embed, modal.interaction)
             # Check if sending was succesfull
             if msg is None:
                 wrong_footer_data = ["text"]
-                error_message = "Something went wrong while trying to send the embed!"
+                error_message = await self.send_error_message(modify_embed)
             else:
                 self.current_embed = modify_embed
                 self.embed_message = msg
@@ -783,9 +927,10 @@ class EmbedUi(discord.ui.View):
         # Sending Retry Message
         retry_type: retry_view.ReplyType = retry_view.ReplyType.footer_edit
         retry_edit: retry_view.RetryEditView = retry_view.RetryEditView(check_data, retry_type, self, wrong_footer_data)
-        msg: discord.Message = await modal.interaction.followup.send(error_message, view=retry_edit)
+        msg: discord.Message = await self.bot.rest_scheduler.followup(modal.interaction, error_message, view=retry_edit)
         retry_edit.message = msg
 
+    @traced("edit_image")
     async def edit_image(self, interaction: discord.Interaction) -> None:
         """
         Asks for an Image for the Embed.
@@ -795,31 +940,30 @@ class EmbedUi(discord.ui.View):
         """
 
         # Get Image View
-        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user)
+        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user, self.tasks,
+                                                                    "image", on_activity=self.touch)
         await interaction.response.send_message("Please send the Image you want in this Channel", view=image_view)
         # Wait for Timeout or View to finish
-        await asyncio.wait([image_view.start(), image_view.wait()], return_when=asyncio.FIRST_COMPLETED)
+        await self.tasks.first_completed(image_view.start(), image_view.wait())
         error_message: typing.Optional[str] = None
-        modify_embed: discord.Embed = copy.deepcopy(self.current_embed)
+        modify_embed: EmbedModel = self.current_embed
         match image_view.image:
             case None:
                 # Old Image stays.
                 pass
             case "delete":
                 # Image gets deleted
-                await self.delete_image(modify_embed.image.url)
-                modify_embed.remove_image()
+                modify_embed = modify_embed.replace(image=None)
             case _:
                 # New Image was given
-                await self.delete_image(modify_embed.image.url)
                 icon_path = f"attachment://{image_view.image}"
-                modify_embed.set_image(url=icon_path)
+                modify_embed = modify_embed.replace(image=icon_path)
                 self.chached_images.append(image_view.image)
         # Try to send the embed.
         msg: discord.Message = await self.send_embed(modify_embed, interaction)
         # Check if sending was successfull and construct Error Message.
         if msg is None:
-            error_message = "Something went wrong while trying to send the embed!"
+            error_message = await self.send_error_message(modify_embed)
         else:
             self.embed_message = msg
             self.current_embed = modify_embed
@@ -827,9 +971,10 @@ class EmbedUi(discord.ui.View):
         # Send Retry View
         retry_type: retry_view.ReplyType = retry_view.ReplyType.footer_edit
         retry_edit: retry_view.RetryEditView = retry_view.RetryEditView(None, retry_type, self, [])
-        msg: discord.Message = await interaction.followup.send(error_message, view=retry_edit)
+        msg: discord.Message = await self.bot.rest_scheduler.followup(interaction, error_message, view=retry_edit)
         retry_edit.message = msg
 
+    @traced("edit_thumbnail")
     async def edit_thumbnail(self, interaction: discord.Interaction) -> None:
         """
         Asks for a Thumbnail.
@@ -839,31 +984,30 @@ class EmbedUi(discord.ui.View):
         """
 
         # Get Image View
-        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user)
+        image_view: get_image.GetImageView = get_image.GetImageView(self.bot, interaction.user, self.tasks,
+                                                                    "thumbnail", on_activity=self.touch)
         await interaction.response.send_message("Please send the Image you want in this Channel", view=image_view)
         # Wait for View to finish or timeout
-        await asyncio.wait([image_view.start(), image_view.wait()], return_when=asyncio.FIRST_COMPLETED)
+        await self.tasks.first_completed(image_view.start(), image_view.wait())
         error_message: typing.Optional[str] = None
-        modify_embed: discord.Embed = copy.deepcopy(self.current_embed)
+        modify_embed: EmbedModel = self.current_embed
         match image_view.image:
             case None:
                 # Old Image stays
                 pass
             case "delete":
                 # Image gets deleted
-                await self.delete_image(modify_embed.thumbnail.url)
-                modify_embed.remove_thumbnail()
+                modify_embed = modify_embed.replace(thumbnail=None)
             case _:
                 # New Image was given
-                await self.delete_image(modify_embed.thumbnail.url)
                 icon_path = f"attachment://{image_view.image}"
-                modify_embed.set_thumbnail(url=icon_path)
+                modify_embed = modify_embed.replace(thumbnail=icon_path)
                 self.chached_images.append(image_view.image)
         # Try to send the Embed
         msg: discord.Message = await self.send_embed(modify_embed, interaction)
         # Check if sending the Embed was succesfull and construct Error Message.
         if msg is None:
-            error_message = "Something went wrong while trying to send the embed!"
+            error_message = await self.send_error_message(modify_embed)
         else:
             self.current_embed = modify_embed
             self.embed_message = msg
@@ -871,9 +1015,10 @@ class EmbedUi(discord.ui.View):
         # Send Retry View
         retry_type: retry_view.ReplyType = retry_view.ReplyType.footer_edit
         retry_edit: retry_view.RetryEditView = retry_view.RetryEditView(None, retry_type, self, [])
-        msg: discord.Message = await interaction.followup.send(error_message, view=retry_edit)
+        msg: discord.Message = await self.bot.rest_scheduler.followup(interaction, error_message, view=retry_edit)
         retry_edit.message = msg
 
+    @traced("modify_field")
     async def modify_field(self, interaction: discord.Interaction, current_field_index: int, default_data: dict = None,
                            wrong_data: list = None) -> None:
         """
@@ -896,15 +1041,14 @@ class EmbedUi(discord.ui.View):
             wrong_data = []
         # Ask User Input with Modal
         modal: edit_embed.ModalFieldEdit = edit_embed.ModalFieldEdit(default_data, wrong_data)
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Return if Modal Timeouts
         if modal.interaction is None:
             return
         # Modify Field
-        copy_embed: discord.Embed = copy.deepcopy(self.current_embed)
-        copy_embed.set_field_at(index=current_field_index, name=modal.children[0].value, value=modal.children[1].value,
-                                inline=self.current_embed.fields[current_field_index].inline)
+        copy_embed: EmbedModel = self.current_embed.set_field_at(
+            index=current_field_index, name=modal.children[0].value, value=modal.children[1].value,
+            inline=self.current_embed.fields[current_field_index].inline)
         # Try to send the embed
         msg: discord.Message = await self.send_embed(copy_embed, interaction)
         wrong_embed_data: list = []
@@ -913,12 +1057,12 @@ class EmbedUi(discord.ui.View):
         if msg is None:
             # Sending the Embed failed - Constructing Error Message
             wrong_embed_data = ["name", "value"]
-            error_message = "Something went wrong while trying to send the embed!"
+            error_message = await self.send_error_message(copy_embed)
         else:
             # Set new embed + embed message
             self.embed_message = msg
             await modal.interaction.response.defer()
-            await self.message.edit(view=self)
+            await self.bot.rest_scheduler.edit(self.message, view=self)
             return
         # Sending retry view
         old_data: dict = {"name": modal.children[0].value, "value": modal.children[1].value, "index": current_field_index}
@@ -926,6 +1070,7 @@ class EmbedUi(discord.ui.View):
         retry_edit: retry_view.RetryEditView = retry_view.RetryEditView(old_data, retry_type, self, wrong_embed_data)
         await modal.interaction.response.send_message(error_message, view=retry_edit)
 
+    @traced("modify_inline_field")
     async def modify_inline_field(self, interaction: discord.Interaction, current_field_index: int, inlane_value: bool)\
             -> None:
         """
@@ -941,13 +1086,15 @@ class EmbedUi(discord.ui.View):
         name = self.current_embed.fields[current_field_index].name
         value = self.current_embed.fields[current_field_index].value
         # Set new Value of field
-        self.current_embed.set_field_at(index=current_field_index, name=name, value=value, inline=inlane_value)
-        # Defer Interaction and send new message
-        await interaction.response.defer()
-        self.embed_message = await self.send_embed(self.current_embed, interaction)
-        # Editing Message so the changed Button gets displayed
-        await self.message.edit(view=self)
-
+        self.set_current_embed(self.current_embed.set_field_at(index=current_field_index, name=name, value=value,
+                                                               inline=inlane_value))
+        # The response shows the changed Button, the embed gets sent by the render scheduler - Rapid toggles result
+        # in one preview update.
+        await interaction.response.edit_message(view=self)
+        self.render_interaction = interaction
+        self.renderer.request()
+
+    @traced("remove_field")
     async def remove_field(self, interaction: discord.Interaction, current_field_index: int) -> None:
         """
         Removes the Field.
@@ -958,10 +1105,7 @@ class EmbedUi(discord.ui.View):
         """
 
         # Remove The field
-        self.current_embed.remove_field(index=current_field_index)
-        # Defer interaction and send the new Embed
-        await interaction.response.defer()
-        self.embed_message = await self.send_embed(self.current_embed, interaction)
+        self.set_current_embed(self.current_embed.remove_field(index=current_field_index))
         # Reseting the SelectFieldEdit to not show the deleted field anymore
         await self.remove_row(3)
         self.add_item(edit_embed.SelectFieldEdit(len(self.current_embed.fields)))
@@ -969,9 +1113,12 @@ class EmbedUi(discord.ui.View):
         await self.remove_row(4)
         self.add_item(edit_embed.ButtonEmbedSave())
         self.add_item(edit_embed.ButtonEmbedSaveRename())
-        # Edit the Message to show the new View
-        await self.message.edit(view=self)
+        # The response shows the new View, the embed gets sent by the render scheduler.
+        await interaction.response.edit_message(view=self)
+        self.render_interaction = interaction
+        self.renderer.request()
 
+    @traced("add_field")
     async def add_field(self, interaction: discord.Interaction, default_data: dict = None) -> None:
         """
         Adds a Field to the embed.
@@ -986,14 +1133,13 @@ class EmbedUi(discord.ui.View):
             default_data = {}
         # Modal to ask User
         modal: edit_embed.ModalFieldEdit = edit_embed.ModalFieldEdit(default_data)
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Return if Modal Timeouts
         if modal.interaction is None:
             return
         # Add the new Field
-        copy_embed: discord.Embed = copy.deepcopy(self.current_embed)
-        copy_embed.add_field(name=modal.children[0].value, value=modal.children[1].value)
+        copy_embed: EmbedModel = self.current_embed.add_field(name=modal.children[0].value,
+                                                              value=modal.children[1].value)
         # Send Message
         msg: discord.Message = await self.send_embed(copy_embed, interaction)
         wrong_embed_data: list = []
@@ -1001,7 +1147,7 @@ class EmbedUi(discord.ui.View):
         if msg is None:
             # Message could not be sent
             wrong_embed_data = ["name", "value"]
-            error_message = "Something went wrong while trying to send the embed!"
+            error_message = await self.send_error_message(copy_embed)
         else:
             # Succesfully send set all current variables to new value and defer Interaction
             self.embed_message = msg
@@ -1017,55 +1163,94 @@ class EmbedUi(discord.ui.View):
         retry_edit: retry_view.RetryEditView = retry_view.RetryEditView(old_data, retry_type, self, wrong_embed_data)
         await modal.interaction.response.send_message(error_message, view=retry_edit)
 
+    @traced("undo")
+    async def undo(self, interaction: discord.Interaction) -> None:
+        """
+        Restores the previous version of the embed.
+
+        :param interaction: discord.Interaction -> The current Interaction. No Followup.
+        :return:
+        """
+
+        embed: typing.Optional[EmbedModel] = self.history.undo(self.current_embed)
+        if embed is None:
+            await interaction.response.send_message("Nothing to undo.", ephemeral=True)
+            return
+        await interaction.response.defer()
+        msg: typing.Optional[discord.Message] = await self.send_embed(embed, interaction, record=False)
+        if msg is None:
+            # Going forward again puts the versions back to their stacks.
+            self.history.redo(embed)
+            await self.bot.rest_scheduler.followup(interaction, await self.send_error_message(embed), ephemeral=True)
+            return
+        self.embed_message = msg
+        # The amount of fields can change - Reset the View.
+        await self.set_edit_embed_view()
+
+    @traced("redo")
+    async def redo(self, interaction: discord.Interaction) -> None:
+        """
+        Restores the version of the embed before the last undo.
+
+        :param interaction: discord.Interaction -> The current Interaction. No Followup.
+        :return:
+        """
+
+        embed: typing.Optional[EmbedModel] = self.history.redo(self.current_embed)
+        if embed is None:
+            await interaction.response.send_message("Nothing to redo.", ephemeral=True)
+            return
+        await interaction.response.defer()
+        msg: typing.Optional[discord.Message] = await self.send_embed(embed, interaction, record=False)
+        if msg is None:
+            # Going back again puts the versions back to their stacks.
+            self.history.undo(embed)
+            await self.bot.rest_scheduler.followup(interaction, await self.send_error_message(embed), ephemeral=True)
+            return
+        self.embed_message = msg
+        # The amount of fields can change - Reset the View.
+        await self.set_edit_embed_view()
+
+    @traced("save_embed")
     async def save_embed(self, interaction: discord.Interaction) -> None:
         """
         Saves the current Embed.
 
-        :param interaction: discord.Interaction -> The current Interaction the modal will be sent to. No Followup.
+        :param interaction: discord.Interaction -> The current Interaction, answered with a Followup.
         :return:
         """
 
-        # Loding old Embed data
-        # TODO: Load the old Embed data from Database
-        old_embed_data: dict
-        old_embed: discord.Embed = discord.Embed.from_dict(old_embed_data)
+        # Answer first - Storing the pictures can take longer than the Interaction is valid.
+        await interaction.response.defer()
+        # Loding old Embed data - Another session can have deleted or renamed the embed.
+        old_embed_data: typing.Optional[dict] = await self.bot.embed_store.get_by_id(self.current_db_embed_data["id"])
+        if old_embed_data is None:
+            await self.bot.rest_scheduler.followup(interaction, "Embed does not exists.", ephemeral=True)
+            return
+        old_embed: EmbedModel = EmbedModel.from_dict(old_embed_data["value"])
 
+        # Storing pictures - The embed gets written with the stored pictures. The temporary pictures stay, older
+        # versions in the undo history still use them.
+        saved_embed, created = await self.save_images()
         # Saving the Embed in database
-        # TODO: Save the embed in the Database -> result should be None if error
-        result: typing.Optional[dict]
+        result: typing.Optional[dict] = await self.bot.embed_store.update(self.current_db_embed_data["id"],
+                                                                          saved_embed.to_dict())
         # Checking if the save was succesfull
         if result is None:
-            await interaction.response.send_message("Something went wrong while trying to save the embed.",
-                                                    ephemeral=True)
+            # Roll back - Pictures only stored for this save are removed again.
+            await self.bot.image_store.discard(created)
+            await self.bot.rest_scheduler.followup(interaction, "Something went wrong while trying to save the embed.",
+                                                   ephemeral=True)
         else:
-            await interaction.response.send_message("Succesfully saved the Embed!", ephemeral=True)
-            # Saving pictures
-            if type(self.current_embed.image.url) is str:
-                await self.save_image(self.current_embed.image.url)
-            if type(self.current_embed.thumbnail.url) is str:
-                await self.save_image(self.current_embed.thumbnail.url)
-            if type(self.current_embed.author.icon_url) is str:
-                await self.save_image(self.current_embed.author.icon_url)
-            if type(self.current_embed.footer.icon_url) is str:
-                await self.save_image(self.current_embed.footer.icon_url)
-            # Deleting Pictures
-            if old_embed.image.url != self.current_embed.image.url:
-                if type(old_embed.image.url) is str:
-                    if os.path.isfile(f"./daten/saved_pictures/{old_embed.image.url[13:]}"):
-                        os.remove(f"./daten/saved_pictures/{old_embed.image.url[13:]}")
-            if old_embed.thumbnail.url != self.current_embed.thumbnail.url:
-                if type(old_embed.image.url) is str:
-                    if os.path.isfile(f"./daten/saved_pictures/{old_embed.thumbnail.url[13:]}"):
-                        os.remove(f"./daten/saved_pictures/{old_embed.thumbnail.url[13:]}")
-            if old_embed.author.icon_url != self.current_embed.author.icon_url:
-                if type(old_embed.image.url) is str:
-                    if os.path.isfile(f"./daten/saved_pictures/{old_embed.author.icon_url[13:]}"):
-                        os.remove(f"./daten/saved_pictures/{old_embed.author.icon_url[13:]}")
-            if old_embed.footer.icon_url != self.current_embed.footer.icon_url:
-                if type(old_embed.image.url) is str:
-                    if os.path.isfile(f"./daten/saved_pictures/{old_embed.footer.icon_url[13:]}"):
-                        os.remove(f"./daten/saved_pictures/{old_embed.footer.icon_url[13:]}")
-
+            # Same content - The undo history stays.
+            self.set_current_embed(saved_embed, record=False)
+            # Update the references of the pictures directly after the write, old pictures get deleted if no other
+            # embed uses them. A failed answer must not leave the counts behind.
+            await self.bot.image_store.update_references(await self.embed_image_names(saved_embed),
+                                                         await self.embed_image_names(old_embed))
+            await self.bot.rest_scheduler.followup(interaction, "Succesfully saved the Embed!", ephemeral=True)
+
+    @traced("save_rename_embed")
     async def save_rename_embed(self, interaction: discord.Interaction) -> None:
         """
         Saves the current Embed.
@@ -1074,14 +1259,15 @@ class EmbedUi(discord.ui.View):
         :return:
         """
 
-        # Loding old Embed data
-        # TODO: Load the old Embed data from Database
-        old_embed_data: dict
-        old_embed: discord.Embed = discord.Embed.from_dict(old_embed_data)
+        # Loding old Embed data - Another session can have deleted or renamed the embed.
+        old_embed_data: typing.Optional[dict] = await self.bot.embed_store.get_by_id(self.current_db_embed_data["id"])
+        if old_embed_data is None:
+            await interaction.response.send_message("Embed does not exists.", ephemeral=True)
+            return
+        old_embed: EmbedModel = EmbedModel.from_dict(old_embed_data["value"])
         # User input via Modal - ID and Name
         modal = edit_embed.EmbedUiModalRename(self.current_db_embed_data)
-        await interaction.response.send_modal(modal)
-        await modal.wait()
+        await self.show_modal(interaction, modal)
         # Input validation - Has to be unique in the Database
         embed_name: str = modal.children[1].value
         try:
@@ -1090,51 +1276,40 @@ class EmbedUi(discord.ui.View):
         except ValueError:
             await modal.interaction.response.send_message("ID is not Integer!", ephemeral=True)
             return
-        # TODO: Check if id exists in Database -> If not exist_embed_id should be None
-        exist_embed_id: typing.Optional[dict]
-        if exist_embed_id is not None:
-            await modal.interaction.response.send_message("Embed id already exists.", ephemeral=True)
+        # Answer first - Storing the pictures can take longer than the Interaction is valid.
+        await modal.interaction.response.defer()
+        # Storing pictures - The embed gets written with the stored pictures. The temporary pictures stay, older
+        # versions in the undo history still use them.
+        saved_embed, created = await self.save_images()
+        # Saving the Embed in database - Renames the old embed in one step, only if id and name are not used by another
+        # embed. The collisions are returned.
+        collisions: typing.Optional[list] = await self.bot.embed_store.rename(self.current_db_embed_data["id"],
+                                                                              embed_id, embed_name,
+                                                                              saved_embed.to_dict())
+        if collisions != []:
+            # Roll back - Pictures only stored for this save are removed again.
+            await self.bot.image_store.discard(created)
+        if collisions is not None and "id" in collisions:
+            await self.bot.rest_scheduler.followup(modal.interaction, "Embed id already exists.", ephemeral=True)
             return
-        # TODO: Check if name exists in Database -> If not exist_embed_name should be None
-        exist_embed_name: typing.Optional[dict]
-        if exist_embed_name is not None:
-            await modal.interaction.response.send_message("Embed name already exists.", ephemeral=True)
+        if collisions is not None and "name" in collisions:
+            await self.bot.rest_scheduler.followup(modal.interaction, "Embed name already exists.", ephemeral=True)
             return
-
-        # Saving the Embed in database
-        # TODO: Save the embed in the Database -> result should be None if error
-        result: typing.Optional[dict]
         # Checking if the save was succesfull
-        if result is None:
-            await modal.interaction.response.send_message("Something went wrong while trying to save the embed.",
-                                                    ephemeral=True)
+        if collisions is None:
+            await self.bot.rest_scheduler.followup(modal.interaction,
+                                                   "Something went wrong while trying to save the embed.",
+                                                   ephemeral=True)
         else:
-            await modal.interaction.response.send_message("Succesfully saved the Embed!", ephemeral=True)
-            # TODO: Delete the embed in the Database (id=self.current_db_embed_data["id"], name=self.current_db_embed_data["name"])
+            # Same content - The undo history stays.
+            self.set_current_embed(saved_embed, record=False)
             self.current_db_embed_data["id"] = embed_id
             self.current_db_embed_data["name"] = embed_name
-            # Saving pictures
-            if type(self.current_embed.image.url) is str:
-                await self.save_image(self.current_embed.image.url)
-            if type(self.current_embed.thumbnail.url) is str:
-                await self.save_image(self.current_embed.thumbnail.url)
-            if type(self.current_embed.author.icon_url) is str:
-                await self.save_image(self.current_embed.author.icon_url)
-            if type(self.current_embed.footer.icon_url) is str:
-                await self.save_image(self.current_embed.footer.icon_url)
-            # Deleting Pictures
-            if old_embed.image.url != self.current_embed.image.url:
-                if os.path.isfile(f"./daten/saved_pictures/{old_embed.image.url[13:]}"):
-                    os.remove(f"./daten/saved_pictures/{old_embed.image.url[13:]}")
-            if old_embed.thumbnail.url != self.current_embed.thumbnail.url:
-                if os.path.isfile(f"./daten/saved_pictures/{old_embed.thumbnail.url[13:]}"):
-                    os.remove(f"./daten/saved_pictures/{old_embed.thumbnail.url[13:]}")
-            if old_embed.author.icon_url != self.current_embed.author.icon_url:
-                if os.path.isfile(f"./daten/saved_pictures/{old_embed.author.icon_url[13:]}"):
-                    os.remove(f"./daten/saved_pictures/{old_embed.author.icon_url[13:]}")
-            if old_embed.footer.icon_url != self.current_embed.footer.icon_url:
-                if os.path.isfile(f"./daten/saved_pictures/{old_embed.footer.icon_url[13:]}"):
-                    os.remove(f"./daten/saved_pictures/{old_embed.footer.icon_url[13:]}")
+            # Update the references of the pictures directly after the write, old pictures get deleted if no other
+            # embed uses them. A failed answer must not leave the counts behind.
+            await self.bot.image_store.update_references(await self.embed_image_names(saved_embed),
+                                                         await self.embed_image_names(old_embed))
+            await self.bot.rest_scheduler.followup(modal.interaction, "Succesfully saved the Embed!", ephemeral=True)
 
     # Checks
 
@@ -1183,6 +1358,45 @@ class EmbedUi(discord.ui.View):
                 false_data.append("url")
         return false_data
 
+    @staticmethod
+    async def check_embed_limits(embed: EmbedModel) -> list:
+        """
+        Checks if the embed fits the Discord limits. The characters are counted with a running total, so the part
+        which exceeds the total limit gets named.
+
+        :param embed: EmbedModel -> The embed that should be checked.
+        :return: list -> Returns a list of error descriptions, if the list is empty no error was found.
+        """
+
+        # A list of all parts over a limit
+        false_data: list = []
+        # All parts that count to the total: (name, text, limit of the part)
+        parts: list = [("Title", embed.title, EMBED_LIMITS["title"]),
+                       ("Description", embed.description, EMBED_LIMITS["description"])]
+        if embed.author is not None:
+            parts.append(("Author name", embed.author.name, EMBED_LIMITS["author"]))
+        for index, field in enumerate(embed.fields):
+            parts.append((f"Field {index} name", field.name, EMBED_LIMITS["field_name"]))
+            parts.append((f"Field {index} value", field.value, EMBED_LIMITS["field_value"]))
+        if embed.footer is not None:
+            parts.append(("Footer text", embed.footer.text, EMBED_LIMITS["footer"]))
+        if len(embed.fields) > EMBED_LIMITS["fields"]:
+            false_data.append(f"Fields: {len(embed.fields)}/{EMBED_LIMITS['fields']}")
+        # Running total of all characters
+        total: int = 0
+        exceeded_at: typing.Optional[str] = None
+        for name, text, limit in parts:
+            if type(text) is not str:
+                continue
+            if len(text) > limit:
+                false_data.append(f"{name}: {len(text)}/{limit} characters")
+            total += len(text)
+            if exceeded_at is None and total > EMBED_LIMITS["total"]:
+                exceeded_at = name
+        if exceeded_at is not None:
+            false_data.append(f"Total: {total}/{EMBED_LIMITS['total']} characters (exceeded at {exceeded_at})")
+        return false_data
+
     @staticmethod
     async def check_footer_embed_data(data: dict) -> list:
         """
@@ -1195,15 +1409,56 @@ class EmbedUi(discord.ui.View):
         false_data: list = []
         return false_data
 
-    @staticmethod
-    async def save_image(icon_url: str) -> None:
+    async def save_image(self, icon_url: str, created: list) -> str:
         """
-        Saves the Image in saved_pictures.
+        Saves the Image in the image store (saved_pictures). Pictures which are already stored stay the same.
 
-        :param icon_url:
-        :return:
+        :param icon_url: str -> The complete icon url - will be stripped inside the function
+        :param created: list -> Names of newly stored pictures get added, they are discarded if the save fails.
+        :return: str -> The icon url of the stored Image.
         """
 
         if type(icon_url) is str:
-            if os.path.isfile(f"./daten/pictures/{icon_url[13:]}"):
-                shutil.move(f"./daten/pictures/{icon_url[13:]}", f"./daten/saved_pictures/{icon_url[13:]}")
+            if await self.bot.file_io.exists(f"./daten/pictures/{icon_url[13:]}"):
+                name, is_new = await self.bot.image_store.add(f"./daten/pictures/{icon_url[13:]}")
+                if is_new:
+                    created.append(name)
+                return f"attachment://{name}"
+        return icon_url
+
+    @spanned("save_images")
+    async def save_images(self) -> tuple[EmbedModel, list]:
+        """
+        Stores all Images of the current embed. The current embed stays unchanged until the embed is written.
+
+        :return: tuple[EmbedModel, list] -> (The embed with the urls of the stored Images, newly stored file names).
+        """
+
+        created: list = []
+        embed: EmbedModel = self.current_embed
+        if type(embed.image) is str:
+            embed = embed.replace(image=await self.save_image(embed.image, created))
+        if type(embed.thumbnail) is str:
+            embed = embed.replace(thumbnail=await self.save_image(embed.thumbnail, created))
+        if embed.author is not None and type(embed.author.icon_url) is str:
+            embed = embed.replace(author=embed.author._replace(icon_url=await self.save_image(embed.author.icon_url,
+                                                                                              created)))
+        if embed.footer is not None and type(embed.footer.icon_url) is str:
+            embed = embed.replace(footer=embed.footer._replace(icon_url=await self.save_image(embed.footer.icon_url,
+                                                                                              created)))
+        return embed, created
+
+    @staticmethod
+    async def embed_image_names(embed: EmbedModel) -> list:
+        """
+        Gets the file names of all Images of an embed.
+
+        :param embed: EmbedModel -> The embed.
+        :return: list -> The file names (attachment:// stripped).
+        """
+
+        names: list = []
+        for url in embed.image_urls():
+            if type(url) is str and url.startswith("attachment://"):
+                names.append(url[13:])
+        return names
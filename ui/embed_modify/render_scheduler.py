@@ -0,0 +1,86 @@
+"""
+Contains the Render Scheduler. Collapses rapid preview updates of one Embed UI into one.
+"""
+
+import asyncio
+import typing
+
+from utils.task_supervisor import TaskSupervisor
+
+
+class RenderScheduler:
+    """
+    Every request marks the preview as outdated. The render runs after delay seconds without further requests being
+    able to start another one, so all requests within the window result in one render. Requests while a render runs
+    lead to one more render afterwards.
+    """
+
+    def __init__(self, render: typing.Callable[[], typing.Awaitable[None]], tasks: TaskSupervisor,
+                 delay: float = 0.75):
+        """
+        Init for the Render Scheduler.
+
+        :param render: Callable[[], Awaitable[None]] -> Updates the preview with the current state.
+        :param tasks: TaskSupervisor -> The supervisor of the session, owns the render task.
+        :param delay: float -> Seconds requests get collected before the render.
+        """
+
+        self.render: typing.Callable[[], typing.Awaitable[None]] = render
+        self.tasks: TaskSupervisor = tasks
+        self.delay: float = delay
+        self.task: typing.Optional[asyncio.Task] = None
+        self.dirty: bool = False
+        self.rendering: bool = False
+        # Counters
+        self.requested: int = 0
+        self.rendered: int = 0
+        self.failed: int = 0
+
+    def request(self) -> None:
+        """
+        Marks the preview as outdated and schedules a render, if none is scheduled yet.
+
+        :return:
+        """
+
+        self.requested += 1
+        self.dirty = True
+        if self.task is None or self.task.done():
+            self.task = self.tasks.create_task(self.run())
+
+    async def run(self) -> None:
+        """
+        Renders until no request is left.
+
+        :return:
+        """
+
+        while self.dirty:
+            await asyncio.sleep(self.delay)
+            self.dirty = False
+            self.rendering = True
+            try:
+                await self.render()
+            except Exception as error:
+                # The next request renders again, a failed render must not end the task silently.
+                self.failed += 1
+                print(f"Render Scheduler: preview render failed: {error!r}")
+                continue
+            finally:
+                self.rendering = False
+            self.rendered += 1
+
+    def cancel_pending(self, requested: typing.Optional[int] = None) -> None:
+        """
+        Cancels a scheduled render which has not started yet, e.g. because the preview got updated directly.
+
+        :param requested: Optional[int] -> The request counter when the direct update started. If requests came in
+        since then, the render shows a newer state and stays scheduled.
+        :return:
+        """
+
+        if requested is not None and requested != self.requested:
+            return
+        if self.task is not None and not self.task.done() and not self.rendering:
+            self.task.cancel()
+            self.dirty = False
@@ -0,0 +1,172 @@
+"""
+Contains the Session Manager for the Embed UI. Limits the amount of open editors and evicts idle ones.
+"""
+
+import asyncio
+import sys
+import time
+import typing
+
+import discord
+
+
+def approximate_size(value: typing.Any) -> int:
+    """
+    Approximates the memory of a value with all containers inside (dict, list, tuple, set).
+
+    :param value: Any -> The value.
+    :return: int -> Approximate size in bytes.
+    """
+
+    size: int = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(approximate_size(key) + approximate_size(item) for key, item in value.items())
+    elif isinstance(value, (list, tuple, set)):
+        size += sum(approximate_size(item) for item in value)
+    return size
+
+
+class SessionManager:
+    """
+    Registry of all open Embed UIs keyed by (user id, channel id).
+    """
+
+    def __init__(self, max_per_user: int = 2, max_sessions: int = 50, idle_timeout: float = 900.0,
+                 check_interval: float = 60.0):
+        """
+        Init for the Session Manager.
+
+        :param max_per_user: int -> Maximum amount of open Embed UIs per user.
+        :param max_sessions: int -> Maximum amount of open Embed UIs in total.
+        :param idle_timeout: float -> Seconds without interaction after which an Embed UI gets evicted.
+        :param check_interval: float -> Seconds between the checks for idle Embed UIs.
+        """
+
+        self.max_per_user: int = max_per_user
+        self.max_sessions: int = max_sessions
+        self.idle_timeout: float = idle_timeout
+        self.check_interval: float = check_interval
+        self.sessions: dict[tuple[int, int], discord.ui.View] = {}
+        self.task: typing.Optional[asyncio.Task] = None
+        # Counters
+        self.evicted: int = 0
+        self.rejected: int = 0
+        self.errors: int = 0
+
+    @staticmethod
+    def session_key(view: discord.ui.View) -> tuple[int, int]:
+        """
+        Gets the key of the Embed UI.
+
+        :param view: EmbedUi -> The Embed UI.
+        :return: tuple[int, int] -> (user id, channel id)
+        """
+
+        return view.ctx.author.id, view.ctx.channel_id
+
+    async def register(self, view: discord.ui.View) -> bool:
+        """
+        Registers a new Embed UI. An open Embed UI of the same user in the same channel gets evicted.
+
+        :param view: EmbedUi -> The new Embed UI.
+        :return: bool -> False if a limit is reached, the Embed UI should not be started.
+        """
+
+        key: tuple[int, int] = self.session_key(view)
+        if key in self.sessions:
+            await self.evict(key)
+        user_sessions: int = len([user_id for user_id, _ in self.sessions if user_id == key[0]])
+        if user_sessions >= self.max_per_user or len(self.sessions) >= self.max_sessions:
+            self.rejected += 1
+            return False
+        self.sessions[key] = view
+        return True
+
+    def unregister(self, view: discord.ui.View) -> None:
+        """
+        Removes a closed Embed UI.
+
+        :param view: EmbedUi -> The Embed UI.
+        :return:
+        """
+
+        key: tuple[int, int] = self.session_key(view)
+        if self.sessions.get(key) is view:
+            del self.sessions[key]
+
+    async def evict(self, key: tuple[int, int]) -> None:
+        """
+        Evicts an Embed UI. Deletes its temporary pictures and messages. Errors of the cleanup are logged, the idle
+        check and the registration of the new Embed UI go on.
+
+        :param key: tuple[int, int] -> The key of the Embed UI.
+        :return:
+        """
+
+        view: typing.Optional[discord.ui.View] = self.sessions.pop(key, None)
+        if view is None:
+            return
+        self.evicted += 1
+        try:
+            await view.evict()
+        except Exception as error:
+            # E.g. a temporary picture still opened on Windows - The Temp Sweeper removes leftovers later.
+            self.errors += 1
+            print(f"Session Manager: eviction of session {key} failed: {error!r}")
+            view.stop()
+
+    async def evict_idle(self) -> None:
+        """
+        Evicts all Embed UIs without interaction since idle_timeout.
+
+        :return:
+        """
+
+        now: float = time.monotonic()
+        for key, view in list(self.sessions.items()):
+            if now - view.last_activity > self.idle_timeout:
+                await self.evict(key)
+
+    async def run(self) -> None:
+        """
+        Checks for idle Embed UIs every check_interval seconds.
+
+        :return:
+        """
+
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.evict_idle()
+
+    def start(self) -> None:
+        """
+        Starts the idle check, if it is not running yet.
+
+        :return:
+        """
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
+
+    def live_images(self) -> set:
+        """
+        Gets the temporary pictures of all open Embed UIs.
+
+        :return: set -> File names in ./daten/pictures.
+        """
+
+        return {image for view in self.sessions.values() for image in view.chached_images}
+
+    def memory(self) -> dict:
+        """
+        Approximates the memory of every open Embed UI (embeds, undo history, cached images and components).
+
+        :return: dict -> (user id, channel id) -> approximate bytes.
+        """
+
+        return {key: approximate_size([view.current_embed.to_dict(), view.default_embed.to_dict(),
+                                       view.default_close_embed.to_dict(), view.default_create_embed.to_dict(),
+                                       view.default_modify_embed.to_dict(), view.default_delete_embed.to_dict(),
+                                       view.chached_images, view.preview_attachments, view.current_db_embed_data])
+                + view.history.bytes + sum(sys.getsizeof(child) for child in view.children)
+                for key, view in self.sessions.items()}
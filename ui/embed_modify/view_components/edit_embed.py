@@ -259,6 +259,50 @@ class ButtonThumbnailEdit(discord.ui.Button):
         if self.view.ctx.author.id == interaction.user.id:
             await self.view.edit_thumbnail(interaction)
 
+# Undo / Redo
+
+
+class ButtonUndo(discord.ui.Button):
+    """
+    Button to restore the previous version of the embed.
+    """
+
+    def __init__(self):
+        super().__init__(style=discord.ButtonStyle.secondary, label="Undo", row=2)
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        """
+        Callback if the Button got pressed. This checks if the user is the same as in the original slash command
+        and then executes undo in the original view.
+
+        :param interaction: discord.Interaction -> The Interaction comming from the Button press.
+        :return:
+        """
+
+        if self.view.ctx.author.id == interaction.user.id:
+            await self.view.undo(interaction)
+
+
+class ButtonRedo(discord.ui.Button):
+    """
+    Button to restore the version of the embed before the last undo.
+    """
+
+    def __init__(self):
+        super().__init__(style=discord.ButtonStyle.secondary, label="Redo", row=2)
+
+    async def callback(self, interaction: discord.Interaction) -> None:
+        """
+        Callback if the Button got pressed. This checks if the user is the same as in the original slash command
+        and then executes redo in the original view.
+
+        :param interaction: discord.Interaction -> The Interaction comming from the Button press.
+        :return:
+        """
+
+        if self.view.ctx.author.id == interaction.user.id:
+            await self.view.redo(interaction)
+
 # Fields Edit
 
 
@@ -4,14 +4,13 @@ Beinhält alle Komponenten um ein Image vom User zu erfragen.
 
 import discord
 import typing
-import asyncio
 from asyncio import exceptions
-import requests
-import uuid
-import functools
-import shutil
-import imghdr
 import os
+import uuid
+from utils.image_download import DownloadStatus
+from utils.image_sniff import ImageInfo
+from utils.task_supervisor import TaskSupervisor
+from utils.tracing import spanned
 
 
 class StopButton(discord.ui.Button):
@@ -37,7 +36,20 @@ class GetImageView(discord.ui.View):
     View to get an Image.
     """
 
-    def __init__(self, bot: discord.Bot, user: typing.Union[discord.Member, discord.User]):
+    def __init__(self, bot: discord.Bot, user: typing.Union[discord.Member, discord.User], tasks: TaskSupervisor,
+                 slot: str = "image", on_activity: typing.Optional[typing.Callable[[], None]] = None):
+        """
+        Init for the Image View.
+
+        :param bot: discord.Bot -> The Bot.
+        :param user: Union[discord.Member, discord.User] -> The User who sends the Image.
+        :param tasks: TaskSupervisor -> The tasks of the Embed UI, the cleanup deletes run there.
+        :param slot: str -> Place of the Image in the embed ("image", "thumbnail", "author" or "footer"), the Image
+        gets downscaled to the size of the slot.
+        :param on_activity: Optional[Callable[[], None]] -> Gets called for every received upload, e.g. to mark the
+        session as active.
+        """
+
         super().__init__(timeout=900)
         stop_button: StopButton = StopButton()
         stop_button.callback = self.stop_press
@@ -48,8 +60,13 @@ class GetImageView(discord.ui.View):
         self.channel: typing.Optional[discord.channel.TextChannel] = None
         self.bot = bot
         self.user: typing.Union[discord.Member, discord.User] = user
+        self.tasks: TaskSupervisor = tasks
+        self.slot: str = slot
+        self.on_activity: typing.Optional[typing.Callable[[], None]] = on_activity
         self.image: typing.Optional[str] = None
+        self.image_info: typing.Optional[ImageInfo] = None # Type and dimensions of the new Image
 
+    @spanned("get_image")
     async def start(self, channel: discord.channel.TextChannel = None) -> None:
         """
         This should be executed right after the message got send. This waits for the Image from the User.
@@ -64,66 +81,70 @@ class GetImageView(discord.ui.View):
         self.channel = channel
         # Loop to catch wrong types and give the User another try
         while self.image is None:
-            # Try getting the Image, calls on_timeout if user is taking to long
+            # Try getting the Image, calls on_timeout if user is taking to long. The dispatcher only returns messages of
+            # the user in this channel with attachments.
             try:
-                message: discord.Message = await self.bot.wait_for("message", check=self.check_message, timeout=300.0)
+                async with self.bot.tracer.span("image_wait"):
+                    message: discord.Message = await self.bot.attachment_dispatcher.wait_for(self.channel.id,
+                                                                                             self.user.id,
+                                                                                             timeout=300.0)
             except exceptions.TimeoutError:
                 await self.on_timeout()
                 return
+            if self.on_activity is not None:
+                self.on_activity()
             # Always uses the first Attachment
             attachment: discord.Attachment = message.attachments[0]
-            # Downloading the Image
-            loop = asyncio.get_event_loop()
-            image_get = loop.run_in_executor(None, functools.partial(requests.get, attachment.url, stream=True))
-            image = await image_get
-            # Error if the Image could not be Downloaded
-            if image.status_code != 200:
-                await self.message.edit("Image could not be Downloaded, please check your file and try again.")
-                continue
             # Creating unique name to store the Picture
             picture_id: uuid.UUID = uuid.uuid4()
-            with open(f"./daten/pictures/{picture_id.int}", "wb") as save_file:
-                shutil.copyfileobj(image.raw, save_file)
-            # Checks the Image type
-            image_type: typing.Optional[str] = imghdr.what(f"./daten/pictures/{picture_id.int}")
-            if image_type is None:
-                # The File was not an Image - Delete and retry for User
-                await self.message.edit("File is not an Image, please check your file and try again.")
-                os.remove(f"./daten/pictures/{picture_id.int}")
+            # Downloading the Image - Streamed to disk with the shared session of the bot. The type gets checked on the
+            # first bytes, the file is written with the type ending (for windows).
+            async with self.bot.tracer.span("download"):
+                status, image_info = await self.bot.image_downloader.download_image(attachment.url,
+                                                                                    "./daten/pictures",
+                                                                                    str(picture_id.int))
+            # Error if the Image could not be Downloaded
+            if status == DownloadStatus.not_an_image:
+                await self.bot.rest_scheduler.edit(self.message, content="File is not an Image, please check your file "
+                                                                         "and try again.")
+                continue
+            if status == DownloadStatus.too_large:
+                await self.bot.rest_scheduler.edit(self.message,
+                                                   content="Image is too big, please check your file and try again.")
+                continue
+            if status != DownloadStatus.success:
+                await self.bot.rest_scheduler.edit(self.message, content="Image could not be Downloaded, please check "
+                                                                         "your file and try again.")
                 continue
-            # Image got succesfully checked, renaming to support windows Type endings
-            image_name: str = f"{picture_id.int}.{image_type}"
-            source = os.path.join("./daten/pictures", f"{picture_id.int}")
-            destination = os.path.join("./daten/pictures", image_name)
-            os.rename(source, destination)
             # Set correct Image Name
-            self.image = image_name
-        # Delete all Messages for the Picture getting - To keep the proccess clean in the Chat.
-        try:
-            await self.message.delete()
-        except discord.errors.NotFound:
-            pass
-        try:
-            await message.delete()
-        except discord.errors.NotFound:
-            pass
+            self.image = f"{picture_id.int}.{image_info.type}"
+            self.image_info = image_info
+            # Downscale, recompress and strip the metadata - The name changes with the type.
+            if self.bot.image_normalizer is not None:
+                async with self.bot.tracer.span("normalize"):
+                    normalized: typing.Optional[tuple[str, ImageInfo]] = \
+                        await self.bot.image_normalizer.normalize(f"./daten/pictures/{self.image}", self.slot)
+                if normalized is not None:
+                    self.image = os.path.basename(normalized[0])
+                    self.image_info = normalized[1]
+        # Delete all Messages for the Picture getting - To keep the proccess clean in the Chat. The deletes run in the
+        # background, the new Image is used directly.
+        self.tasks.create_task(self.delete_message(self.message))
+        self.tasks.create_task(self.delete_message(message))
         self.stop()
 
-    def check_message(self, message: discord.Message) -> bool:
+    async def delete_message(self, message: discord.Message) -> None:
         """
-        Checks if the Message has attachments and if the user is the same as the one used to start the Embed Edit.
+        Deletes a message, already deleted messages are ignored.
 
-        :param message: discord.Message -> The Message that should be checked.
-        :return: bool -> False if something was wrong
+        :param message: discord.Message -> The message to delete.
+        :return:
         """
 
-        if message.author.id != self.user.id:
-            return False
-        if message.channel.id != self.channel.id:
-            return False
-        if len(message.attachments) == 0:
-            return False
-        return True
+        try:
+            await self.bot.rest_scheduler.delete(message)
+        except discord.errors.NotFound:
+            pass
 
     async def stop_press(self, interaction: discord.Interaction) -> None:
         """
@@ -133,9 +154,10 @@ class GetImageView(discord.ui.View):
         :return:
         """
 
-        await self.message.delete()
-        self.stop()
+        # Answer first - The delete is queued behind other calls of the channel.
         await interaction.response.defer()
+        await self.bot.rest_scheduler.delete(self.message)
+        self.stop()
 
     async def delete_press(self, interaction: discord.Interaction) -> None:
         """
@@ -145,10 +167,11 @@ class GetImageView(discord.ui.View):
         :return:
         """
 
-        await self.message.delete()
+        # Answer first - The delete is queued behind other calls of the channel.
+        await interaction.response.defer()
+        await self.bot.rest_scheduler.delete(self.message)
         self.image = "delete"
         self.stop()
-        await interaction.response.defer()
 
     async def on_timeout(self) -> None:
         """
@@ -157,7 +180,7 @@ class GetImageView(discord.ui.View):
         :return:
         """
         try:
-            await self.message.delete()
+            await self.bot.rest_scheduler.delete(self.message)
         except discord.errors.NotFound:
             pass
         self.stop()
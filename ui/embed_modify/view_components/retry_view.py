@@ -53,7 +53,8 @@ class RetryEditView(discord.ui.View):
         :return:
         """
 
-        await self.message.delete()
+        # The delete runs in the background, the edit process has to answer the Interaction in time.
+        self.original_view.tasks.create_task(self.original_view.bot.rest_scheduler.delete(self.message))
         match self.retry_type:
             case ReplyType.normal_edit:
                 await self.original_view.edit_embed(interaction, self.old_data, self.wrong_data)
@@ -77,5 +78,5 @@ class RetryEditView(discord.ui.View):
         :return:
         """
 
-        await self.message.delete()
+        await self.original_view.bot.rest_scheduler.delete(self.message)
         self.stop()
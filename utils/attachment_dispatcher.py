@@ -0,0 +1,64 @@
+"""
+Contains the Attachment Dispatcher. One on_message listener for all Views waiting for an Image.
+"""
+
+import asyncio
+import typing
+
+import discord
+
+
+class AttachmentDispatcher:
+    """
+    Keeps all pending Image requests in a dict keyed by (channel id, user id). Every message is checked in O(1),
+    independent of the amount of pending requests.
+    """
+
+    def __init__(self):
+        self.pending: dict[tuple[int, int], asyncio.Future] = {}
+        # Counters
+        self.filtered: int = 0
+        self.matched: int = 0
+
+    async def on_message(self, message: discord.Message) -> None:
+        """
+        Listener for on_message. Resolves the waiting request of the author in this channel, if the message has
+        attachments.
+
+        :param message: discord.Message -> The new Message.
+        :return:
+        """
+
+        if len(message.attachments) == 0 or len(self.pending) == 0:
+            self.filtered += 1
+            return
+        future: typing.Optional[asyncio.Future] = self.pending.pop((message.channel.id, message.author.id), None)
+        if future is None or future.done():
+            self.filtered += 1
+            return
+        self.matched += 1
+        future.set_result(message)
+
+    async def wait_for(self, channel_id: int, user_id: int, timeout: float) -> discord.Message:
+        """
+        Waits for the next message with attachments of the user in the channel.
+        An older request of the same user in the same channel gets a TimeoutError.
+
+        :param channel_id: int -> The id of the channel.
+        :param user_id: int -> The id of the user.
+        :param timeout: float -> Seconds until TimeoutError is raised.
+        :return: discord.Message -> The message with at least one attachment.
+        """
+
+        key: tuple[int, int] = (channel_id, user_id)
+        old_future: typing.Optional[asyncio.Future] = self.pending.get(key)
+        if old_future is not None and not old_future.done():
+            old_future.set_exception(asyncio.TimeoutError())
+        future: asyncio.Future = asyncio.get_running_loop().create_future()
+        self.pending[key] = future
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            # Unregister on success, timeout and cancellation.
+            if self.pending.get(key) is future:
+                del self.pending[key]
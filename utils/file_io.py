@@ -0,0 +1,266 @@
+"""
+Contains the File IO. All file system work of the Embed UI runs on a small dedicated Thread pool, so a slow disk never
+blocks the event loop.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import io
+import os
+import shutil
+import typing
+
+import discord
+
+from utils.picture_cache import PictureCache
+
+# Directories of the pictures of an embed, searched in this order: temporary pictures first, then saved pictures.
+PICTURE_DIRECTORIES: tuple = ("./daten/pictures", "./daten/saved_pictures")
+
+
+class FileIO:
+    """
+    Bounded worker pool for existence checks, opens, writes, moves and deletes. Work that belongs together (e.g. all
+    pictures of an embed) is done in one worker call. Opened pictures are kept in the Picture Cache, removes and moves
+    through this pool invalidate them.
+    """
+
+    def __init__(self, max_workers: int = 4, cache: typing.Optional[PictureCache] = None):
+        """
+        Init for the File IO.
+
+        :param max_workers: int -> Maximum amount of Threads, more calls wait in the queue of the pool.
+        :param cache: Optional[PictureCache] -> Cache for the bytes of opened pictures, None to always read from disk.
+        """
+
+        self.executor: concurrent.futures.ThreadPoolExecutor = \
+            concurrent.futures.ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="file_io")
+        self.cache: typing.Optional[PictureCache] = cache
+        # Counters
+        self.calls: int = 0
+
+    # Worker Threads
+
+    @staticmethod
+    def _find(name: str, directories: typing.Sequence[str]) -> typing.Optional[str]:
+        """
+        Searches a file in the directories.
+
+        :param name: str -> The file name.
+        :param directories: Sequence[str] -> The directories in search order.
+        :return: Optional[str] -> The path of the first match, None if no directory has the file.
+        """
+
+        for directory in directories:
+            path: str = os.path.join(directory, name)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def _open_files(self, names: list, directories: typing.Sequence[str], skip: typing.Container[str],
+                    max_read: int) -> typing.Optional[dict]:
+        """
+        Searches and opens the files. Files up to max_read bytes are read completely, so they can be cached. If one
+        file is missing, the already opened files get closed.
+
+        :param names: list -> The file names, without duplicates.
+        :param directories: Sequence[str] -> The directories in search order.
+        :param skip: Container[str] -> File names which only need to exist and are not opened.
+        :param max_read: int -> Maximum size of a file which gets read, -1 to read none.
+        :return: Optional[dict] -> name -> (discord.File, bytes if read) or (None, None) for skipped names, None if a
+        file is missing.
+        """
+
+        files: dict[str, tuple] = {}
+        try:
+            for name in names:
+                path: typing.Optional[str] = self._find(name, directories)
+                if path is None:
+                    raise FileNotFoundError(name)
+                if name in skip:
+                    files[name] = (None, None)
+                    continue
+                fp: typing.BinaryIO = open(path, "rb")
+                if os.fstat(fp.fileno()).st_size > max_read:
+                    files[name] = (discord.File(fp, filename=name), None)
+                    continue
+                with fp:
+                    data: bytes = fp.read()
+                files[name] = (discord.File(io.BytesIO(data), filename=name), data)
+        except OSError:
+            for file, _ in files.values():
+                if file is not None:
+                    file.close()
+            return None
+        return files
+
+    @staticmethod
+    def _remove_many(paths: typing.Iterable[str]) -> int:
+        """
+        Removes the files, missing files are ignored.
+
+        :param paths: Iterable[str] -> The paths.
+        :return: int -> Amount of removed files.
+        """
+
+        removed: int = 0
+        for path in paths:
+            try:
+                os.remove(path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    # Methods
+
+    async def run(self, function: typing.Callable, *args: typing.Any) -> typing.Any:
+        """
+        Runs a function on the pool.
+
+        :param function: Callable -> The function to run.
+        :param args: Any -> The Arguments for the function.
+        :return: Any -> The result of the function.
+        """
+
+        self.calls += 1
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(function, *args))
+
+    async def open_files(self, names: typing.Iterable[str], directories: typing.Sequence[str] = PICTURE_DIRECTORIES,
+                         skip: typing.Container[str] = ()) -> typing.Optional[dict]:
+        """
+        Searches and opens all files in one worker call. Cached pictures are served from memory (io.BytesIO shares
+        the cached bytes), so they do not need the pool. The discord.File objects are ready to send.
+
+        :param names: Iterable[str] -> The file names, duplicates are opened once.
+        :param directories: Sequence[str] -> The directories in search order. Default temp and saved pictures.
+        :param skip: Container[str] -> File names which only need to exist, e.g. already uploaded attachments.
+        :return: Optional[dict] -> name -> discord.File (None for skipped names), None if a file is missing.
+        """
+
+        names = list(dict.fromkeys(names))
+        files: dict[str, typing.Optional[discord.File]] = {}
+        missing: list[str] = []
+        for name in names:
+            data: typing.Optional[bytes] = None
+            if self.cache is not None and name not in skip:
+                data = self.cache.get(name)
+            if data is None:
+                missing.append(name)
+            else:
+                files[name] = discord.File(io.BytesIO(data), filename=name)
+        if len(missing) > 0:
+            generation: int = self.cache.generation if self.cache is not None else 0
+            max_read: int = self.cache.max_item_bytes if self.cache is not None else -1
+            loaded: typing.Optional[dict] = await self.run(self._open_files, missing, directories, skip, max_read)
+            if loaded is None:
+                for file in files.values():
+                    file.close()
+                return None
+            for name, (file, data) in loaded.items():
+                if data is not None:
+                    self.cache.put(name, data, generation)
+                files[name] = file
+        return {name: files[name] for name in names}
+
+    def invalidate(self, names: typing.Iterable[str]) -> None:
+        """
+        Removes pictures from the cache. Needed for every remove or move which does not go through this pool.
+
+        :param names: Iterable[str] -> The file names (or paths).
+        :return:
+        """
+
+        if self.cache is not None:
+            self.cache.invalidate([os.path.basename(name) for name in names])
+
+    async def exists(self, path: str) -> bool:
+        """
+        Checks if the file exists.
+
+        :param path: str -> The path.
+        :return: bool -> True if it is a file.
+        """
+
+        return await self.run(os.path.isfile, path)
+
+    async def remove(self, path: str) -> bool:
+        """
+        Removes a file.
+
+        :param path: str -> The path.
+        :return: bool -> False if the file did not exist.
+        """
+
+        return await self.remove_many([path]) == 1
+
+    async def remove_many(self, paths: typing.Iterable[str]) -> int:
+        """
+        Removes the files in one worker call.
+
+        :param paths: Iterable[str] -> The paths.
+        :return: int -> Amount of removed files.
+        """
+
+        paths = list(paths)
+        try:
+            return await self.run(self._remove_many, paths)
+        finally:
+            self.invalidate(paths)
+
+    async def move(self, source: str, destination: str) -> str:
+        """
+        Moves a file.
+
+        :param source: str -> The current path.
+        :param destination: str -> The new path.
+        :return: str -> The new path.
+        """
+
+        try:
+            return await self.run(shutil.move, source, destination)
+        finally:
+            self.invalidate([source])
+
+    async def open(self, path: str, mode: str = "rb") -> typing.BinaryIO:
+        """
+        Opens a file. Reads and writes of the file should go through read and write.
+
+        :param path: str -> The path.
+        :param mode: str -> Binary mode of open. Default "rb".
+        :return: BinaryIO -> The opened file.
+        """
+
+        return await self.run(open, path, mode)
+
+    async def write(self, file: typing.BinaryIO, data: bytes) -> int:
+        """
+        Writes to a file opened with open.
+
+        :param file: BinaryIO -> The file.
+        :param data: bytes -> The data.
+        :return: int -> Amount of written bytes.
+        """
+
+        return await self.run(file.write, data)
+
+    async def close(self, file: typing.BinaryIO) -> None:
+        """
+        Closes a file opened with open.
+
+        :param file: BinaryIO -> The file.
+        :return:
+        """
+
+        await self.run(file.close)
+
+    def shutdown(self) -> None:
+        """
+        Shuts the pool down after the queued calls.
+
+        :return:
+        """
+
+        self.executor.shutdown(wait=True)
@@ -0,0 +1,156 @@
+"""
+Contains the Image Downloader. Downloads attachments with one shared aiohttp session directly on the event loop, the
+file is written on the File IO pool. The type of the Image gets detected from the first bytes, before anything is
+written to disk.
+"""
+
+import asyncio
+import enum
+import os
+import typing
+
+import aiohttp
+
+from utils.file_io import FileIO
+from utils.image_sniff import HEADER_SIZE, ImageInfo, sniff_image
+
+
+class DownloadStatus(enum.Enum):
+    """
+    Enum for the result of a download.
+    """
+
+    success = 0
+    failed = 1
+    too_large = 2
+    not_an_image = 3
+
+
+class ImageDownloader:
+    """
+    Streams downloads to disk. All downloads share one connection pool and are limited by a global semaphore.
+    """
+
+    def __init__(self, max_bytes: int = 25 * 1024 * 1024, timeout: float = 60.0, max_concurrent: int = 4,
+                 chunk_size: int = 64 * 1024, write_size: int = 256 * 1024, file_io: typing.Optional[FileIO] = None):
+        """
+        Init for the Image Downloader. The session gets created on the first download.
+
+        :param max_bytes: int -> Maximum size of a download, bigger downloads get aborted.
+        :param timeout: float -> Maximum time for one download in seconds.
+        :param max_concurrent: int -> Maximum amount of downloads at the same time.
+        :param chunk_size: int -> Size of the chunks read from the response.
+        :param write_size: int -> Chunks are collected up to this size and then written in one worker call.
+        :param file_io: Optional[FileIO] -> Pool for the file writes. Default an own pool.
+        """
+
+        self.max_bytes: int = max_bytes
+        self.timeout: aiohttp.ClientTimeout = aiohttp.ClientTimeout(total=timeout)
+        self.max_concurrent: int = max_concurrent
+        self.chunk_size: int = chunk_size
+        self.write_size: int = write_size
+        self.file_io: FileIO = file_io or FileIO()
+        self.semaphore: asyncio.Semaphore = asyncio.Semaphore(max_concurrent)
+        self.session: typing.Optional[aiohttp.ClientSession] = None
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """
+        Gets the shared session, creates it if it does not exist.
+
+        :return: aiohttp.ClientSession -> The shared session.
+        """
+
+        if self.session is None or self.session.closed:
+            connector: aiohttp.TCPConnector = aiohttp.TCPConnector(limit=self.max_concurrent)
+            self.session = aiohttp.ClientSession(connector=connector, timeout=self.timeout)
+        return self.session
+
+    async def remove_partial(self, path: typing.Optional[str]) -> None:
+        """
+        Removes the file of a failed or cancelled download. Errors are ignored, the Temp Sweeper removes leftovers.
+
+        :param path: Optional[str] -> The path of the file, None if no file was written yet.
+        :return:
+        """
+
+        if path is None:
+            return
+        try:
+            await self.file_io.remove(path)
+        except OSError:
+            pass
+
+    async def download_image(self, url: str, directory: str, name: str) \
+            -> tuple[DownloadStatus, typing.Optional[ImageInfo]]:
+        """
+        Downloads an Image into the directory. The file is written once as <name>.<type>, downloads which are not an
+        Image are aborted after the first chunk without touching the disk. The file gets removed if the download
+        fails or gets cancelled (e.g. STOP pressed or the session evicted).
+
+        :param url: str -> The url of the file.
+        :param directory: str -> The directory the file gets written to.
+        :param name: str -> The file name without type ending.
+        :return: tuple[DownloadStatus, Optional[ImageInfo]] -> The Info is set if the download was successful.
+        """
+
+        session: aiohttp.ClientSession = await self.get_session()
+        path: typing.Optional[str] = None
+        async with self.semaphore:
+            try:
+                async with session.get(url) as response:
+                    if response.status != 200:
+                        return DownloadStatus.failed, None
+                    if response.content_length is not None and response.content_length > self.max_bytes:
+                        return DownloadStatus.too_large, None
+                    # Collect the first bytes to detect the type
+                    head: bytes = b""
+                    chunks = response.content.iter_chunked(self.chunk_size)
+                    async for chunk in chunks:
+                        head += chunk
+                        if len(head) >= HEADER_SIZE:
+                            break
+                    info: typing.Optional[ImageInfo] = sniff_image(head)
+                    if info is None:
+                        return DownloadStatus.not_an_image, None
+                    size: int = len(head)
+                    path = os.path.join(directory, f"{name}.{info.type}")
+                    save_file: typing.BinaryIO = await self.file_io.open(path, "wb")
+                    try:
+                        buffer: list[bytes] = [head]
+                        buffered: int = len(head)
+                        async for chunk in chunks:
+                            size += len(chunk)
+                            if size > self.max_bytes:
+                                break
+                            buffer.append(chunk)
+                            buffered += len(chunk)
+                            if buffered >= self.write_size:
+                                await self.file_io.write(save_file, b"".join(buffer))
+                                buffer, buffered = [], 0
+                        if size <= self.max_bytes and buffered > 0:
+                            await self.file_io.write(save_file, b"".join(buffer))
+                    finally:
+                        await self.file_io.close(save_file)
+                    if size > self.max_bytes:
+                        await self.remove_partial(path)
+                        return DownloadStatus.too_large, None
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError):
+                # OSError - Writing or closing the file failed (e.g. disk full).
+                await self.remove_partial(path)
+                return DownloadStatus.failed, None
+            except BaseException:
+                # Cancelled - The partial file is removed before the cancellation goes on.
+                await self.remove_partial(path)
+                raise
+        return DownloadStatus.success, info
+
+    async def close(self) -> None:
+        """
+        Closes the shared session.
+
+        :return:
+        """
+
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
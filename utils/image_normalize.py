@@ -0,0 +1,233 @@
+"""
+Contains the Image Normalizer. Downscales uploaded Images to the size of their place in the embed, recompresses them
+(WebP or JPEG) and strips the metadata in a process pool. Needs Pillow, without it the Images stay unchanged.
+"""
+
+import asyncio
+import concurrent.futures
+import hashlib
+import multiprocessing
+import os
+import shutil
+import typing
+
+from utils.image_sniff import ImageInfo
+
+# Optional - Pillow is only needed for the normalization.
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+    ImageOps = None
+
+# Maximum width and height per slot of the embed. Discord shows icons and thumbnails small, only the image is large.
+SLOT_LIMITS: dict[str, tuple[int, int]] = {"image": (1920, 1920), "thumbnail": (320, 320), "author": (128, 128),
+                                           "footer": (128, 128)}
+
+
+def cache_path(cache_directory: str, key: str) -> typing.Optional[str]:
+    """
+    Searches a result in the cache directory. Runs in the worker process.
+
+    :param cache_directory: str -> The cache directory.
+    :param key: str -> The key of the result.
+    :return: Optional[str] -> Path of the cached result, None if the input was not processed yet.
+    """
+
+    for ending in ("webp", "jpeg", "keep"):
+        path: str = os.path.join(cache_directory, f"{key}.{ending}")
+        if os.path.isfile(path):
+            # Touch the result, the sweeper of the cache directory removes results unused for the longest time.
+            os.utime(path)
+            return path
+    return None
+
+
+def encode(source: str, destination: str, max_size: tuple[int, int], image_format: str,
+           quality: int) -> typing.Optional[str]:
+    """
+    Downscales, recompresses and strips the metadata of an Image. Runs in the worker process.
+
+    :param source: str -> Path of the Image.
+    :param destination: str -> Path of the result without type ending.
+    :param max_size: tuple[int, int] -> Maximum width and height.
+    :param image_format: str -> "webp" or "jpeg". Images with transparency always become WebP.
+    :param quality: int -> Quality of the compression (1 - 100).
+    :return: Optional[str] -> Path of the result, None if the Image should stay unchanged (animated or not smaller).
+    """
+
+    with Image.open(source) as image:
+        # Animations would lose all frames except the first.
+        if getattr(image, "is_animated", False):
+            return None
+        # Rotate as the camera intended, the orientation is part of the stripped metadata.
+        image = ImageOps.exif_transpose(image)
+        image.thumbnail(max_size, Image.LANCZOS)
+        transparent: bool = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        if transparent or image_format == "webp":
+            image_format = "webp"
+            image = image.convert("RGBA" if transparent else "RGB")
+        else:
+            image = image.convert("RGB")
+        path: str = f"{destination}.{image_format}"
+        # Written under a temporary name of this process - The cache never contains half written results, even if
+        # two workers encode the same Image.
+        temporary: str = f"{destination}.{os.getpid()}.tmp"
+        try:
+            # Saving without exif, icc_profile and comments strips the metadata.
+            image.save(temporary, "WEBP" if image_format == "webp" else "JPEG", quality=quality, optimize=True)
+            if os.path.getsize(temporary) >= os.path.getsize(source):
+                os.remove(temporary)
+                return None
+            os.replace(temporary, path)
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+    return path
+
+
+def normalize_file(source: str, cache_directory: str, slot: str, max_size: tuple[int, int], image_format: str,
+                   quality: int) -> typing.Optional[tuple[str, str, int, int, bool]]:
+    """
+    Normalizes an Image in place: the file gets replaced by the result with its type ending. The result is cached by
+    the hash of the source and the settings. Runs in the worker process.
+
+    :param source: str -> Path of the Image.
+    :param cache_directory: str -> Directory of the cached results.
+    :param slot: str -> The slot of the Image, part of the cache key.
+    :param max_size: tuple[int, int] -> Maximum width and height.
+    :param image_format: str -> "webp" or "jpeg".
+    :param quality: int -> Quality of the compression (1 - 100).
+    :return: Optional[tuple[str, str, int, int, bool]] -> (new path, type, width, height, cache hit), None if the
+    Image stays unchanged.
+    """
+
+    sha256 = hashlib.sha256()
+    with open(source, "rb") as file:
+        for chunk in iter(lambda: file.read(64 * 1024), b""):
+            sha256.update(chunk)
+    sha256.update(f"|{slot}|{max_size[0]}x{max_size[1]}|{image_format}|{quality}".encode())
+    key: str = sha256.hexdigest()
+    cached: typing.Optional[str] = cache_path(cache_directory, key)
+    cache_hit: bool = cached is not None
+    if cached is None:
+        try:
+            cached = encode(source, os.path.join(cache_directory, key), max_size, image_format, quality)
+        except (OSError, ValueError, SyntaxError, Image.DecompressionBombError):
+            # Not cached - The error can be temporary (e.g. a full disk), the next upload tries again.
+            return None
+        if cached is None:
+            # Empty marker - The input is animated or the result is not smaller, it stays unchanged.
+            cached = os.path.join(cache_directory, f"{key}.keep")
+            open(cached, "wb").close()
+    if cached.endswith(".keep"):
+        return None
+    image_type: str = os.path.splitext(cached)[1][1:]
+    destination: str = f"{os.path.splitext(source)[0]}.{image_type}"
+    # Link the cached result instead of copying it, results are never changed in place.
+    temporary: str = f"{destination}.tmp"
+    try:
+        os.link(cached, temporary)
+    except OSError:
+        shutil.copyfile(cached, temporary)
+    os.replace(temporary, destination)
+    if destination != source:
+        os.remove(source)
+    with Image.open(destination) as image:
+        width, height = image.size
+    return destination, image_type, width, height, cache_hit
+
+
+class ImageNormalizer:
+    """
+    Runs the normalization of downloaded Images in a process pool, so neither the event loop nor the other Threads
+    wait for the encoding. The pool starts with the first Image. The workers are spawned on every platform, a fork
+    after the Threads of the Bot exist could copy held locks into the workers.
+    """
+
+    def __init__(self, cache_directory: str = "./daten/normalized", max_workers: int = 2, image_format: str = "webp",
+                 quality: int = 85, slot_limits: typing.Optional[dict] = None):
+        """
+        Init for the Image Normalizer.
+
+        :param cache_directory: str -> Directory of the cached results.
+        :param max_workers: int -> Amount of worker processes.
+        :param image_format: str -> "webp" or "jpeg". Images with transparency always become WebP.
+        :param quality: int -> Quality of the compression (1 - 100).
+        :param slot_limits: Optional[dict] -> slot -> (max width, max height). Default SLOT_LIMITS.
+        """
+
+        self.cache_directory: str = cache_directory
+        self.max_workers: int = max_workers
+        self.image_format: str = image_format
+        self.quality: int = quality
+        self.slot_limits: dict[str, tuple[int, int]] = slot_limits or SLOT_LIMITS
+        self.executor: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+        # Created directly - The sweeper of the cache directory runs before the first Image.
+        if self.enabled:
+            os.makedirs(self.cache_directory, exist_ok=True)
+        # Counters
+        self.normalized: int = 0
+        self.unchanged: int = 0
+        self.cache_hits: int = 0
+        self.failed: int = 0
+
+    @property
+    def enabled(self) -> bool:
+        """
+        If Pillow is installed.
+
+        :return: bool -> True if Images can be normalized.
+        """
+
+        return Image is not None
+
+    async def normalize(self, path: str, slot: str) -> typing.Optional[tuple[str, ImageInfo]]:
+        """
+        Normalizes a downloaded Image for its slot. The file gets replaced, the type ending can change.
+
+        :param path: str -> Path of the Image.
+        :param slot: str -> "image", "thumbnail", "author" or "footer".
+        :return: Optional[tuple[str, ImageInfo]] -> (new path, Info of the result), None if the Image stays unchanged.
+        """
+
+        if not self.enabled or slot not in self.slot_limits:
+            return None
+        if self.executor is None:
+            self.executor = concurrent.futures.ProcessPoolExecutor(max_workers=self.max_workers,
+                                                                   mp_context=multiprocessing.get_context("spawn"))
+        loop = asyncio.get_running_loop()
+        try:
+            result: typing.Optional[tuple] = await loop.run_in_executor(self.executor, normalize_file, path,
+                                                                        self.cache_directory, slot,
+                                                                        self.slot_limits[slot], self.image_format,
+                                                                        self.quality)
+        except concurrent.futures.process.BrokenProcessPool:
+            # A worker process died (e.g. out of memory) - The next Image starts a new pool.
+            self.executor = None
+            self.failed += 1
+            return None
+        except OSError:
+            # The original Image can still be used.
+            self.failed += 1
+            return None
+        if result is None:
+            self.unchanged += 1
+            return None
+        new_path, image_type, width, height, cache_hit = result
+        self.normalized += 1
+        if cache_hit:
+            self.cache_hits += 1
+        return new_path, ImageInfo(image_type, width, height)
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker processes.
+
+        :return:
+        """
+
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,123 @@
+"""
+Contains the Image Sniffer. Detects PNG, JPEG, GIF and WebP from the first bytes of a file and reads the dimensions
+from the header. Replaces imghdr, which is removed in Python 3.13.
+"""
+
+import struct
+import typing
+
+
+class ImageInfo:
+    """
+    Type and dimensions of an Image. Width and height are None if they are not inside the sniffed bytes.
+    """
+
+    __slots__ = ("type", "width", "height")
+
+    def __init__(self, image_type: str, width: typing.Optional[int], height: typing.Optional[int]):
+        self.type: str = image_type
+        self.width: typing.Optional[int] = width
+        self.height: typing.Optional[int] = height
+
+    def __repr__(self) -> str:
+        return f"ImageInfo(type={self.type!r}, width={self.width}, height={self.height})"
+
+
+# Minimum amount of bytes to detect the type (and dimensions for all types except JPEG).
+HEADER_SIZE: int = 32
+
+# JPEG Start of Frame markers, these contain the dimensions. C4, C8 and CC are other markers.
+JPEG_SOF_MARKERS: frozenset = frozenset(range(0xC0, 0xD0)) - {0xC4, 0xC8, 0xCC}
+
+
+def sniff_png(head: bytes) -> ImageInfo:
+    """
+    Reads the dimensions of a PNG from the IHDR chunk.
+
+    :param head: bytes -> The first bytes of the file.
+    :return: ImageInfo -> The Info of the Image.
+    """
+
+    if len(head) < 24 or head[12:16] != b"IHDR":
+        return ImageInfo("png", None, None)
+    width, height = struct.unpack(">II", head[16:24])
+    return ImageInfo("png", width, height)
+
+
+def sniff_gif(head: bytes) -> ImageInfo:
+    """
+    Reads the dimensions of a GIF from the logical screen descriptor.
+
+    :param head: bytes -> The first bytes of the file.
+    :return: ImageInfo -> The Info of the Image.
+    """
+
+    if len(head) < 10:
+        return ImageInfo("gif", None, None)
+    width, height = struct.unpack("<HH", head[6:10])
+    return ImageInfo("gif", width, height)
+
+
+def sniff_webp(head: bytes) -> ImageInfo:
+    """
+    Reads the dimensions of a WebP from the first chunk (VP8, VP8L or VP8X).
+
+    :param head: bytes -> The first bytes of the file.
+    :return: ImageInfo -> The Info of the Image.
+    """
+
+    chunk: bytes = head[12:16]
+    if chunk == b"VP8 " and len(head) >= 30:
+        width, height = struct.unpack("<HH", head[26:30])
+        return ImageInfo("webp", width & 0x3FFF, height & 0x3FFF)
+    if chunk == b"VP8L" and len(head) >= 25:
+        bits: int = int.from_bytes(head[21:25], "little")
+        return ImageInfo("webp", (bits & 0x3FFF) + 1, ((bits >> 14) & 0x3FFF) + 1)
+    if chunk == b"VP8X" and len(head) >= 30:
+        return ImageInfo("webp", int.from_bytes(head[24:27], "little") + 1,
+                         int.from_bytes(head[27:30], "little") + 1)
+    return ImageInfo("webp", None, None)
+
+
+def sniff_jpeg(head: bytes) -> ImageInfo:
+    """
+    Reads the dimensions of a JPEG from the first Start of Frame segment.
+
+    :param head: bytes -> The first bytes of the file.
+    :return: ImageInfo -> The Info of the Image. No dimensions if the segment is not inside head.
+    """
+
+    position: int = 2
+    while position + 9 <= len(head):
+        if head[position] != 0xFF:
+            break
+        marker: int = head[position + 1]
+        # Fill bytes
+        if marker == 0xFF:
+            position += 1
+            continue
+        if marker in JPEG_SOF_MARKERS:
+            height, width = struct.unpack(">HH", head[position + 5:position + 9])
+            return ImageInfo("jpeg", width, height)
+        # Skip the segment - length includes the two length bytes.
+        position += 2 + struct.unpack(">H", head[position + 2:position + 4])[0]
+    return ImageInfo("jpeg", None, None)
+
+
+def sniff_image(head: bytes) -> typing.Optional[ImageInfo]:
+    """
+    Detects the type of an Image from the first bytes.
+
+    :param head: bytes -> The first bytes of the file, at least HEADER_SIZE.
+    :return: Optional[ImageInfo] -> None if the bytes are not a supported Image.
+    """
+
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return sniff_png(head)
+    if head.startswith(b"\xff\xd8\xff"):
+        return sniff_jpeg(head)
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return sniff_gif(head)
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return sniff_webp(head)
+    return None
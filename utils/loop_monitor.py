@@ -0,0 +1,139 @@
+"""
+Contains the Loop Monitor. Measures the lag of the event loop and captures the stack of blocking calls.
+"""
+
+import asyncio
+import collections
+import sys
+import threading
+import time
+import traceback
+import typing
+
+from utils.tracing import Histogram
+
+
+class LoopMonitor:
+    """
+    A task on the event loop sleeps interval seconds in a loop, the overshoot of every sleep is the lag of the loop.
+    A watchdog Thread checks the heartbeat of that task. If it is overdue by threshold seconds, the loop is blocked and
+    the Thread captures the stack of the event loop Thread and the running task, so the blocking call is known.
+    """
+
+    def __init__(self, interval: float = 0.25, threshold: float = 0.5, keep_stalls: int = 50, max_frames: int = 15):
+        """
+        Init for the Loop Monitor.
+
+        :param interval: float -> Seconds between two lag measurements.
+        :param threshold: float -> Lag in seconds from which on a stall gets recorded with its stack.
+        :param keep_stalls: int -> Amount of stalls kept for the report.
+        :param max_frames: int -> Amount of innermost stack frames captured per stall.
+        """
+
+        self.interval: float = interval
+        self.threshold: float = threshold
+        self.max_frames: int = max_frames
+        self.lag: Histogram = Histogram()
+        self.stalls: collections.deque[dict] = collections.deque(maxlen=keep_stalls)
+        self.stall_count: int = 0
+        self.task: typing.Optional[asyncio.Task] = None
+        self.watchdog: typing.Optional[threading.Thread] = None
+        self.stopped: threading.Event = threading.Event()
+        self.loop: typing.Optional[asyncio.AbstractEventLoop] = None
+        self.loop_thread: typing.Optional[int] = None
+        # Start of the current sleep, written on the loop, read by the watchdog.
+        self.beat: float = time.monotonic()
+        # (beat, running task, stack) captured by the watchdog during the current stall
+        self.capture: typing.Optional[tuple[float, str, list]] = None
+
+    def _capture_stack(self, beat: float) -> None:
+        """
+        Captures the stack of the blocked event loop Thread. Runs in the watchdog Thread.
+
+        :param beat: float -> The overdue heartbeat.
+        :return:
+        """
+
+        frame = sys._current_frames().get(self.loop_thread)
+        if frame is None:
+            return
+        stack: list = traceback.format_stack(frame)[-self.max_frames:]
+        task: typing.Optional[asyncio.Task] = asyncio.current_task(self.loop)
+        task_name: str = "-" if task is None else f"{task.get_name()} ({task.get_coro().__qualname__})"
+        self.capture = (beat, task_name, stack)
+
+    def _watch(self) -> None:
+        """
+        Watchdog Thread, checks the heartbeat every half interval.
+
+        :return:
+        """
+
+        while not self.stopped.wait(self.interval / 2):
+            beat: float = self.beat
+            overdue: float = time.monotonic() - beat - self.interval
+            # Only one capture per stall, the stack at the start is still inside the blocking call.
+            if overdue >= self.threshold and (self.capture is None or self.capture[0] != beat):
+                self._capture_stack(beat)
+
+    async def run(self) -> None:
+        """
+        Measures the lag of the loop until the monitor gets stopped.
+
+        :return:
+        """
+
+        while True:
+            start: float = time.monotonic()
+            self.beat = start
+            await asyncio.sleep(self.interval)
+            lag: float = max(0.0, time.monotonic() - start - self.interval)
+            self.lag.observe(lag)
+            if lag < self.threshold:
+                continue
+            capture: typing.Optional[tuple[float, str, list]] = self.capture
+            if capture is None or capture[0] != start:
+                # The stall ended before the watchdog could check.
+                capture = (start, "-", [])
+            self.stall_count += 1
+            self.stalls.append({"seconds": lag, "time": time.time(), "task": capture[1], "stack": capture[2]})
+            print(f"Loop Monitor: event loop blocked for {lag:.2f}s in task {capture[1]}\n{''.join(capture[2])}",
+                  end="")
+
+    def start(self) -> None:
+        """
+        Starts the lag measurement and the watchdog Thread, if they are not running yet. Call this on the event loop.
+
+        :return:
+        """
+
+        if self.task is None or self.task.done():
+            self.loop = asyncio.get_running_loop()
+            self.loop_thread = threading.get_ident()
+            self.task = self.loop.create_task(self.run())
+        if self.watchdog is None or not self.watchdog.is_alive():
+            self.stopped.clear()
+            self.watchdog = threading.Thread(target=self._watch, name="loop_monitor", daemon=True)
+            self.watchdog.start()
+
+    def stop(self) -> None:
+        """
+        Stops the lag measurement and the watchdog Thread.
+
+        :return:
+        """
+
+        self.stopped.set()
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    def report(self) -> dict:
+        """
+        Gets the report of the monitor.
+
+        :return: dict -> lag (histogram summary in seconds), stall_count and the kept stalls (seconds, time, task,
+        stack).
+        """
+
+        return {"lag": self.lag.summary(), "stall_count": self.stall_count, "stalls": list(self.stalls)}
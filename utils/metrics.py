@@ -0,0 +1,321 @@
+"""
+Contains the Metrics Server. Serves the counters of the Embed UI, the caches, the REST Scheduler and the storage as
+Prometheus text on localhost.
+"""
+
+import asyncio
+import math
+import os
+import time
+import typing
+
+import discord
+from aiohttp import web
+
+from utils.tracing import BUCKETS
+
+
+def escape_label(value: typing.Any) -> str:
+    """
+    Escapes a label value for the Prometheus text format.
+
+    :param value: Any -> The label value.
+    :return: str -> The escaped value.
+    """
+
+    return str(value).replace("\\", "\\\\").replace("\"", "\\\"").replace("\n", "\\n")
+
+
+def format_labels(labels: typing.Optional[dict]) -> str:
+    """
+    Formats the labels of a sample.
+
+    :param labels: Optional[dict] -> label name -> value.
+    :return: str -> e.g. {route="Message.edit"}, empty without labels.
+    """
+
+    if not labels:
+        return ""
+    return "{" + ",".join(f"{name}=\"{escape_label(value)}\"" for name, value in labels.items()) + "}"
+
+
+class MetricsWriter:
+    """
+    Collects metrics in the Prometheus text format (version 0.0.4).
+    """
+
+    def __init__(self, prefix: str = "embed_creator"):
+        """
+        Init for the Metrics Writer.
+
+        :param prefix: str -> Prefix of all metric names.
+        """
+
+        self.prefix: str = prefix
+        self.lines: list[str] = []
+
+    def metric(self, name: str, kind: str, description: str, samples: typing.Iterable[tuple]) -> None:
+        """
+        Adds a metric with its samples.
+
+        :param name: str -> Name without prefix.
+        :param kind: str -> "gauge" or "counter".
+        :param description: str -> The help text.
+        :param samples: Iterable[tuple] -> (labels or None, value) per sample.
+        :return:
+        """
+
+        name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {name} {description}")
+        self.lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            self.lines.append(f"{name}{format_labels(labels)} {float(value)!r}")
+
+    def single(self, name: str, kind: str, description: str, value: float) -> None:
+        """
+        Adds a metric with one sample without labels.
+
+        :param name: str -> Name without prefix.
+        :param kind: str -> "gauge" or "counter".
+        :param description: str -> The help text.
+        :param value: float -> The value.
+        :return:
+        """
+
+        self.metric(name, kind, description, [(None, value)])
+
+    def histogram(self, name: str, description: str, histograms: typing.Iterable[tuple]) -> None:
+        """
+        Adds histograms of the Tracer buckets.
+
+        :param name: str -> Name without prefix, should end with _seconds.
+        :param description: str -> The help text.
+        :param histograms: Iterable[tuple] -> (labels or None, Histogram) per histogram.
+        :return:
+        """
+
+        name = f"{self.prefix}_{name}"
+        self.lines.append(f"# HELP {name} {description}")
+        self.lines.append(f"# TYPE {name} histogram")
+        for labels, histogram in histograms:
+            labels = labels or {}
+            cumulative: int = 0
+            for bound, count in zip(BUCKETS, histogram.counts):
+                cumulative += count
+                self.lines.append(f"{name}_bucket{format_labels({**labels, 'le': bound})} {cumulative}")
+            self.lines.append(f"{name}_bucket{format_labels({**labels, 'le': '+Inf'})} {histogram.count}")
+            self.lines.append(f"{name}_sum{format_labels(labels)} {histogram.total!r}")
+            self.lines.append(f"{name}_count{format_labels(labels)} {histogram.count}")
+
+    def text(self) -> str:
+        """
+        Gets the collected metrics.
+
+        :return: str -> The Prometheus text.
+        """
+
+        return "\n".join(self.lines) + "\n"
+
+
+def scan_directory(directory: str) -> tuple[int, int]:
+    """
+    Counts the files of a directory and their size. Placeholder files (.txt) are ignored. Runs in the executor.
+
+    :param directory: str -> The directory.
+    :return: tuple[int, int] -> (amount of files, bytes)
+    """
+
+    files: int = 0
+    size: int = 0
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name.endswith(".txt"):
+                    continue
+                try:
+                    if entry.is_file(follow_symlinks=False):
+                        size += entry.stat(follow_symlinks=False).st_size
+                        files += 1
+                except FileNotFoundError:
+                    pass
+    except FileNotFoundError:
+        pass
+    return files, size
+
+
+class MetricsServer:
+    """
+    HTTP server for GET /metrics. Every scrape reads the counters of the bot objects, only the picture directories are
+    scanned at most once per scan_interval on the executor.
+    """
+
+    def __init__(self, bot: discord.Bot, host: str = "127.0.0.1", port: int = 9108,
+                 directories: typing.Optional[dict] = None, scan_interval: float = 60.0):
+        """
+        Init for the Metrics Server.
+
+        :param bot: discord.Bot -> The Bot with the stores, schedulers and the Tracer.
+        :param host: str -> Address the server listens on, keep it local.
+        :param port: int -> Port the server listens on.
+        :param directories: Optional[dict] -> kind -> directory of the pictures, default temp and saved pictures.
+        :param scan_interval: float -> Seconds the result of a directory scan is reused.
+        """
+
+        self.bot: discord.Bot = bot
+        self.host: str = host
+        self.port: int = port
+        self.directories: dict = directories or {"temp": "./daten/pictures", "saved": "./daten/saved_pictures"}
+        self.scan_interval: float = scan_interval
+        self.runner: typing.Optional[web.AppRunner] = None
+        # kind -> (amount of files, bytes) of the last scan
+        self.directory_stats: dict[str, tuple[int, int]] = {}
+        self.scanned: float = -math.inf
+        self.scan_lock: asyncio.Lock = asyncio.Lock()
+        self.scrapes: int = 0
+
+    async def scan_directories(self) -> dict:
+        """
+        Scans the picture directories, if the last scan is older than scan_interval.
+
+        :return: dict -> kind -> (amount of files, bytes)
+        """
+
+        async with self.scan_lock:
+            if time.monotonic() - self.scanned >= self.scan_interval:
+                loop = asyncio.get_running_loop()
+                self.directory_stats = {kind: await loop.run_in_executor(None, scan_directory, directory)
+                                        for kind, directory in self.directories.items()}
+                self.scanned = time.monotonic()
+        return self.directory_stats
+
+    async def render(self) -> str:
+        """
+        Collects all metrics.
+
+        :return: str -> The Prometheus text.
+        """
+
+        bot: discord.Bot = self.bot
+        writer: MetricsWriter = MetricsWriter()
+
+        # Embed UI
+        session_manager = bot.session_manager
+        writer.single("sessions_active", "gauge", "Open Embed UIs.", len(session_manager.sessions))
+        writer.single("sessions_evicted_total", "counter", "Embed UIs evicted for inactivity or replacement.",
+                      session_manager.evicted)
+        writer.single("sessions_rejected_total", "counter", "Embed UIs rejected by the session limits.",
+                      session_manager.rejected)
+        writer.single("sessions_memory_bytes", "gauge", "Approximate memory of all open Embed UIs.",
+                      sum(session_manager.memory().values()))
+        dispatcher = bot.attachment_dispatcher
+        writer.single("image_waits_pending", "gauge", "Image Views waiting for an attachment.",
+                      len(dispatcher.pending))
+        writer.metric("image_wait_messages_total", "counter", "Messages checked by the Attachment Dispatcher.",
+                      [({"result": "matched"}, dispatcher.matched), ({"result": "filtered"}, dispatcher.filtered)])
+
+        # REST calls
+        scheduler = bot.rest_scheduler
+        writer.metric("rest_calls_total", "counter", "REST calls by route.",
+                      [({"route": route}, count) for route, count in scheduler.calls.items()])
+        writer.metric("rest_errors_total", "counter", "Failed REST calls by route.",
+                      [({"route": route}, count) for route, count in scheduler.errors.items()])
+        writer.metric("rest_upload_bytes_total", "counter", "Uploaded file bytes by route.",
+                      [({"route": route}, size) for route, size in scheduler.upload_bytes.items()])
+        writer.single("rest_queued", "gauge", "REST calls waiting in the scheduler.",
+                      sum(len(queue) for queue in scheduler.queues.values()))
+        writer.single("rest_merged_total", "counter", "Queued edits merged or dropped.", scheduler.merged)
+        writer.single("rest_rate_limited_total", "counter", "REST calls answered with 429.", scheduler.rate_limited)
+        writer.single("rest_wait_seconds_max", "gauge", "Longest wait of a call in the scheduler queue.",
+                      scheduler.wait_max)
+
+        # Pictures
+        for kind, (files, size) in (await self.scan_directories()).items():
+            writer.single(f"pictures_{kind}_files", "gauge", f"Files in the {kind} picture directory.", files)
+            writer.single(f"pictures_{kind}_bytes", "gauge", f"Bytes in the {kind} picture directory.", size)
+
+        # Storage
+        embed_store = bot.embed_store
+        writer.histogram("storage_seconds", "Duration of the Database calls.", [(None, embed_store.latency)])
+        writer.metric("embed_cache_requests_total", "counter", "Lookups in the embed cache.",
+                      [({"result": "hit"}, embed_store.cache.hits), ({"result": "miss"}, embed_store.cache.misses)])
+        writer.single("embed_cache_entries", "gauge", "Cached embeds.", len(embed_store.cache.entries))
+        writer.single("embed_cache_bytes", "gauge", "Size of the cached embeds.", embed_store.cache.bytes)
+
+        picture_cache = bot.file_io.cache
+        if picture_cache is not None:
+            writer.metric("picture_cache_requests_total", "counter", "Lookups in the picture cache.",
+                          [({"result": "hit"}, picture_cache.hits), ({"result": "miss"}, picture_cache.misses)])
+            writer.single("picture_cache_entries", "gauge", "Cached pictures.", len(picture_cache.entries))
+            writer.single("picture_cache_bytes", "gauge", "Size of the cached pictures.", picture_cache.bytes)
+        writer.single("file_io_calls_total", "counter", "Calls on the File IO pool.", bot.file_io.calls)
+        image_normalizer = bot.image_normalizer
+        if image_normalizer is not None:
+            writer.metric("images_normalized_total", "counter", "Uploaded Images by normalization result.",
+                          [({"result": "normalized"}, image_normalizer.normalized),
+                           ({"result": "unchanged"}, image_normalizer.unchanged),
+                           ({"result": "failed"}, image_normalizer.failed)])
+            writer.single("images_normalize_cache_hits_total", "counter", "Normalizations served from the cache.",
+                          image_normalizer.cache_hits)
+
+        # Latency
+        # Heartbeat latency of the gateway, nan or inf before the first heartbeat.
+        if math.isfinite(bot.latency):
+            writer.single("gateway_latency_seconds", "gauge", "Latency of the gateway heartbeat.", bot.latency)
+        loop_monitor = bot.loop_monitor
+        writer.histogram("event_loop_lag_seconds", "Lag of the event loop.", [(None, loop_monitor.lag)])
+        writer.single("event_loop_lag_max_seconds", "gauge", "Maximum lag of the event loop.", loop_monitor.lag.max)
+        writer.single("event_loop_stalls_total", "counter", "Event loop stalls over the threshold.",
+                      loop_monitor.stall_count)
+        tracer = bot.tracer
+        writer.histogram("interaction_stage_seconds", "Duration of the traced interaction stages.",
+                         [({"stage": stage}, histogram) for stage, histogram in sorted(tracer.histograms.items())])
+        writer.metric("interactions_total", "counter", "Traced interactions by deadline status.",
+                      [({"status": "all"}, tracer.traces), ({"status": "slow"}, tracer.slow),
+                       ({"status": "missed"}, tracer.missed)])
+
+        self.scrapes += 1
+        writer.single("metrics_scrapes_total", "counter", "Scrapes of this endpoint.", self.scrapes)
+        return writer.text()
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """
+        Handler for GET /metrics.
+
+        :param request: web.Request -> The request.
+        :return: web.Response -> The metrics.
+        """
+
+        return web.Response(body=(await self.render()).encode(),
+                            headers={"Content-Type": "text/plain; version=0.0.4; charset=utf-8"})
+
+    async def start(self) -> None:
+        """
+        Starts the server, if it is not running yet. If the port is in use, the Bot runs without metrics.
+
+        :return:
+        """
+
+        if self.runner is not None:
+            return
+        app: web.Application = web.Application()
+        app.router.add_get("/metrics", self.handle)
+        runner: web.AppRunner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        try:
+            await web.TCPSite(runner, self.host, self.port).start()
+        except OSError as error:
+            await runner.cleanup()
+            print(f"Metrics Server: could not listen on {self.host}:{self.port} ({error})")
+            return
+        self.runner = runner
+
+    async def stop(self) -> None:
+        """
+        Stops the server.
+
+        :return:
+        """
+
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
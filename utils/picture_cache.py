@@ -0,0 +1,96 @@
+"""
+Contains the LRU Cache for pictures. Keeps the bytes of recently sent pictures, so repeated previews do not read them
+from disk again.
+"""
+
+import collections
+import typing
+
+
+class PictureCache:
+    """
+    Bounded LRU Cache for the bytes of pictures keyed by file name. Limited by the size of all pictures in bytes.
+    Temporary and saved pictures are never changed under the same name (uuid and content hash), so an entry stays
+    valid until the file gets removed or moved. Only used on the event loop.
+    """
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_item_bytes: int = 8 * 1024 * 1024):
+        """
+        Init for the Picture Cache.
+
+        :param max_bytes: int -> Maximum size of all cached pictures.
+        :param max_item_bytes: int -> Bigger pictures are not cached, they are sent directly from disk.
+        """
+
+        self.max_bytes: int = max_bytes
+        self.max_item_bytes: int = min(max_item_bytes, max_bytes)
+        # name -> bytes - The order is the LRU order, last is the most recently used.
+        self.entries: collections.OrderedDict = collections.OrderedDict()
+        self.bytes: int = 0
+        # Changes on every invalidation. Pictures read before an invalidation are not added anymore.
+        self.generation: int = 0
+        # Counters
+        self.hits: int = 0
+        self.misses: int = 0
+
+    def get(self, name: str) -> typing.Optional[bytes]:
+        """
+        Gets the bytes of a picture.
+
+        :param name: str -> The file name.
+        :return: Optional[bytes] -> None if the picture is not cached.
+        """
+
+        data: typing.Optional[bytes] = self.entries.get(name)
+        if data is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(name)
+        return data
+
+    def put(self, name: str, data: bytes, generation: int) -> None:
+        """
+        Adds a picture to the cache. Evicts the least recently used pictures if the limit is reached.
+
+        :param name: str -> The file name.
+        :param data: bytes -> The content of the file.
+        :param generation: int -> The generation when the file was read, outdated reads do not get cached.
+        :return:
+        """
+
+        if generation != self.generation or len(data) > self.max_item_bytes:
+            return
+        old: typing.Optional[bytes] = self.entries.pop(name, None)
+        if old is not None:
+            self.bytes -= len(old)
+        self.entries[name] = data
+        self.bytes += len(data)
+        while self.bytes > self.max_bytes:
+            _, evicted = self.entries.popitem(last=False)
+            self.bytes -= len(evicted)
+
+    def invalidate(self, names: typing.Iterable[str]) -> None:
+        """
+        Removes pictures from the cache, e.g. because the files were removed or moved.
+
+        :param names: Iterable[str] -> The file names.
+        :return:
+        """
+
+        self.generation += 1
+        for name in names:
+            data: typing.Optional[bytes] = self.entries.pop(name, None)
+            if data is not None:
+                self.bytes -= len(data)
+
+    def clear(self) -> None:
+        """
+        Removes all pictures from the cache. The counters stay.
+
+        :return:
+        """
+
+        self.generation += 1
+        self.entries.clear()
+        self.bytes = 0
@@ -0,0 +1,153 @@
+"""
+Contains the Garbage Collector for saved pictures. Marks every picture referenced by a stored embed and removes all
+other files in ./daten/saved_pictures.
+Offline usage (from the repository root): python -m utils.picture_gc [--delete]
+"""
+
+import argparse
+import asyncio
+import os
+import time
+import typing
+
+from database.embed_store import EmbedStore
+from database.image_store import ImageStore
+
+
+def referenced_names(value: dict) -> set:
+    """
+    Gets the file names of all pictures an embed references via attachment://.
+
+    :param value: dict -> The embed data (embed.to_dict()).
+    :return: set -> The file names.
+    """
+
+    names: set = set()
+    for key, url_key in [("image", "url"), ("thumbnail", "url"), ("author", "icon_url"), ("footer", "icon_url")]:
+        url: typing.Any = value.get(key, {}).get(url_key)
+        if type(url) is str and url.startswith("attachment://"):
+            names.add(url[13:])
+    return names
+
+
+def sweep_batch(entries: typing.Iterator[os.DirEntry], referenced: set, oldest: float, dry_run: bool,
+                batch_size: int) -> tuple[int, list, int]:
+    """
+    Handles the next batch of directory entries. Runs in the executor.
+
+    :param entries: Iterator[os.DirEntry] -> The scandir iterator.
+    :param referenced: set -> File names referenced by stored embeds.
+    :param oldest: float -> Only files modified before this timestamp get removed.
+    :param dry_run: bool -> If True nothing gets removed.
+    :param batch_size: int -> Maximum amount of entries handled.
+    :return: tuple[int, list, int] -> (scanned entries, unreferenced file names, their bytes), 0 scanned if finished.
+    """
+
+    scanned: int = 0
+    unreferenced: list = []
+    unreferenced_bytes: int = 0
+    for entry in entries:
+        scanned += 1
+        # Placeholder files (.txt) stay, they keep the directory in git.
+        if entry.name not in referenced and not entry.name.endswith(".txt") and entry.is_file(follow_symlinks=False):
+            try:
+                stat: os.stat_result = entry.stat(follow_symlinks=False)
+                # Young files could belong to a save which is not finished yet. The image store sets the modification
+                # time when a save stores or reuses a picture.
+                if stat.st_mtime < oldest:
+                    if not dry_run:
+                        os.remove(entry.path)
+                    unreferenced.append(entry.name)
+                    unreferenced_bytes += stat.st_size
+            except FileNotFoundError:
+                pass
+        if scanned >= batch_size:
+            break
+    return scanned, unreferenced, unreferenced_bytes
+
+
+async def collect_saved_pictures(embed_store: EmbedStore, image_store: ImageStore, dry_run: bool = True,
+                                 batch_size: int = 500, min_age: float = 3600.0) -> dict:
+    """
+    Mark and sweep for saved pictures. Streams all stored embeds (mark), then removes every file in the image store
+    directory which is not referenced (sweep).
+
+    :param embed_store: EmbedStore -> The store with all embeds.
+    :param image_store: ImageStore -> The store of the saved pictures.
+    :param dry_run: bool -> If True only the report is created, nothing gets removed.
+    :param batch_size: int -> Amount of embeds / directory entries handled per batch.
+    :param min_age: float -> Minimum age of a file in seconds before it can be removed.
+    :return: dict -> The report (embeds, referenced, scanned, unreferenced, unreferenced_bytes, seconds,
+    files_per_second, dry_run).
+    """
+
+    loop = asyncio.get_running_loop()
+    start: float = time.monotonic()
+    # Mark
+    embeds: int = 0
+    referenced: set = set()
+    async for embed in embed_store.iterate(batch_size):
+        embeds += 1
+        referenced |= referenced_names(embed["value"])
+    # Sweep
+    oldest: float = time.time() - min_age
+    scanned: int = 0
+    unreferenced: list = []
+    unreferenced_bytes: int = 0
+    entries = await loop.run_in_executor(None, os.scandir, image_store.directory)
+    try:
+        while True:
+            batch_scanned, batch_names, batch_bytes = await loop.run_in_executor(None, sweep_batch, entries,
+                                                                                 referenced, oldest, dry_run,
+                                                                                 batch_size)
+            if batch_scanned == 0:
+                break
+            scanned += batch_scanned
+            unreferenced += batch_names
+            unreferenced_bytes += batch_bytes
+            if not dry_run:
+                await image_store.forget(batch_names)
+    finally:
+        entries.close()
+    seconds: float = time.monotonic() - start
+    return {"embeds": embeds, "referenced": len(referenced), "scanned": scanned, "unreferenced": unreferenced,
+            "unreferenced_bytes": unreferenced_bytes, "seconds": seconds,
+            "files_per_second": scanned / seconds if seconds > 0 else 0.0, "dry_run": dry_run}
+
+
+def format_report(report: dict) -> str:
+    """
+    Formats the report for the User.
+
+    :param report: dict -> The report of collect_saved_pictures.
+    :return: str -> The formatted report.
+    """
+
+    action: str = "Would remove" if report["dry_run"] else "Removed"
+    return f"Checked {report['embeds']} embeds ({report['referenced']} referenced pictures) and {report['scanned']} " \
+           f"files in {report['seconds']:.2f}s ({report['files_per_second']:.0f} files/s).\n" \
+           f"{action} {len(report['unreferenced'])} files ({report['unreferenced_bytes']} bytes)."
+
+
+async def main(dry_run: bool) -> None:
+    """
+    Offline run of the Garbage Collector.
+
+    :param dry_run: bool -> If True nothing gets removed.
+    :return:
+    """
+
+    embed_store: EmbedStore = EmbedStore("./daten/embeds.db")
+    image_store: ImageStore = ImageStore(embed_store, "./daten/saved_pictures")
+    report: dict = await collect_saved_pictures(embed_store, image_store, dry_run=dry_run)
+    await embed_store.close()
+    for name in report["unreferenced"]:
+        print(name)
+    print(format_report(report))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Removes saved pictures no embed references.")
+    parser.add_argument("--delete", action="store_true", help="Remove the files, without only a report is printed.")
+    arguments = parser.parse_args()
+    asyncio.run(main(not arguments.delete))
@@ -0,0 +1,370 @@
+"""
+Contains the REST Scheduler. Queues the message edits, sends and deletes of the Embed UIs per channel.
+"""
+
+import asyncio
+import collections
+import enum
+import functools
+import heapq
+import itertools
+import os
+import time
+import typing
+
+import discord
+
+
+class Priority(enum.IntEnum):
+    """
+    Enum for the priority of a REST call, lower runs first.
+    """
+
+    response = 0 # Answers to the User (control panel, retry and error messages)
+    update = 1 # Preview updates
+    cleanup = 2 # Deletes of old messages
+
+
+class TokenBucket:
+    """
+    Local mirror of a Discord rate limit bucket: rate calls per per seconds.
+    """
+
+    def __init__(self, rate: int, per: float):
+        """
+        Init for the Token Bucket.
+
+        :param rate: int -> Calls per period.
+        :param per: float -> Length of the period in seconds.
+        """
+
+        self.rate: int = rate
+        self.per: float = per
+        self.tokens: float = rate
+        self.updated: float = time.monotonic()
+
+    def delay(self) -> float:
+        """
+        Takes a token if one is available.
+
+        :return: float -> 0 if a token was taken, else the seconds until the next token.
+        """
+
+        now: float = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) * self.per / self.rate
+
+    def drain(self) -> None:
+        """
+        Empties the bucket, e.g. after Discord answered with 429.
+
+        :return:
+        """
+
+        self.tokens = 0.0
+        self.updated = time.monotonic()
+
+
+def route_name(function: typing.Callable) -> str:
+    """
+    Gets the route a REST call is counted under, the qualified name of the called method (e.g. Message.edit).
+
+    :param function: Callable -> The REST call, partials get unwrapped.
+    :return: str -> The name of the route.
+    """
+
+    while isinstance(function, functools.partial):
+        function = function.func
+    return getattr(function, "__qualname__", type(function).__name__)
+
+
+# Calls on objects of these types go through the webhook or interaction routes, which have their own rate limits and
+# do not count against the limit of the channel (e.g. followups and edits of followup messages).
+WEBHOOK_TYPES: tuple = (discord.Webhook, discord.WebhookMessage, discord.Interaction, discord.InteractionResponse,
+                        discord.InteractionMessage)
+
+
+def is_channel_route(function: typing.Callable) -> bool:
+    """
+    Checks if a REST call counts against the rate limit of the channel (channel message send, edit and delete).
+
+    :param function: Callable -> The REST call, partials get unwrapped.
+    :return: bool -> False for webhook and interaction calls.
+    """
+
+    while isinstance(function, functools.partial):
+        function = function.func
+    return not isinstance(getattr(function, "__self__", None), WEBHOOK_TYPES)
+
+
+def upload_size(kwargs: dict) -> int:
+    """
+    Gets the bytes of all files (file, files) of a REST call. Read before the call, discord closes the files after
+    sending.
+
+    :param kwargs: dict -> The keyword arguments of the call.
+    :return: int -> The size of all files in bytes.
+    """
+
+    files: list = list(kwargs.get("files") or [])
+    if kwargs.get("file") is not None:
+        files.append(kwargs["file"])
+    size: int = 0
+    for file in files:
+        try:
+            position: int = file.fp.tell()
+            size += file.fp.seek(0, os.SEEK_END) - position
+            file.fp.seek(position)
+        except (AttributeError, OSError, ValueError):
+            pass
+    return size
+
+
+class RestJob:
+    """
+    One queued REST call. Ordered by priority, then by order of arrival.
+    """
+
+    __slots__ = ("priority", "sequence", "function", "kwargs", "merge_key", "future", "enqueued", "route",
+                 "channel_route")
+
+    def __init__(self, priority: Priority, sequence: int, function: typing.Callable[..., typing.Awaitable],
+                 kwargs: dict, merge_key: typing.Optional[int], future: asyncio.Future):
+        self.priority: Priority = priority
+        self.sequence: int = sequence
+        self.function: typing.Callable[..., typing.Awaitable] = function
+        self.kwargs: dict = kwargs
+        self.merge_key: typing.Optional[int] = merge_key
+        self.future: asyncio.Future = future
+        self.enqueued: float = time.monotonic()
+        self.route: str = route_name(function)
+        self.channel_route: bool = is_channel_route(function)
+
+    def __lt__(self, other: "RestJob") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class RestScheduler:
+    """
+    One queue and one worker per channel. Every call waits for a token of the global bucket, calls on the channel
+    routes also for a token of their channel bucket, so pycord does not have to sleep on a 429 inside the handler.
+    Queued edits of the same message get merged, only the latest values are sent.
+    """
+
+    def __init__(self, channel_rate: int = 5, channel_per: float = 5.0, global_rate: int = 50,
+                 global_per: float = 1.0):
+        """
+        Init for the REST Scheduler.
+
+        :param channel_rate: int -> Calls per channel per channel_per seconds.
+        :param channel_per: float -> Period of the channel bucket in seconds.
+        :param global_rate: int -> Calls in total per global_per seconds.
+        :param global_per: float -> Period of the global bucket in seconds.
+        """
+
+        self.channel_rate: int = channel_rate
+        self.channel_per: float = channel_per
+        self.global_bucket: TokenBucket = TokenBucket(global_rate, global_per)
+        self.buckets: dict[int, TokenBucket] = {}
+        self.queues: dict[int, list[RestJob]] = {}
+        self.workers: dict[int, asyncio.Task] = {}
+        # Queued edits by message id, new edits of the message get merged into them.
+        self.pending_edits: dict[int, RestJob] = {}
+        self.sequence: typing.Iterator[int] = itertools.count()
+        # Metrics
+        self.completed: int = 0
+        self.merged: int = 0
+        self.rate_limited: int = 0
+        self.max_depth: int = 0
+        self.wait_total: float = 0.0
+        self.wait_max: float = 0.0
+        # route -> amount of calls, failed calls and uploaded bytes
+        self.calls: collections.Counter = collections.Counter()
+        self.errors: collections.Counter = collections.Counter()
+        self.upload_bytes: collections.Counter = collections.Counter()
+
+    def _submit(self, channel_id: int, priority: Priority, function: typing.Callable[..., typing.Awaitable],
+                kwargs: dict, merge_key: typing.Optional[int] = None) -> asyncio.Future:
+        """
+        Adds a call to the queue of the channel and starts the worker if needed.
+
+        :param channel_id: int -> The id of the channel.
+        :param priority: Priority -> The priority of the call.
+        :param function: Callable[..., Awaitable] -> The REST call.
+        :param kwargs: dict -> The keyword arguments of the call.
+        :param merge_key: Optional[int] -> Message id, if later edits can be merged into this call.
+        :return: asyncio.Future -> Gets the result of the call.
+        """
+
+        job: RestJob = RestJob(priority, next(self.sequence), function, kwargs, merge_key,
+                               asyncio.get_running_loop().create_future())
+        queue: list[RestJob] = self.queues.setdefault(channel_id, [])
+        heapq.heappush(queue, job)
+        self.max_depth = max(self.max_depth, len(queue))
+        if merge_key is not None:
+            self.pending_edits[merge_key] = job
+        if channel_id not in self.workers:
+            self.workers[channel_id] = asyncio.get_running_loop().create_task(self._work(channel_id))
+        return job.future
+
+    @staticmethod
+    async def _take(bucket: TokenBucket) -> None:
+        """
+        Waits until a token of the bucket is taken.
+
+        :param bucket: TokenBucket -> The bucket.
+        :return:
+        """
+
+        while (delay := bucket.delay()) > 0:
+            await asyncio.sleep(delay)
+
+    async def _work(self, channel_id: int) -> None:
+        """
+        Runs the queued calls of one channel until the queue is empty.
+
+        :param channel_id: int -> The id of the channel.
+        :return:
+        """
+
+        queue: list[RestJob] = self.queues[channel_id]
+        bucket: TokenBucket = self.buckets.setdefault(channel_id, TokenBucket(self.channel_rate, self.channel_per))
+        try:
+            while len(queue) > 0:
+                # Wait for the buckets before taking the job, edits can still be merged while waiting. Webhook and
+                # interaction calls skip the channel bucket.
+                channel_token: bool = queue[0].channel_route
+                if channel_token:
+                    await self._take(bucket)
+                await self._take(self.global_bucket)
+                # A delete can drop the last queued edit while waiting.
+                if len(queue) == 0:
+                    break
+                # A channel call can become the first job while waiting for the global bucket.
+                if queue[0].channel_route and not channel_token:
+                    await self._take(bucket)
+                    if len(queue) == 0:
+                        break
+                job: RestJob = heapq.heappop(queue)
+                if job.merge_key is not None and self.pending_edits.get(job.merge_key) is job:
+                    del self.pending_edits[job.merge_key]
+                waited: float = time.monotonic() - job.enqueued
+                self.wait_total += waited
+                self.wait_max = max(self.wait_max, waited)
+                self.calls[job.route] += 1
+                upload: int = upload_size(job.kwargs)
+                try:
+                    result: typing.Any = await job.function(**job.kwargs)
+                except Exception as error:
+                    self.errors[job.route] += 1
+                    if isinstance(error, discord.errors.HTTPException) and error.status == 429:
+                        self.rate_limited += 1
+                        if job.channel_route:
+                            bucket.drain()
+                    if not job.future.done():
+                        job.future.set_exception(error)
+                else:
+                    self.upload_bytes[job.route] += upload
+                    if not job.future.done():
+                        job.future.set_result(result)
+                self.completed += 1
+        finally:
+            del self.workers[channel_id]
+            if len(queue) == 0:
+                del self.queues[channel_id]
+
+    async def call(self, channel_id: int, function: typing.Callable[..., typing.Awaitable], *args: typing.Any,
+                   priority: Priority = Priority.response, **kwargs: typing.Any) -> typing.Any:
+        """
+        Queues a REST call and waits for its result. Exceptions of the call are raised here.
+
+        :param channel_id: int -> The id of the channel the call belongs to.
+        :param function: Callable[..., Awaitable] -> The REST call (e.g. interaction.followup.send).
+        :param args: Any -> Positional arguments of the call.
+        :param priority: Priority -> The priority of the call. Default response.
+        :param kwargs: Any -> Keyword arguments of the call.
+        :return: Any -> The result of the call.
+        """
+
+        if len(args) > 0:
+            function = functools.partial(function, *args)
+        # Shield - A cancelled caller must not cancel a call another caller waits for.
+        return await asyncio.shield(self._submit(channel_id, priority, function, kwargs))
+
+    async def followup(self, interaction: discord.Interaction, *args: typing.Any,
+                       priority: Priority = Priority.response, **kwargs: typing.Any) -> discord.WebhookMessage:
+        """
+        Queues interaction.followup.send.
+
+        :param interaction: discord.Interaction -> The Interaction of the followup.
+        :param args: Any -> Positional arguments of followup.send.
+        :param priority: Priority -> The priority of the call. Default response.
+        :param kwargs: Any -> Keyword arguments of followup.send.
+        :return: discord.WebhookMessage -> The sent message.
+        """
+
+        return await self.call(interaction.channel_id, interaction.followup.send, *args, priority=priority,
+                               **kwargs)
+
+    async def edit(self, message: discord.Message, priority: Priority = Priority.response,
+                   **kwargs: typing.Any) -> typing.Optional[discord.Message]:
+        """
+        Queues message.edit. If an edit of the message is still queued, both are merged into one call with the latest
+        values. Edits which change the attachments (files, attachments) are not merged, the attachments of the message
+        depend on the previous edit.
+
+        :param message: discord.Message -> The message to edit.
+        :param priority: Priority -> The priority of the call. Default response.
+        :param kwargs: Any -> Keyword arguments of message.edit.
+        :return: Optional[discord.Message] -> The result of message.edit.
+        """
+
+        job: typing.Optional[RestJob] = self.pending_edits.get(message.id)
+        if job is not None and not {"files", "attachments"} & (kwargs.keys() | job.kwargs.keys()):
+            self.merged += 1
+            job.function = message.edit
+            job.kwargs.update(kwargs)
+            if priority < job.priority:
+                job.priority = priority
+                heapq.heapify(self.queues[message.channel.id])
+            return await asyncio.shield(job.future)
+        return await asyncio.shield(self._submit(message.channel.id, priority, message.edit, kwargs,
+                                                 merge_key=message.id))
+
+    async def delete(self, message: discord.Message, priority: Priority = Priority.cleanup) -> None:
+        """
+        Queues message.delete. Queued edits of the message are not needed anymore and get dropped.
+
+        :param message: discord.Message -> The message to delete.
+        :param priority: Priority -> The priority of the call. Default cleanup.
+        :return:
+        """
+
+        job: typing.Optional[RestJob] = self.pending_edits.pop(message.id, None)
+        if job is not None:
+            self.merged += 1
+            job.future.set_result(None)
+            queue: list[RestJob] = self.queues[message.channel.id]
+            queue.remove(job)
+            heapq.heapify(queue)
+        await self.call(message.channel.id, message.delete, priority=priority)
+
+    def metrics(self) -> dict:
+        """
+        Gets the metrics of the scheduler.
+
+        :return: dict -> queued (total depth), depth per channel, max_depth, completed, merged, rate_limited, wait_avg,
+        wait_max (seconds from queueing to the start of the call) and calls, errors and upload_bytes per route.
+        """
+
+        return {"queued": sum(len(queue) for queue in self.queues.values()),
+                "depth": {channel_id: len(queue) for channel_id, queue in self.queues.items()},
+                "max_depth": self.max_depth, "completed": self.completed, "merged": self.merged,
+                "rate_limited": self.rate_limited,
+                "wait_avg": self.wait_total / self.completed if self.completed > 0 else 0.0,
+                "wait_max": self.wait_max, "calls": dict(self.calls), "errors": dict(self.errors),
+                "upload_bytes": dict(self.upload_bytes)}
@@ -0,0 +1,75 @@
+"""
+Contains the Task Supervisor. Owns the background tasks of one session and cancels them when they are not needed
+anymore.
+"""
+
+import asyncio
+import typing
+
+
+class TaskSupervisor:
+    """
+    Keeps track of all tasks of a session. Tasks remove themselves when they are done.
+    """
+
+    def __init__(self):
+        self.tasks: set[asyncio.Task] = set()
+
+    @property
+    def outstanding(self) -> int:
+        """
+        The amount of tasks which are not done yet.
+
+        :return: int -> Amount of running tasks.
+        """
+
+        return len(self.tasks)
+
+    def create_task(self, coroutine: typing.Coroutine) -> asyncio.Task:
+        """
+        Starts the coroutine as task owned by this supervisor.
+
+        :param coroutine: Coroutine -> The coroutine to run.
+        :return: asyncio.Task -> The started task.
+        """
+
+        task: asyncio.Task = asyncio.get_running_loop().create_task(coroutine)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+        return task
+
+    async def first_completed(self, *coroutines: typing.Coroutine) -> None:
+        """
+        Runs all coroutines until the first one is done, the others get cancelled.
+
+        :param coroutines: Coroutine -> The coroutines to run.
+        :return:
+        """
+
+        tasks: list[asyncio.Task] = [self.create_task(coroutine) for coroutine in coroutines]
+        try:
+            await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            await self.cancel([task for task in tasks if not task.done()])
+
+    @staticmethod
+    async def cancel(tasks: list) -> None:
+        """
+        Cancels the tasks and waits until they are finished.
+
+        :param tasks: list -> The tasks to cancel.
+        :return:
+        """
+
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def cancel_all(self) -> None:
+        """
+        Cancels all tasks of the supervisor.
+
+        :return:
+        """
+
+        await self.cancel(list(self.tasks))
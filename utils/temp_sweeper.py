@@ -0,0 +1,142 @@
+"""
+Contains the Temp Sweeper. Removes old temporary pictures which no open Embed UI uses anymore.
+"""
+
+import asyncio
+import os
+import time
+import typing
+
+
+class TempSweeper:
+    """
+    Scans the temp directory at the start and every interval. Files older than the ttl are removed, if no open
+    session references them. The directory is read with os.scandir in batches on the executor, so even huge
+    directories do not block the event loop.
+    """
+
+    def __init__(self, live_images: typing.Callable[[], set], directory: str = "./daten/pictures",
+                 ttl: float = 3600.0, interval: float = 600.0, batch_size: int = 1000,
+                 on_removed: typing.Optional[typing.Callable[[list], None]] = None):
+        """
+        Init for the Temp Sweeper.
+
+        :param live_images: Callable[[], set] -> Returns the file names used by open sessions.
+        :param directory: str -> The temp directory.
+        :param ttl: float -> Minimum age in seconds before a file gets removed.
+        :param interval: float -> Seconds between two sweeps.
+        :param batch_size: int -> Amount of directory entries handled per executor call.
+        :param on_removed: Optional[Callable[[list], None]] -> Gets the names of the removed files after every batch,
+        e.g. to invalidate caches.
+        """
+
+        self.live_images: typing.Callable[[], set] = live_images
+        self.directory: str = directory
+        self.ttl: float = ttl
+        self.interval: float = interval
+        self.batch_size: int = batch_size
+        self.on_removed: typing.Optional[typing.Callable[[list], None]] = on_removed
+        self.task: typing.Optional[asyncio.Task] = None
+        # Stats of the last sweep
+        self.stats: dict = {}
+        # Entries and sweeps which failed with an OSError
+        self.errors: int = 0
+
+    def _sweep_batch(self, entries: typing.Iterator[os.DirEntry], live: set, oldest: float) -> tuple[int, list, int]:
+        """
+        Handles the next batch of directory entries. Runs in the executor.
+
+        :param entries: Iterator[os.DirEntry] -> The scandir iterator.
+        :param live: set -> File names used by open sessions.
+        :param oldest: float -> Files modified before this timestamp get removed.
+        :return: tuple[int, list, int] -> (scanned entries, removed file names, removed bytes), 0 scanned if finished.
+        """
+
+        scanned: int = 0
+        removed: list = []
+        removed_bytes: int = 0
+        for entry in entries:
+            scanned += 1
+            try:
+                # Placeholder files (.txt) stay, they keep the directory in git.
+                if entry.name in live or entry.name.endswith(".txt") or not entry.is_file(follow_symlinks=False):
+                    pass
+                elif (stat := entry.stat(follow_symlinks=False)).st_mtime < oldest:
+                    os.remove(entry.path)
+                    removed.append(entry.name)
+                    removed_bytes += stat.st_size
+            except FileNotFoundError:
+                pass
+            except OSError as error:
+                # E.g. a file still opened on Windows or without permission - The next sweep tries again.
+                self.errors += 1
+                print(f"Temp Sweeper: could not remove {entry.path}: {error!r}")
+            if scanned >= self.batch_size:
+                break
+        return scanned, removed, removed_bytes
+
+    async def sweep(self) -> dict:
+        """
+        Sweeps the temp directory once.
+
+        :return: dict -> Stats of the sweep (scanned, removed, removed_bytes, seconds).
+        """
+
+        loop = asyncio.get_running_loop()
+        start: float = time.monotonic()
+        # Files of open sessions are never removed, even if they are older than the ttl.
+        live: set = self.live_images()
+        oldest: float = time.time() - self.ttl
+        stats: dict = {"scanned": 0, "removed": 0, "removed_bytes": 0}
+        try:
+            entries = await loop.run_in_executor(None, os.scandir, self.directory)
+        except FileNotFoundError:
+            # Nothing to sweep yet.
+            entries = None
+        try:
+            while entries is not None:
+                scanned, removed, removed_bytes = await loop.run_in_executor(None, self._sweep_batch, entries, live,
+                                                                             oldest)
+                if scanned == 0:
+                    break
+                stats["scanned"] += scanned
+                stats["removed"] += len(removed)
+                stats["removed_bytes"] += removed_bytes
+                if self.on_removed is not None and len(removed) > 0:
+                    self.on_removed(removed)
+        finally:
+            if entries is not None:
+                entries.close()
+        stats["seconds"] = time.monotonic() - start
+        self.stats = stats
+        return stats
+
+    async def run(self) -> None:
+        """
+        Sweeps directly and then every interval.
+
+        :return:
+        """
+
+        while True:
+            try:
+                stats: dict = await self.sweep()
+            except OSError as error:
+                # E.g. the directory is not readable - The sweeper keeps running and tries again next interval.
+                self.errors += 1
+                print(f"Temp Sweeper: sweep of {self.directory} failed: {error!r}")
+            else:
+                if stats["removed"] > 0:
+                    print(f"Temp Sweeper: removed {stats['removed']} of {stats['scanned']} files "
+                          f"({stats['removed_bytes']} bytes) in {stats['seconds']:.2f}s")
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        """
+        Starts the sweeper, if it is not running yet.
+
+        :return:
+        """
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.get_running_loop().create_task(self.run())
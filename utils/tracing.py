@@ -0,0 +1,262 @@
+"""
+Contains the Tracer. Measures every stage of an interaction in named spans and flags interactions which answer close
+to the Discord deadline of 3 seconds.
+"""
+
+import asyncio
+import bisect
+import collections
+import contextlib
+import contextvars
+import datetime
+import functools
+import time
+import typing
+
+import discord
+
+# Upper bounds of the histogram buckets in seconds, the last bucket takes everything above.
+BUCKETS: tuple = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0)
+
+
+class Histogram:
+    """
+    Bucketed durations of one stage.
+    """
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts: list[int] = [0] * (len(BUCKETS) + 1)
+        self.count: int = 0
+        self.total: float = 0.0
+        self.max: float = 0.0
+
+    def observe(self, value: float) -> None:
+        """
+        Adds a duration.
+
+        :param value: float -> The duration in seconds.
+        :return:
+        """
+
+        self.counts[bisect.bisect_left(BUCKETS, value)] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def percentile(self, percent: float) -> float:
+        """
+        Approximates a percentile with the upper bound of its bucket.
+
+        :param percent: float -> The percentile (0 - 100).
+        :return: float -> The upper bound in seconds, at most the maximum.
+        """
+
+        rank: float = self.count * percent / 100
+        seen: int = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank and count > 0:
+                return min(BUCKETS[index], self.max) if index < len(BUCKETS) else self.max
+        return 0.0
+
+    def summary(self) -> dict:
+        """
+        Gets the summary of the histogram.
+
+        :return: dict -> count, avg, p50, p95 and max in seconds.
+        """
+
+        return {"count": self.count, "avg": self.total / self.count if self.count > 0 else 0.0,
+                "p50": self.percentile(50), "p95": self.percentile(95), "max": self.max}
+
+
+class Trace:
+    """
+    The spans of one interaction.
+    """
+
+    __slots__ = ("name", "interaction", "start", "spans", "timers", "status")
+
+    def __init__(self, name: str, interaction: discord.Interaction):
+        self.name: str = name
+        self.interaction: discord.Interaction = interaction
+        self.start: float = time.monotonic()
+        # (span path, seconds)
+        self.spans: list[tuple[str, float]] = []
+        self.timers: list[asyncio.TimerHandle] = []
+        # None, "slow" (no response at the warning) or "missed" (no response at the deadline)
+        self.status: typing.Optional[str] = None
+
+
+# The trace of the running interaction and the path of the running span, copied into every task started inside.
+current_trace: contextvars.ContextVar[typing.Optional[Trace]] = contextvars.ContextVar("current_trace", default=None)
+current_path: contextvars.ContextVar[str] = contextvars.ContextVar("current_path", default="")
+
+
+class Tracer:
+    """
+    Collects the spans of all interactions into one histogram per stage. The stage of a nested span is its path,
+    e.g. edit_author/get_image/download.
+    """
+
+    def __init__(self, deadline: float = 3.0, warn_ratio: float = 0.8, keep_flagged: int = 100):
+        """
+        Init for the Tracer.
+
+        :param deadline: float -> Seconds Discord waits for the first response.
+        :param warn_ratio: float -> Part of the deadline after which an interaction without response gets flagged.
+        :param keep_flagged: int -> Amount of flagged interactions kept for the report.
+        """
+
+        self.deadline: float = deadline
+        self.warn_ratio: float = warn_ratio
+        self.histograms: dict[str, Histogram] = {}
+        self.flagged: collections.deque[dict] = collections.deque(maxlen=keep_flagged)
+        # Counters
+        self.traces: int = 0
+        self.slow: int = 0
+        self.missed: int = 0
+
+    def observe(self, stage: str, seconds: float) -> None:
+        """
+        Adds a duration to the histogram of the stage.
+
+        :param stage: str -> The stage (span path).
+        :param seconds: float -> The duration.
+        :return:
+        """
+
+        histogram: typing.Optional[Histogram] = self.histograms.get(stage)
+        if histogram is None:
+            histogram = self.histograms[stage] = Histogram()
+        histogram.observe(seconds)
+
+    def _check_response(self, trace: Trace, status: str) -> None:
+        """
+        Timer callback, flags the trace if the interaction has no response yet.
+
+        :param trace: Trace -> The trace of the interaction.
+        :param status: str -> "slow" or "missed".
+        :return:
+        """
+
+        if trace.interaction.response.is_done():
+            for timer in trace.timers:
+                timer.cancel()
+            return
+        if trace.status is None:
+            self.slow += 1
+        if status == "missed":
+            self.missed += 1
+        trace.status = status
+
+    @contextlib.asynccontextmanager
+    async def trace(self, name: str, interaction: discord.Interaction) -> typing.AsyncIterator[None]:
+        """
+        Traces the handling of an interaction. Inside another trace (e.g. a retry) it is a span of that trace.
+
+        :param name: str -> Name of the action.
+        :param interaction: discord.Interaction -> The interaction.
+        :return:
+        """
+
+        if current_trace.get() is not None:
+            async with self.span(name):
+                yield
+            return
+        trace: Trace = Trace(name, interaction)
+        # Time between the creation of the interaction at Discord and its handling.
+        created: datetime.datetime = discord.utils.snowflake_time(interaction.id)
+        lag: float = max(0.0, datetime.datetime.now(datetime.timezone.utc).timestamp() - created.timestamp())
+        trace.spans.append(("gateway", lag))
+        loop = asyncio.get_running_loop()
+        trace.timers = [loop.call_later(max(0.0, self.deadline * self.warn_ratio - lag), self._check_response, trace,
+                                        "slow"),
+                        loop.call_later(max(0.0, self.deadline - lag), self._check_response, trace, "missed")]
+        trace_token: contextvars.Token = current_trace.set(trace)
+        path_token: contextvars.Token = current_path.set(name)
+        try:
+            yield
+        finally:
+            current_path.reset(path_token)
+            current_trace.reset(trace_token)
+            for timer in trace.timers:
+                timer.cancel()
+            self.traces += 1
+            self.observe("gateway", lag)
+            self.observe(name, time.monotonic() - trace.start)
+            if trace.status is not None:
+                self.flagged.append({"name": name, "status": trace.status, "spans": trace.spans})
+
+    @contextlib.asynccontextmanager
+    async def span(self, name: str) -> typing.AsyncIterator[None]:
+        """
+        Measures a stage of the running trace. Does nothing outside of a trace.
+
+        :param name: str -> Name of the stage.
+        :return:
+        """
+
+        trace: typing.Optional[Trace] = current_trace.get()
+        if trace is None:
+            yield
+            return
+        path: str = f"{current_path.get()}/{name}"
+        token: contextvars.Token = current_path.set(path)
+        start: float = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds: float = time.monotonic() - start
+            current_path.reset(token)
+            trace.spans.append((path, seconds))
+            self.observe(path, seconds)
+
+    def report(self) -> dict:
+        """
+        Gets the report of all stages.
+
+        :return: dict -> traces, slow, missed, stages (stage -> histogram summary) and flagged interactions.
+        """
+
+        return {"traces": self.traces, "slow": self.slow, "missed": self.missed,
+                "stages": {stage: histogram.summary() for stage, histogram in sorted(self.histograms.items())},
+                "flagged": list(self.flagged)}
+
+
+def traced(name: str) -> typing.Callable:
+    """
+    Decorator for methods of Views which handle an interaction (first argument after self). Uses the tracer of
+    self.bot.
+
+    :param name: str -> Name of the action.
+    :return: Callable -> The decorator.
+    """
+
+    def decorator(function: typing.Callable) -> typing.Callable:
+        @functools.wraps(function)
+        async def wrapper(self, interaction: discord.Interaction, *args: typing.Any, **kwargs: typing.Any) \
+                -> typing.Any:
+            async with self.bot.tracer.trace(name, interaction):
+                return await function(self, interaction, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def spanned(name: str) -> typing.Callable:
+    """
+    Decorator for methods of Views which are a stage of an interaction. Uses the tracer of self.bot.
+
+    :param name: str -> Name of the stage.
+    :return: Callable -> The decorator.
+    """
+
+    def decorator(function: typing.Callable) -> typing.Callable:
+        @functools.wraps(function)
+        async def wrapper(self, *args: typing.Any, **kwargs: typing.Any) -> typing.Any:
+            async with self.bot.tracer.span(name):
+                return await function(self, *args, **kwargs)
+        return wrapper
+    return decorator